@@ -0,0 +1,267 @@
+import os
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from .moeda import centavos_transacoes, centavos_para_reais
+from .utils import montar_lote_transacoes
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMINHO_ARMAZEM = os.getenv("ARMAZEM_TRANSACOES", "./data/armazem_transacoes.sqlite")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY,
+    empresa TEXT NOT NULL,
+    banco TEXT NOT NULL DEFAULT '',
+    conta TEXT NOT NULL DEFAULT '',
+    data TEXT,
+    descricao TEXT NOT NULL DEFAULT '',
+    valor_centavos INTEGER NOT NULL,
+    documento TEXT,
+    fitid TEXT,
+    tipo TEXT,
+    trntype TEXT,
+    arquivo TEXT,
+    chave INTEGER NOT NULL,
+    importado_em TEXT NOT NULL,
+    UNIQUE (empresa, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_empresa_data ON transacoes (empresa, data);
+CREATE INDEX IF NOT EXISTS idx_transacoes_empresa_conta_data ON transacoes (empresa, banco, conta, data);
+"""
+
+# Colunas do lote de transações -> colunas da tabela (texto opcional)
+COLUNAS_TEXTO = {
+    "Banco": "banco",
+    "Conta": "conta",
+    "FITID": "fitid",
+    "Tipo": "tipo",
+    "TRNTYPE": "trntype",
+    "Arquivo": "arquivo",
+}
+# OFX traz "Num Doc.", PDF e TXT trazem "Documento"
+COLUNAS_DOCUMENTO = ("Documento", "Num Doc.")
+
+
+def _texto(df: pd.DataFrame, coluna: str, padrao=None) -> pd.Series:
+    """Coluna como texto (`padrao` onde ausente ou se a coluna não existir)"""
+    if coluna not in df.columns:
+        return pd.Series(padrao, index=df.index, dtype=object)
+    serie = df[coluna]
+    return serie.astype(str).astype(object).where(serie.notna().to_numpy(), padrao)
+
+
+def _objetos(serie: pd.Series):
+    """Valores Python (None no lugar de ausentes) para o executemany do sqlite3"""
+    return serie.astype(object).where(serie.notna(), None).to_numpy(dtype=object)
+
+
+class ArmazemTransacoes:
+    """
+    Armazém local (SQLite) das transações importadas, por empresa, conta e data.
+    Cada importação acrescenta só o que ainda não existe (conta + data + descrição
+    normalizada + valor em centavos + FITID + ocorrência no arquivo, gravada como hash
+    de 64 bits); a leitura por período usa os índices e devolve o lote no mesmo formato
+    dos extratores. As etapas de análise continuam lendo o lote carregado na sessão.
+    """
+
+    def __init__(self, caminho: str = None):
+        """
+        Inicializa o armazém, criando o arquivo e as tabelas se necessário
+
+        Args:
+            caminho: Arquivo SQLite (padrão: ARMAZEM_TRANSACOES ou ./data/armazem_transacoes.sqlite)
+        """
+        self.caminho = caminho or CAMINHO_ARMAZEM
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self.conectar()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(ESQUEMA)
+
+    def conectar(self) -> sqlite3.Connection:
+        """Nova conexão (uma por operação: o Streamlit atende cada sessão em outra thread)"""
+        con = sqlite3.connect(self.caminho, timeout=30)
+        # Com WAL, NORMAL continua íntegro após queda do processo e evita um fsync por commit
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    @staticmethod
+    def preparar_registros(df: pd.DataFrame, empresa: str) -> list:
+        """Converte o lote de transações em tuplas na ordem das colunas de inserção"""
+        centavos = centavos_transacoes(df)
+        validos = centavos.notna().to_numpy()
+        df = df[validos]
+        centavos = centavos[validos].astype("int64")
+
+        datas = df["Data"]
+        if not pd.api.types.is_datetime64_any_dtype(datas):
+            datas = pd.to_datetime(datas, errors="coerce", dayfirst=True)
+        datas = datas.dt.strftime("%Y-%m-%d")
+
+        descricoes = _texto(df, "Descrição", "")
+        documento = next((c for c in COLUNAS_DOCUMENTO if c in df.columns), None)
+        documentos = _texto(df, documento) if documento else _texto(df, "__sem_documento")
+        textos = {coluna: _texto(df, origem) for origem, coluna in COLUNAS_TEXTO.items()}
+        bancos = textos["banco"].fillna("")
+        contas = textos["conta"].fillna("")
+
+        # Chave da deduplicação da Pré-Análise, separada por conta e pelo FITID do OFX.
+        # Lançamentos idênticos no mesmo arquivo (duas tarifas iguais no dia) se distinguem
+        # pela ocorrência, que se repete igual ao reimportar o arquivo. O hash de 64 bits
+        # (com sinal, como o INTEGER do SQLite) deixa o índice UNIQUE bem menor que o texto
+        desc_normalizada = descricoes.str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+        chaves = (
+            bancos + "|" + contas + "|" + datas.fillna("") + "|" +
+            desc_normalizada + "|" + centavos.astype(str) + "|" + textos["fitid"].fillna("")
+        )
+        ocorrencias = chaves.groupby(chaves.to_numpy(), sort=False).cumcount().astype(str)
+        chaves = pd.util.hash_array((chaves + "|" + ocorrencias).to_numpy(dtype=object)).view("int64")
+
+        importado_em = datetime.now().isoformat(timespec="seconds")
+        return list(zip(
+            [empresa] * len(df), _objetos(bancos), _objetos(contas), _objetos(datas),
+            _objetos(descricoes), centavos.tolist(), _objetos(documentos), _objetos(textos["fitid"]),
+            _objetos(textos["tipo"]), _objetos(textos["trntype"]), _objetos(textos["arquivo"]),
+            chaves.tolist(), [importado_em] * len(df)
+        ))
+
+    def inserir(self, df: pd.DataFrame, empresa: str) -> int:
+        """
+        Acrescenta ao armazém as transações ainda não registradas para a empresa.
+
+        Returns:
+            int: Quantidade de transações novas gravadas (None se a gravação falhou)
+        """
+        if df is None or df.empty or "Data" not in df.columns:
+            return 0
+
+        try:
+            registros = self.preparar_registros(df, empresa)
+            with closing(self.conectar()) as con, con:
+                antes = con.total_changes
+                con.executemany(
+                    """
+                    INSERT OR IGNORE INTO transacoes (
+                        empresa, banco, conta, data, descricao, valor_centavos, documento,
+                        fitid, tipo, trntype, arquivo, chave, importado_em
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    registros
+                )
+                novas = con.total_changes - antes
+            logger.info(f"Armazém: {novas} de {len(registros)} transações novas para {empresa}")
+            return novas
+        except Exception as e:
+            logger.error(f"Erro ao gravar transações de {empresa} no armazém: {e}")
+            return None
+
+    def consultar(
+        self, empresa: str, inicio=None, fim=None, contas: list = None, incluir_sem_data: bool = True
+    ) -> pd.DataFrame:
+        """
+        Transações da empresa no período [inicio, fim] (datas inclusivas; None = sem limite),
+        opcionalmente só das contas informadas, no formato dos lotes dos extratores.
+        Transações sem data (mês/ano não resolvido na importação) não pertencem a período
+        nenhum; com incluir_sem_data elas vêm junto, com Data vazia, para serem revisadas.
+        """
+        condicoes = ["empresa = ?"]
+        parametros = [empresa]
+        periodo = []
+        if inicio is not None:
+            periodo.append("data >= ?")
+            parametros.append(pd.Timestamp(inicio).strftime("%Y-%m-%d"))
+        if fim is not None:
+            periodo.append("data <= ?")
+            parametros.append(pd.Timestamp(fim).strftime("%Y-%m-%d"))
+        if periodo:
+            sem_data = "data IS NULL OR " if incluir_sem_data else ""
+            condicoes.append(f"({sem_data}({' AND '.join(periodo)}))")
+        if contas:
+            condicoes.append(f"conta IN ({', '.join('?' * len(contas))})")
+            parametros.extend(contas)
+
+        consulta = f"""
+            SELECT arquivo, data, descricao, documento, valor_centavos, tipo, trntype, banco, conta, fitid
+            FROM transacoes
+            WHERE {' AND '.join(condicoes)}
+            ORDER BY data, id
+        """
+        try:
+            with closing(self.conectar()) as con:
+                registros = pd.read_sql_query(consulta, con, params=parametros)
+        except Exception as e:
+            logger.error(f"Erro ao consultar o armazém para {empresa}: {e}")
+            return pd.DataFrame()
+
+        colunas = {
+            "Arquivo": registros["arquivo"],
+            "Data": registros["data"],
+            "Descrição": registros["descricao"],
+            "Documento": registros["documento"],
+            "Valor (R$)": centavos_para_reais(registros["valor_centavos"]),
+            "Tipo": registros["tipo"],
+            "TRNTYPE": registros["trntype"],
+            "Banco": registros["banco"].replace("", None),
+            "Conta": registros["conta"].replace("", None),
+            "FITID": registros["fitid"],
+        }
+        # Colunas que nenhum registro preencheu (ex.: FITID só existe em OFX) ficam de fora
+        colunas = {nome: serie for nome, serie in colunas.items() if nome in ("Data", "Descrição", "Valor (R$)") or serie.notna().any()}
+        return montar_lote_transacoes(colunas)
+
+    def empresas(self) -> list:
+        """Empresas com transações no armazém, em ordem alfabética"""
+        try:
+            with closing(self.conectar()) as con:
+                return [linha[0] for linha in con.execute("SELECT DISTINCT empresa FROM transacoes ORDER BY empresa")]
+        except Exception as e:
+            logger.error(f"Erro ao listar empresas do armazém: {e}")
+            return []
+
+    def periodo(self, empresa: str):
+        """Primeira e última data (date) das transações da empresa, ou (None, None)"""
+        try:
+            with closing(self.conectar()) as con:
+                inicio, fim = con.execute(
+                    "SELECT MIN(data), MAX(data) FROM transacoes WHERE empresa = ?", (empresa,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"Erro ao consultar período de {empresa} no armazém: {e}")
+            return None, None
+        if inicio is None:
+            return None, None
+        return pd.Timestamp(inicio).date(), pd.Timestamp(fim).date()
+
+    def contas(self, empresa: str) -> list:
+        """Contas da empresa registradas no armazém"""
+        try:
+            with closing(self.conectar()) as con:
+                return [
+                    linha[0] for linha in con.execute(
+                        "SELECT DISTINCT conta FROM transacoes WHERE empresa = ? AND conta != '' ORDER BY conta",
+                        (empresa,)
+                    )
+                ]
+        except Exception as e:
+            logger.error(f"Erro ao listar contas de {empresa} no armazém: {e}")
+            return []
+
+    def excluir_empresa(self, empresa: str) -> int:
+        """Apaga todas as transações da empresa; retorna quantas foram removidas"""
+        try:
+            with closing(self.conectar()) as con, con:
+                removidas = con.execute("DELETE FROM transacoes WHERE empresa = ?", (empresa,)).rowcount
+            logger.info(f"Armazém: {removidas} transações de {empresa} apagadas")
+            return removidas
+        except Exception as e:
+            logger.error(f"Erro ao apagar {empresa} do armazém: {e}")
+            return 0
@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import pandas as pd
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CACHE = os.getenv("CACHE_EXTRATOS_DIR", "./data/cache_extratos")
+LIMITE_CACHE_BYTES = int(os.getenv("CACHE_EXTRATOS_MB", "512")) * 1024 * 1024
+
+# Incrementar sempre que a saída dos extratores mudar, para invalidar o cache existente
+VERSAO_EXTRATORES = "2025.06.5"
+
+ARQUIVO_META = "meta.json"
+
+
+def chave_cache(conteudo, tipo, *extras):
+    """
+    Gera a chave do cache: SHA-256 dos bytes do arquivo + tipo + versão dos extratores.
+    `extras` entra na chave quando a saída depende de algo além do conteúdo
+    (ex.: nome do arquivo, usado para inferir mês/ano em PDF e TXT).
+    """
+    hash_arquivo = hashlib.sha256(conteudo)
+    hash_arquivo.update("|".join([tipo, VERSAO_EXTRATORES, *map(str, extras)]).encode("utf-8"))
+    return hash_arquivo.hexdigest()
+
+
+def ler_cache(chave):
+    """
+    Retorna o resultado salvo para a chave (tabelas como DataFrame) ou None.
+    A leitura atualiza o mtime da entrada, que é a referência do LRU.
+    """
+    pasta = os.path.join(DIRETORIO_CACHE, chave)
+    caminho_meta = os.path.join(pasta, ARQUIVO_META)
+    if not os.path.exists(caminho_meta):
+        return None
+
+    try:
+        with open(caminho_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        resultado = meta["valores"]
+        for nome in meta["tabelas"]:
+            resultado[nome] = pd.read_parquet(os.path.join(pasta, f"{nome}.parquet"))
+        os.utime(pasta)
+        logger.info(f"Resultado recuperado do cache: {chave[:12]}")
+        return resultado
+    except Exception as e:
+        logger.warning(f"Entrada de cache inválida {chave[:12]}, descartando: {e}")
+        shutil.rmtree(pasta, ignore_errors=True)
+        return None
+
+
+def gravar_cache(chave, resultado):
+    """
+    Salva um resultado no cache: DataFrames em Parquet e os demais valores em JSON.
+    Falhas são apenas registradas em log; o cache nunca interrompe a extração.
+    """
+    temporaria = None
+    try:
+        os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+        # Grava em pasta temporária e renomeia: leitores nunca veem uma entrada incompleta
+        temporaria = tempfile.mkdtemp(dir=DIRETORIO_CACHE, prefix=".tmp_")
+        tabelas = []
+        valores = {}
+        for nome, valor in resultado.items():
+            if isinstance(valor, pd.DataFrame):
+                valor.to_parquet(os.path.join(temporaria, f"{nome}.parquet"), index=False)
+                tabelas.append(nome)
+            else:
+                valores[nome] = valor
+
+        with open(os.path.join(temporaria, ARQUIVO_META), "w", encoding="utf-8") as f:
+            json.dump({"tabelas": tabelas, "valores": valores}, f, ensure_ascii=False)
+
+        destino = os.path.join(DIRETORIO_CACHE, chave)
+        if os.path.exists(destino):
+            shutil.rmtree(temporaria, ignore_errors=True)
+        else:
+            os.replace(temporaria, destino)
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar o cache {chave[:12]}: {e}")
+        if temporaria:
+            shutil.rmtree(temporaria, ignore_errors=True)
+        return
+
+    limpar_cache()
+
+
+def tamanho_pasta(pasta):
+    return sum(
+        os.path.getsize(os.path.join(raiz, nome))
+        for raiz, _, arquivos in os.walk(pasta)
+        for nome in arquivos
+    )
+
+
+def limpar_cache(limite_bytes=LIMITE_CACHE_BYTES):
+    """
+    Remove as entradas usadas há mais tempo até o cache caber no limite de tamanho.
+    """
+    if not os.path.isdir(DIRETORIO_CACHE):
+        return
+
+    entradas = []
+    for nome in os.listdir(DIRETORIO_CACHE):
+        pasta = os.path.join(DIRETORIO_CACHE, nome)
+        if os.path.isdir(pasta) and not nome.startswith(".tmp_"):
+            entradas.append((os.path.getmtime(pasta), tamanho_pasta(pasta), pasta))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, pasta in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        shutil.rmtree(pasta, ignore_errors=True)
+        total -= tamanho
+        logger.info(f"Entrada removida do cache (LRU): {os.path.basename(pasta)[:12]}")
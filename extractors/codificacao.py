@@ -0,0 +1,113 @@
+import re
+import codecs
+import chardet
+import logging
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Quantidade máxima de bytes entregue ao detector estatístico
+TAMANHO_AMOSTRA = 64 * 1024
+# Confiança mínima para aceitar a sugestão do chardet
+CONFIANCA_MINIMA = 0.8
+# Codificação assumida quando nada mais é conclusivo (extratos de bancos brasileiros)
+CODIFICACAO_PADRAO = "cp1252"
+
+# UTF-32 antes de UTF-16: o BOM UTF-32 LE começa com o BOM UTF-16 LE
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+PADRAO_CABECALHO_OFX = re.compile(rb"^\s*(CHARSET|ENCODING)\s*:\s*([^\r\n<]+)", re.IGNORECASE | re.MULTILINE)
+PADRAO_CABECALHO_XML = re.compile(rb"<\?xml[^>]*encoding=[\"']([^\"']+)[\"']", re.IGNORECASE)
+PADRAO_NAO_ASCII = re.compile(rb"[\x80-\xff]")
+
+# Valores usados nos cabeçalhos OFX 1.x que não são nomes de codec Python
+APELIDOS_CABECALHO = {
+    "1252": "cp1252",
+    "USASCII": None,  # não informa nada sobre os bytes acentuados
+    "NONE": None,
+}
+
+
+def codificacao_declarada(file_bytes):
+    """
+    Lê a codificação declarada no cabeçalho OFX (CHARSET:/ENCODING:) ou XML.
+    Retorna None quando não há declaração utilizável.
+    """
+    cabecalho = file_bytes[:1024]
+
+    match_xml = PADRAO_CABECALHO_XML.search(cabecalho)
+    declaracoes = [match_xml.group(1)] if match_xml else []
+    # CHARSET é mais específico que ENCODING nos arquivos OFX 1.x
+    declaracoes += [m.group(2) for m in sorted(
+        PADRAO_CABECALHO_OFX.finditer(cabecalho),
+        key=lambda m: m.group(1).upper() != b"CHARSET"
+    )]
+
+    for declarado in declaracoes:
+        nome = declarado.decode("ascii", errors="ignore").strip().upper()
+        nome = APELIDOS_CABECALHO.get(nome, nome)
+        if not nome:
+            continue
+        try:
+            return codecs.lookup(nome).name
+        except LookupError:
+            logger.warning(f"Codificação declarada desconhecida: {declarado!r}")
+    return None
+
+
+def amostra_para_deteccao(file_bytes):
+    """
+    Recorta até TAMANHO_AMOSTRA bytes a partir do primeiro byte não-ASCII,
+    onde está a informação útil para o detector estatístico.
+    """
+    match = PADRAO_NAO_ASCII.search(file_bytes)
+    inicio = max(0, match.start() - 1024) if match else 0
+    return file_bytes[inicio:inicio + TAMANHO_AMOSTRA]
+
+
+def detectar_codificacao(file_bytes, codificacao_preferida=None):
+    """
+    Decodifica o arquivo e retorna (texto, encoding, confianca).
+
+    Ordem de tentativa: BOM, conteúdo UTF-8 válido, codificação preferida
+    (perfil do banco) ou declarada no cabeçalho e, somente então, chardet
+    sobre uma amostra limitada. O UTF-8 é testado antes do cabeçalho porque
+    muitos bancos gravam UTF-8 mantendo CHARSET:1252 no cabeçalho.
+    """
+    for bom, nome in BOMS:
+        if file_bytes.startswith(bom):
+            return file_bytes.decode(nome, errors="replace"), nome, 1.0
+
+    if file_bytes.isascii():
+        return file_bytes.decode("ascii"), "ascii", 1.0
+
+    try:
+        return file_bytes.decode("utf-8"), "utf-8", 0.99
+    except UnicodeDecodeError:
+        pass
+
+    declarada = codificacao_preferida or codificacao_declarada(file_bytes)
+    if declarada and declarada != "utf-8":
+        try:
+            return file_bytes.decode(declarada), declarada, 0.9
+        except UnicodeDecodeError:
+            logger.warning(f"Conteúdo não corresponde à codificação declarada {declarada}")
+
+    detectado = chardet.detect(amostra_para_deteccao(file_bytes))
+    sugerida = detectado.get("encoding")
+    confianca = detectado.get("confidence") or 0.0
+    if sugerida and confianca >= CONFIANCA_MINIMA:
+        try:
+            return file_bytes.decode(sugerida), sugerida, confianca
+        except (UnicodeDecodeError, LookupError):
+            logger.warning(f"Falha ao decodificar com a sugestão do chardet: {sugerida}")
+
+    logger.info(f"Detecção inconclusiva, usando {CODIFICACAO_PADRAO}")
+    return file_bytes.decode(CODIFICACAO_PADRAO, errors="replace"), CODIFICACAO_PADRAO, 0.5
@@ -0,0 +1,180 @@
+import re
+import calendar
+import logging
+from datetime import datetime, timedelta
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESES = {
+    "JANEIRO": 1, "FEVEREIRO": 2, "MARCO": 3, "MARÇO": 3, "ABRIL": 4, "MAIO": 5, "JUNHO": 6,
+    "JULHO": 7, "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12
+}
+
+# Cabeçalho do extrato (linhas em maiúsculas), na ordem de prioridade:
+# período "01/03/2025 a 31/03/2025", "Mês/Ano: 03/2025" e "Março de 2025"
+PADRAO_PERIODO = re.compile(r"(\d{2})/(\d{2})/(\d{4})\s*(?:A|ATE|ATÉ|À|-)\s*(\d{2})/(\d{2})/(\d{4})")
+PADRAO_MES_ANO = re.compile(r"(?:M[EÊ]S|REFER[EÊ]NCIA|COMPET[EÊ]NCIA|PER[IÍ]ODO)\D{0,15}?(\d{1,2})/(\d{4})\b")
+PADRAO_MES_NOME = re.compile(r"\b(" + "|".join(MESES) + r")\s*(?:DE\s+|/\s*)(\d{4})\b")
+# Nome do arquivo: 03-2025, 03_2025 ou 03.2025
+PADRAO_MES_ANO_NOME = re.compile(r"(?<!\d)(\d{2})[-_.](\d{4})(?!\d)")
+
+# Quantos lançamentos sem data entram, com descrição, nos avisos da ingestão
+MAX_EXEMPLOS_AVISO = 5
+
+
+def inferir_mes_ano_do_nome(arquivo_nome: str):
+    """
+    Extrai mês e ano do nome do arquivo (padrões 03-2025, 03_2025, 03.2025).
+    Retorna None quando o nome não traz um mês válido.
+    """
+    for match in PADRAO_MES_ANO_NOME.finditer(arquivo_nome):
+        mes, ano = int(match.group(1)), int(match.group(2))
+        if 1 <= mes <= 12:
+            return mes, ano
+    return None
+
+
+def ler_data(dia, mes, ano):
+    try:
+        return datetime(int(ano), int(mes), int(dia))
+    except ValueError:
+        return None
+
+
+class ContextoExtrato:
+    """
+    Contexto de leitura de um extrato em PDF/TXT, criado uma vez por arquivo.
+    Resolve mês/ano uma única vez (cabeçalho do extrato ou, na falta dele, nome do arquivo)
+    e converte os dias dos lançamentos em datas por uma tabela dia → data pré-calculada.
+    Lançamentos cujo dia não pôde ser convertido são registrados para o aviso da ingestão.
+    """
+
+    def __init__(self, nome_arquivo: str):
+        """
+        Inicializa o contexto a partir do nome do arquivo
+
+        Args:
+            nome_arquivo: Nome do arquivo, usado quando o cabeçalho não informa o período
+        """
+        self.nome_arquivo = nome_arquivo
+        self.origem = None
+        self.mes = None
+        self.ano = None
+        self.tabela_dias = {}
+        self.nao_resolvidas = []
+
+        mes_ano = inferir_mes_ano_do_nome(nome_arquivo)
+        if mes_ano:
+            self.definir_mes(*mes_ano, origem="nome do arquivo")
+
+    def definir_mes(self, mes: int, ano: int, origem: str):
+        """Tabela com todos os dias do mês de referência"""
+        if not 1 <= mes <= 12:
+            return
+        _, ultimo_dia = calendar.monthrange(ano, mes)
+        self.mes, self.ano, self.origem = mes, ano, origem
+        self.tabela_dias = {f"{dia:02d}": datetime(ano, mes, dia) for dia in range(1, ultimo_dia + 1)}
+
+    def definir_periodo(self, inicio: datetime, fim: datetime, origem: str):
+        """
+        Tabela a partir do período do extrato. Um período de até 31 dias que vira o mês
+        (ex.: 15/03 a 14/04) leva cada dia ao mês em que ele cai dentro do período;
+        nos demais casos vale o mês do início.
+        """
+        if fim < inicio or (fim - inicio).days >= 31 or (inicio.month, inicio.year) == (fim.month, fim.year):
+            self.definir_mes(inicio.month, inicio.year, origem)
+            return
+        self.mes, self.ano, self.origem = inicio.month, inicio.year, origem
+        self.tabela_dias = {
+            f"{data.day:02d}": data
+            for data in (inicio + timedelta(days=n) for n in range((fim - inicio).days + 1))
+        }
+
+    @property
+    def do_cabecalho(self) -> bool:
+        return self.origem == "cabeçalho"
+
+    def ler_cabecalho(self, linha: str) -> bool:
+        """
+        Procura o período do extrato na linha de cabeçalho.
+        O cabeçalho tem prioridade sobre o nome do arquivo; retorna True se encontrou.
+        """
+        linha_upper = linha.upper()
+
+        match = PADRAO_PERIODO.search(linha_upper)
+        if match:
+            inicio = ler_data(*match.groups()[:3])
+            fim = ler_data(*match.groups()[3:])
+            if inicio and fim:
+                self.definir_periodo(inicio, fim, origem="cabeçalho")
+                return True
+
+        match = PADRAO_MES_ANO.search(linha_upper)
+        if match and 1 <= int(match.group(1)) <= 12:
+            self.definir_mes(int(match.group(1)), int(match.group(2)), origem="cabeçalho")
+            return True
+
+        match = PADRAO_MES_NOME.search(linha_upper)
+        if match:
+            self.definir_mes(MESES[match.group(1)], int(match.group(2)), origem="cabeçalho")
+            return True
+        return False
+
+    def converter_dias(self, dias, descricoes):
+        """
+        Converte os dias ("01".."31") em datas pela tabela do contexto.
+        Dias sem data (fora do mês ou mês/ano desconhecido) viram None e são registrados.
+        """
+        tabela = self.tabela_dias
+        datas = [tabela.get(dia) for dia in dias]
+        for posicao, data in enumerate(datas):
+            if data is None:
+                self.nao_resolvidas.append({"Dia": dias[posicao], "Descrição": descricoes[posicao]})
+        return datas
+
+    def relatorio(self) -> dict:
+        """
+        Resumo do contexto (serializável em JSON) para os avisos da ingestão.
+        Fica em df.attrs, copiado pelo pandas a cada operação: só alguns exemplos entram.
+        """
+        return {
+            "Arquivo": self.nome_arquivo,
+            "Mes": self.mes,
+            "Ano": self.ano,
+            "Origem": self.origem,
+            "Nao resolvidas": len(self.nao_resolvidas),
+            "Exemplos": self.nao_resolvidas[:MAX_EXEMPLOS_AVISO]
+        }
+
+    def avisos(self) -> list:
+        """Mensagens para o log de uploads sobre datas que não puderam ser montadas"""
+        return avisos_datas(self.relatorio())
+
+
+def avisos_datas(relatorio: dict) -> list:
+    """
+    Mensagens do relatório de um ContextoExtrato: mês/ano não identificado
+    e lançamentos cujo dia não existe no período do extrato.
+    """
+    if not relatorio:
+        return []
+
+    nome = relatorio["Arquivo"]
+    nao_resolvidas = relatorio["Nao resolvidas"]
+    if relatorio["Origem"] is None:
+        logger.warning(f"Mês/ano não identificados em {nome}")
+        return [
+            f"⚠️ {nome}: mês/ano não encontrados no cabeçalho nem no nome do arquivo "
+            f"(use o padrão MM-AAAA no nome); {nao_resolvidas} transações ficaram sem data"
+        ]
+    if not nao_resolvidas:
+        return []
+
+    exemplos = "; ".join(f"dia {linha['Dia']} - {linha['Descrição']}" for linha in relatorio["Exemplos"])
+    logger.warning(f"{nao_resolvidas} datas não resolvidas em {nome}")
+    return [
+        f"⚠️ {nome}: {nao_resolvidas} transações com dia inexistente em "
+        f"{relatorio['Mes']:02d}/{relatorio['Ano']} ficaram sem data ({exemplos})"
+    ]
@@ -0,0 +1,177 @@
+import os
+import re
+import shutil
+import json
+import logging
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .moeda import centavos_transacoes
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IndiceExtratos:
+    """
+    Índice, por empresa e conta bancária, dos períodos e FITIDs já importados.
+    Só é gravado em disco para uma empresa, e só depois que as transações foram
+    salvas no armazém (ver registrar); sem empresa, vale apenas o que está na sessão.
+    """
+
+    def __init__(self, diretorio: str = "./data/indice_extratos", empresa: str = None):
+        """
+        Inicializa o índice
+
+        Args:
+            diretorio: Pasta base; cada empresa tem uma subpasta com um arquivo JSON por banco/conta
+            empresa: Empresa/cliente do índice (None = índice só em memória)
+        """
+        self.empresa = empresa
+        self.diretorio = os.path.join(diretorio, re.sub(r"[^\w.-]", "_", empresa)) if empresa else diretorio
+        self.contas = {}
+
+    def caminho_conta(self, banco: str, conta: str) -> str:
+        """Arquivo JSON do índice de uma conta"""
+        nome = re.sub(r"[^\w.-]", "_", f"{banco}_{conta}")
+        return os.path.join(self.diretorio, f"{nome}.json")
+
+    def carregar_conta(self, banco: str, conta: str) -> dict:
+        """Carrega (uma vez por instância) o índice de uma conta"""
+        chave = (banco, conta)
+        if chave in self.contas:
+            return self.contas[chave]
+
+        dados = {"periodos": [], "chaves": set()}
+        caminho = self.caminho_conta(banco, conta)
+        if self.empresa and os.path.exists(caminho):
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    salvo = json.load(f)
+                dados["periodos"] = [tuple(p) for p in salvo.get("periodos", [])]
+                dados["chaves"] = set(salvo.get("chaves", []))
+            except Exception as e:
+                logger.error(f"Erro ao carregar índice de {banco}/{conta}: {e}")
+
+        self.contas[chave] = dados
+        return dados
+
+    def salvar_conta(self, banco: str, conta: str):
+        """Salva o índice de uma conta no arquivo JSON (só com empresa)"""
+        if not self.empresa:
+            return
+        dados = self.carregar_conta(banco, conta)
+        os.makedirs(self.diretorio, exist_ok=True)
+        try:
+            with open(self.caminho_conta(banco, conta), 'w', encoding='utf-8') as f:
+                json.dump({
+                    "periodos": [list(p) for p in dados["periodos"]],
+                    "chaves": sorted(dados["chaves"])
+                }, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"Erro ao salvar índice de {banco}/{conta}: {e}")
+
+    @staticmethod
+    def chaves_transacoes(df: pd.DataFrame) -> pd.Series:
+        """
+        Chave de cada transação: FITID + data + valor em centavos.
+        Data e valor entram porque alguns bancos repetem o FITID entre lançamentos.
+        """
+        centavos = centavos_transacoes(df).astype(str)
+        datas = pd.to_datetime(df["Data"], errors="coerce").dt.strftime("%Y%m%d").fillna("")
+        return df["FITID"].astype(str) + "|" + datas + "|" + centavos
+
+    def periodo_coberto(self, banco: str, conta: str, inicio: str, fim: str) -> bool:
+        """Indica se [inicio, fim] (AAAA-MM-DD) já está coberto pelos períodos importados"""
+        periodos = sorted(self.carregar_conta(banco, conta)["periodos"])
+        alvo = date.fromisoformat(inicio)
+        limite = date.fromisoformat(fim)
+        for p_inicio, p_fim in periodos:
+            if date.fromisoformat(p_inicio) > alvo:
+                return False
+            if date.fromisoformat(p_fim) >= alvo:
+                alvo = date.fromisoformat(p_fim) + timedelta(days=1)
+            if alvo > limite:
+                return True
+        return False
+
+    def chaves_conhecidas(self, df_base: pd.DataFrame = None) -> dict:
+        """Chaves já importadas por (banco, conta) nas transações atuais da sessão"""
+        if df_base is None or df_base.empty or not {"FITID", "Banco", "Conta"} <= set(df_base.columns):
+            return {}
+        df_base = df_base[df_base["FITID"].notna()]
+        chaves = self.chaves_transacoes(df_base)
+        return {
+            (str(banco), str(conta)): set(chaves.loc[indices])
+            for (banco, conta), indices in df_base.groupby(["Banco", "Conta"], observed=True).groups.items()
+        }
+
+    def filtrar_novas(self, df: pd.DataFrame, df_base: pd.DataFrame = None):
+        """
+        Mantém apenas as transações OFX ainda não importadas para cada conta: as do
+        índice da empresa e as que já estão nas transações atuais (df_base).
+        Lançamentos do próprio lote com o mesmo FITID, data e valor são mantidos.
+
+        Returns:
+            Tuple[pd.DataFrame, List[str]]: transações novas e mensagens do que foi ignorado
+        """
+        if df.empty or "FITID" not in df.columns:
+            return df, []
+
+        chaves = self.chaves_transacoes(df)
+        na_sessao = self.chaves_conhecidas(df_base)
+        ja_importadas = pd.Series(False, index=df.index)
+        mensagens = []
+
+        for (banco, conta), indices in df.groupby(["Banco", "Conta"], observed=True).groups.items():
+            chave = (str(banco), str(conta))
+            conhecidas = self.carregar_conta(*chave)["chaves"] | na_sessao.get(chave, set())
+            ja_importadas.loc[indices] = chaves.loc[indices].isin(conhecidas) & df.loc[indices, "FITID"].notna()
+
+        for periodo in df.attrs.get("periodos", []):
+            if self.periodo_coberto(periodo["Banco"], periodo["Conta"], periodo["Inicio"], periodo["Fim"]):
+                mensagens.append(
+                    f"Período {periodo['Inicio']} a {periodo['Fim']} da conta {periodo['Conta']} já havia sido importado"
+                )
+
+        ignoradas = int(ja_importadas.sum())
+        if ignoradas:
+            mensagens.append(f"{ignoradas} transações já importadas foram ignoradas")
+        return df[~ja_importadas], mensagens
+
+    def registrar(self, df: pd.DataFrame):
+        """
+        Registra no índice os FITIDs e os períodos do lote importado.
+        Chame só depois que o lote foi salvo no armazém da empresa: um FITID
+        registrado sem as transações gravadas faria a próxima importação descartá-las.
+        """
+        if df.empty or "FITID" not in df.columns:
+            return
+
+        df = df[df["FITID"].notna()]
+        chaves = self.chaves_transacoes(df)
+        alteradas = set()
+        for (banco, conta), indices in df.groupby(["Banco", "Conta"], observed=True).groups.items():
+            chave = (str(banco), str(conta))
+            self.carregar_conta(*chave)["chaves"].update(chaves.loc[indices])
+            alteradas.add(chave)
+
+        for periodo in df.attrs.get("periodos", []):
+            chave = (periodo["Banco"], periodo["Conta"])
+            periodos = self.carregar_conta(*chave)["periodos"]
+            if (periodo["Inicio"], periodo["Fim"]) not in periodos:
+                periodos.append((periodo["Inicio"], periodo["Fim"]))
+            alteradas.add(chave)
+
+        for banco, conta in alteradas:
+            self.salvar_conta(banco, conta)
+        logger.info(f"Índice de extratos atualizado para {len(alteradas)} conta(s)")
+
+    def limpar(self):
+        """Apaga o histórico de importações da empresa (sem empresa, só o que está em memória)"""
+        if self.empresa:
+            shutil.rmtree(self.diretorio, ignore_errors=True)
+        self.contas = {}
+        logger.info(f"Índice de extratos apagado ({self.empresa or 'memória'})")
@@ -0,0 +1,221 @@
+import io
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from .pdf_extractor import extrair_lancamentos_pdf
+from .txt_extractor import extrair_lancamentos_txt
+from .ofx_extractor import extrair_lancamentos_ofx
+from .cache_extracao import chave_cache, ler_cache, gravar_cache
+from .contexto_extrato import avisos_datas
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Número de processos da ingestão; INGESTAO_WORKERS=1 força o modo sequencial
+MAX_WORKERS_PADRAO = int(os.getenv("INGESTAO_WORKERS", "0")) or os.cpu_count() or 1
+# Abaixo deste volume (bytes ponderados), subir processos (spawn reimporta pandas e
+# pdfplumber em cada um) custa mais do que processar os arquivos em sequência
+MIN_BYTES_PARALELO = int(os.getenv("INGESTAO_MIN_BYTES_PARALELO", str(2 * 1024 * 1024)))
+# O PDF custa muito mais por byte que OFX/TXT (layout de cada página pelo pdfplumber)
+PESO_PDF = 8
+# Intervalo, em segundos, com que o modo paralelo confere se a ingestão foi cancelada
+INTERVALO_CANCELAMENTO = 0.5
+
+# O OFX usa o cache dentro de extrair_lancamentos_ofx
+TIPOS_COM_CACHE = {".pdf", ".txt", ".xls", ".xlsx"}
+
+
+def processar_arquivo(nome, conteudo):
+    """
+    Processa um arquivo (nome + bytes) e retorna os dataframes extraídos.
+    Recebe bytes em vez do UploadedFile para poder rodar em outro processo.
+    Arquivos já processados antes são lidos do cache em disco.
+    """
+    tipo = os.path.splitext(nome)[-1].lower()
+    if tipo not in TIPOS_COM_CACHE:
+        return extrair_arquivo(nome, conteudo, tipo)
+
+    # PDF e TXT podem inferir mês/ano pelo nome, então o nome também entra na chave
+    chave = chave_cache(conteudo, tipo, nome)
+    resultado = ler_cache(chave)
+    if resultado is not None:
+        resultado["mensagem"] += " (cache)"
+        return resultado
+
+    resultado = extrair_arquivo(nome, conteudo, tipo)
+    if resultado["status"] == "sucesso":
+        gravar_cache(chave, resultado)
+    return resultado
+
+
+def extrair_arquivo(nome, conteudo, tipo):
+    """
+    Chama o extrator adequado ao tipo do arquivo e monta o resultado da ingestão.
+    """
+    file = io.BytesIO(conteudo)
+
+    try:
+        if tipo == ".pdf":
+            resultado = extrair_lancamentos_pdf(file, nome)
+
+            if isinstance(resultado, tuple) and resultado[0] == "debug":
+                return {
+                    "status": "debug",
+                    "mensagem": f"Texto da primeira página do PDF ({nome}):",
+                    "conteudo": resultado[1],
+                    "tipo": "pdf"
+                }
+
+            df_resumo = pd.DataFrame(resultado["resumo"])
+            df_trans = resultado["transacoes"]
+
+            return {
+                "status": "sucesso",
+                "resumo": df_resumo,
+                "transacoes": df_trans,
+                "mensagem": f"📥 {nome} → PDF → {len(df_trans)} transações, {len(df_resumo)} resumos",
+                "avisos": avisos_datas(df_trans.attrs.get("contexto")),
+                "tipo": "pdf"
+            }
+
+        elif tipo == ".txt":
+            df_trans = extrair_lancamentos_txt(file, nome)
+            df_trans["Arquivo"] = pd.Categorical([nome] * len(df_trans))
+
+            return {
+                "status": "sucesso",
+                "transacoes": df_trans,
+                "mensagem": f"📥 {nome} → TXT → {len(df_trans)} transações",
+                "avisos": avisos_datas(df_trans.attrs.get("contexto")),
+                "tipo": "txt"
+            }
+
+        elif tipo in [".xls", ".xlsx"]:
+            df = pd.read_excel(file)
+            df["Arquivo"] = nome
+
+            return {
+                "status": "sucesso",
+                "transacoes": df,
+                "mensagem": f"📥 {nome} → Excel → {len(df)} linhas",
+                "tipo": "excel"
+            }
+
+        elif tipo == ".ofx":
+            df, encoding = extrair_lancamentos_ofx(file, nome)
+
+            if df.empty:
+                return {
+                    "status": "erro",
+                    "mensagem": f"❌ Erro ao processar {nome}: {encoding}",
+                    "tipo": "ofx"
+                }
+
+            return {
+                "status": "sucesso",
+                "transacoes": df,
+                "encoding": encoding,
+                "mensagem": f"📥 {nome} → OFX → {len(df)} transações (codificação: {encoding})",
+                "tipo": "ofx"
+            }
+
+        else:
+            return {
+                "status": "erro",
+                "mensagem": f"⚠️ Tipo de arquivo não suportado: {nome}",
+                "tipo": "desconhecido"
+            }
+
+    except Exception as e:
+        return {
+            "status": "erro",
+            "mensagem": f"❌ Erro ao processar {nome}: {str(e)}",
+            "tipo": tipo.replace(".", "")
+        }
+
+
+def volume_ponderado(arquivos) -> int:
+    """Tamanho total dos arquivos em bytes, com os PDFs pesando PESO_PDF vezes mais"""
+    return sum(
+        len(conteudo) * (PESO_PDF if nome.lower().endswith(".pdf") else 1)
+        for nome, conteudo in arquivos
+    )
+
+
+def processar_arquivos(arquivos, max_workers=None, ao_concluir=None, cancelado=None):
+    """
+    Processa vários arquivos em paralelo, um processo por arquivo.
+    Poucos arquivos pequenos (abaixo de MIN_BYTES_PARALELO) são processados em
+    sequência, sem pagar a subida dos processos.
+
+    Args:
+        arquivos: Lista de tuplas (nome, conteudo em bytes), na ordem do upload
+        max_workers: Número máximo de processos (padrão: INGESTAO_WORKERS ou núcleos da máquina)
+        ao_concluir: Função chamada como ao_concluir(concluidos, total, resultado)
+            a cada arquivo finalizado, na thread de quem chamou
+        cancelado: threading.Event opcional; quando ligado, nenhum arquivo novo é iniciado
+            e os que ainda estão na fila são descartados
+
+    Returns:
+        List[dict]: Resultados de processar_arquivo na ordem do upload, cada um com o nome
+            do arquivo em "arquivo" e a posição no upload em "posicao"
+            (None nos arquivos não processados por cancelamento)
+    """
+    total = len(arquivos)
+    resultados = [None] * total
+    workers = min(max_workers or MAX_WORKERS_PADRAO, total)
+    if volume_ponderado(arquivos) < MIN_BYTES_PARALELO:
+        workers = 1
+
+    foi_cancelado = lambda: cancelado is not None and cancelado.is_set()
+
+    if workers <= 1:
+        for i, (nome, conteudo) in enumerate(arquivos):
+            if foi_cancelado():
+                break
+            resultados[i] = processar_arquivo(nome, conteudo)
+            resultados[i].update(arquivo=nome, posicao=i)
+            if ao_concluir:
+                ao_concluir(i + 1, total, resultados[i])
+        return resultados
+
+    # spawn: o servidor do Streamlit é multithread, e fork nesse cenário pode travar
+    contexto = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=contexto)
+    try:
+        futuros = {
+            executor.submit(processar_arquivo, nome, conteudo): i
+            for i, (nome, conteudo) in enumerate(arquivos)
+        }
+        pendentes = set(futuros)
+        concluidos = 0
+        while pendentes and not foi_cancelado():
+            prontos, pendentes = wait(pendentes, timeout=INTERVALO_CANCELAMENTO, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                i = futuros[futuro]
+                nome = arquivos[i][0]
+                try:
+                    resultados[i] = futuro.result()
+                except Exception as e:
+                    logger.exception(f"Falha no processo de ingestão de {nome}: {e}")
+                    resultados[i] = {
+                        "status": "erro",
+                        "mensagem": f"❌ Erro ao processar {nome}: {str(e)}",
+                        "tipo": os.path.splitext(nome)[-1].lower().replace(".", "")
+                    }
+                resultados[i].update(arquivo=nome, posicao=i)
+                concluidos += 1
+                if ao_concluir:
+                    ao_concluir(concluidos, total, resultados[i])
+    finally:
+        # Cancelada: descarta a fila e não espera os arquivos em andamento
+        executor.shutdown(wait=not foi_cancelado(), cancel_futures=True)
+        if foi_cancelado():
+            logger.info("Ingestão cancelada")
+
+    return resultados
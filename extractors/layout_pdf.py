@@ -0,0 +1,219 @@
+import re
+import bisect
+import logging
+import statistics
+import unicodedata
+
+from .contexto_extrato import ContextoExtrato
+from .parser_linhas import montar_lote_texto, ler_transacao_pdf
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rótulos do cabeçalho da tabela de lançamentos, já sem acentos e em maiúsculas
+ROTULOS_COLUNAS = {
+    "dia": ("DIA", "DATA", "DT"),
+    "historico": ("HISTORICO", "DESCRICAO", "LANCAMENTO", "LANCAMENTOS"),
+    "documento": ("DOCUMENTO", "DOC", "NDOC"),
+    "valor": ("VALOR", "VALORES"),
+    "saldo": ("SALDO",),  # lida só para não misturar o saldo com o valor
+}
+COLUNAS_OBRIGATORIAS = {"dia", "historico", "valor"}
+
+# Páginas examinadas à procura do cabeçalho da tabela
+PAGINAS_MODELO = 3
+# Diferença máxima de "top" entre palavras da mesma linha, em pontos
+TOLERANCIA_LINHA = 3
+
+PADRAO_DIA_CELULA = re.compile(r"^(\d{2})(?:\D|$)")
+PADRAO_VALOR_CELULA = re.compile(r"^-?[\d.]+,\d{2}-?$")
+
+
+def normalizar_rotulo(texto):
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Z]", "", sem_acento.upper())
+
+
+def agrupar_linhas(palavras):
+    """
+    Agrupa as palavras do extract_words em linhas visuais (mesmo "top", com tolerância).
+    """
+    linhas = []
+    for palavra in sorted(palavras, key=lambda p: (round(p["top"]), p["x0"])):
+        if linhas and abs(palavra["top"] - linhas[-1][0]["top"]) <= TOLERANCIA_LINHA:
+            linhas[-1].append(palavra)
+        else:
+            linhas.append([palavra])
+    return [sorted(linha, key=lambda p: p["x0"]) for linha in linhas]
+
+
+def localizar_cabecalho(linha):
+    """
+    Retorna {coluna: palavra do rótulo} se a linha for o cabeçalho da tabela, senão None.
+    """
+    rotulos = {}
+    for palavra in linha:
+        rotulo = normalizar_rotulo(palavra["text"])
+        for coluna, nomes in ROTULOS_COLUNAS.items():
+            if rotulo in nomes and coluna not in rotulos:
+                rotulos[coluna] = palavra
+    return rotulos if COLUNAS_OBRIGATORIAS <= rotulos.keys() else None
+
+
+def medir_passo(linhas):
+    """Distância vertical típica entre linhas consecutivas"""
+    tops = [linha[0]["top"] for linha in linhas]
+    saltos = [b - a for a, b in zip(tops, tops[1:]) if b > a]
+    return statistics.median(saltos) if saltos else None
+
+
+def corpo_tabela(linhas, passo, encaixa):
+    """
+    Linhas da tabela: depois do cabeçalho, se a página o repetir, ou a partir da
+    primeira linha que encaixa no modelo (páginas de continuação começam com o
+    timbre do banco), até o primeiro salto vertical maior que dois passos,
+    que separa rodapés e quadros de saldo. Lista vazia se nenhuma linha encaixa.
+    """
+    inicio = None
+    for posicao, linha in enumerate(linhas):
+        if localizar_cabecalho(linha):
+            inicio = posicao + 1
+            break
+    if inicio is None:
+        inicio = next((posicao for posicao, linha in enumerate(linhas) if encaixa(linha)), len(linhas))
+
+    corpo = linhas[inicio:inicio + 1]
+    for linha in linhas[inicio + 1:]:
+        if linha[0]["top"] - corpo[-1][0]["top"] > 2 * passo:
+            break
+        corpo.append(linha)
+    return corpo
+
+
+def detectar_modelo(page):
+    """
+    Procura o cabeçalho da tabela de lançamentos na página e devolve o modelo de leitura:
+    a ordem das colunas, os limites entre elas em x, o início da tabela em x
+    e o passo vertical entre as linhas.
+    """
+    linhas = agrupar_linhas(page.extract_words())
+    for posicao, linha in enumerate(linhas):
+        rotulos = localizar_cabecalho(linha)
+        if not rotulos:
+            continue
+
+        ordem = sorted(rotulos.items(), key=lambda item: item[1]["x0"])
+        limites = [
+            (anterior["x1"] + seguinte["x0"]) / 2
+            for (_, anterior), (_, seguinte) in zip(ordem, ordem[1:])
+        ]
+        passo = medir_passo(linhas[posicao + 1:]) or TOLERANCIA_LINHA * 4
+
+        return {
+            "colunas": [coluna for coluna, _ in ordem],
+            "limites": limites,
+            "x0": max(ordem[0][1]["x0"] - 2, 0),
+            "passo": passo,
+        }
+    return None
+
+
+def detectar_modelo_pdf(pdf):
+    """
+    Monta o modelo a partir da primeira página (entre as PAGINAS_MODELO iniciais) com cabeçalho.
+    """
+    for page in pdf.pages[:PAGINAS_MODELO]:
+        modelo = detectar_modelo(page)
+        if modelo:
+            return modelo
+    return None
+
+
+def separar_celulas(linha, modelo):
+    """Distribui as palavras da linha pelas colunas do modelo, pela posição x do centro da palavra"""
+    celulas = {}
+    for palavra in linha:
+        centro = (palavra["x0"] + palavra["x1"]) / 2
+        coluna = modelo["colunas"][bisect.bisect(modelo["limites"], centro)]
+        celulas.setdefault(coluna, []).append(palavra["text"])
+    return {coluna: " ".join(textos) for coluna, textos in celulas.items()}
+
+
+def encaixa_no_modelo(celulas):
+    """Linha de lançamento: a coluna de valor tem um valor monetário"""
+    return bool(PADRAO_VALOR_CELULA.match(celulas.get("valor", "").replace(" ", "")))
+
+
+def ler_tabela_pagina(page, modelo):
+    """
+    Recorta a página na faixa horizontal da tabela, isola o corpo da tabela e
+    distribui as palavras de cada linha pelas colunas do modelo.
+    Se nenhuma linha da página encaixa no modelo, devolve o texto corrido da
+    página, lido depois pelas regras de linha (ver montar_transacoes_tabela).
+    """
+    regiao = page.crop((modelo["x0"], 0, page.width, page.height))
+    encaixa = lambda linha: encaixa_no_modelo(separar_celulas(linha, modelo))
+    corpo = corpo_tabela(agrupar_linhas(regiao.extract_words()), modelo["passo"], encaixa)
+    linhas = [separar_celulas(linha, modelo) for linha in corpo]
+    if not any(encaixa_no_modelo(celulas) for celulas in linhas):
+        return page.extract_text() or ""
+    return linhas
+
+
+def celulas_do_texto(texto):
+    """
+    Linhas do texto corrido como células (dia, histórico, documento, valor) pelas regras do PDF.
+    A leitura começa no primeiro lançamento com dia, para que quadros de saldo sem
+    tabela não virem lançamentos com o dia da página anterior.
+    """
+    iniciou = False
+    for linha in texto.splitlines():
+        lancamento = ler_transacao_pdf(linha.strip())
+        if not lancamento:
+            continue
+        dia, descricao, documento, valor = lancamento
+        iniciou = iniciou or dia is not None
+        if iniciou:
+            yield {"dia": dia or "", "historico": descricao, "documento": documento, "valor": valor}
+
+
+def montar_transacoes_tabela(paginas, nome_arquivo, contexto=None):
+    """
+    Constrói o lote de transações a partir das células lidas por ler_tabela_pagina.
+    Páginas que vieram como texto corrido (fora do modelo) são lidas pelas regras de linha.
+    Linhas sem valor na coluna de valor (continuações de histórico, totais) são ignoradas;
+    linhas sem dia herdam o dia do lançamento anterior. Os dias viram datas pela
+    tabela do ContextoExtrato, cujo relatório fica em transacoes.attrs["contexto"].
+    """
+    contexto = contexto or ContextoExtrato(nome_arquivo)
+    dias, descricoes, documentos, valores = [], [], [], []
+    dia_atual = None
+    paginas_texto = 0
+
+    for linhas in paginas:
+        if isinstance(linhas, str):
+            paginas_texto += 1
+            linhas = celulas_do_texto(linhas)
+        for celulas in linhas:
+            valor_str = celulas.get("valor", "").replace(" ", "")
+            if not PADRAO_VALOR_CELULA.match(valor_str):
+                continue
+
+            match_dia = PADRAO_DIA_CELULA.match(celulas.get("dia", ""))
+            if match_dia:
+                dia_atual = match_dia.group(1)
+            if not dia_atual:
+                continue  # ainda não temos data
+
+            dias.append(dia_atual)
+            descricoes.append(celulas.get("historico", "").strip())
+            documentos.append(celulas.get("documento", "").strip())
+            valores.append(valor_str)
+
+    if paginas_texto:
+        logger.warning(f"{nome_arquivo}: {paginas_texto} página(s) fora do modelo da tabela, lidas pelo texto")
+    datas = contexto.converter_dias(dias, descricoes)
+    transacoes = montar_lote_texto(datas, descricoes, documentos, valores)
+    transacoes.attrs["contexto"] = contexto.relatorio()
+    return transacoes
@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+COLUNA_VALOR = "Valor (R$)"
+# Coluna opcional com o valor em centavos inteiros: somas exatas e chaves sem arredondamento.
+# VALORES_EM_CENTAVOS=0 desliga a coluna nos extratores; as etapas seguintes voltam ao float.
+COLUNA_CENTAVOS = "Valor (centavos)"
+CENTAVOS_ATIVO = os.getenv("VALORES_EM_CENTAVOS", "1") != "0"
+
+# Trechos descartados antes da conversão (o ponto é o separador de milhar)
+TRECHOS_IGNORADOS = ("R$", " ", "\xa0", ".")
+SINAIS = ("-", "(", ")")
+
+
+def _como_serie(valores):
+    """Retorna (Series, True se a entrada era um valor único)"""
+    if isinstance(valores, pd.Series):
+        return valores, False
+    if np.ndim(valores) == 0:
+        return pd.Series([valores], dtype=object), True
+    return pd.Series(valores), False
+
+
+def _texto_para_float(textos):
+    """
+    Converte um array pyarrow de textos em reais para float64 (numpy).
+    Tudo roda no pyarrow.compute, sem laço Python por valor.
+    """
+    textos = pc.utf8_trim_whitespace(textos)
+    for trecho in TRECHOS_IGNORADOS:
+        textos = pc.replace_substring(textos, trecho, "")
+
+    negativo = pc.or_(
+        pc.or_(pc.starts_with(textos, "-"), pc.ends_with(textos, "-")),
+        pc.and_(pc.starts_with(textos, "("), pc.ends_with(textos, ")"))
+    )
+    for trecho in SINAIS:
+        textos = pc.replace_substring(textos, trecho, "")
+    textos = pc.replace_substring(textos, ",", ".")
+    textos = pc.if_else(pc.equal(textos, ""), pa.scalar(None, pa.string()), textos)
+
+    try:
+        numeros = pc.cast(textos, pa.float64())
+    except pa.ArrowInvalid:
+        # Algum texto inválido: a conversão tolerante do pandas vira NaN só nele
+        numeros = pa.array(pd.to_numeric(textos.to_pandas(), errors="coerce"), type=pa.float64())
+
+    numeros = pc.if_else(negativo, pc.negate(numeros), numeros)
+    return numeros.to_numpy(zero_copy_only=False)
+
+
+def converter_brl(valores, padrao=np.nan):
+    """
+    Converte valores em reais para float, de forma vetorizada.
+    Aceita '1.234,56', 'R$ 1.234,56', '-1.234,56', '1.234,56-' e '(1.234,56)';
+    números passam direto. Textos inválidos ou vazios viram `padrao`.
+
+    Args:
+        valores: Series, lista ou valor único
+        padrao: Valor usado quando o texto não pode ser convertido
+
+    Returns:
+        Series float64 com o mesmo índice (ou float, para valor único)
+    """
+    serie, escalar = _como_serie(valores)
+
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        resultado = serie.astype("float64")
+    else:
+        tipo = pd.api.types.infer_dtype(serie, skipna=True)
+        if tipo in ("string", "empty"):
+            eh_texto = serie.notna().to_numpy()
+        else:
+            eh_texto = serie.map(type).eq(str).to_numpy()
+
+        objetos = serie.to_numpy(dtype=object)
+        numeros = np.full(len(objetos), np.nan)
+        if not eh_texto.all():
+            numeros[~eh_texto] = pd.to_numeric(pd.Series(objetos[~eh_texto]), errors="coerce").astype("float64")
+        if eh_texto.any():
+            numeros[eh_texto] = _texto_para_float(pa.array(objetos[eh_texto], type=pa.string()))
+        resultado = pd.Series(numeros, index=serie.index)
+
+    if not (isinstance(padrao, float) and np.isnan(padrao)):
+        resultado = resultado.fillna(padrao)
+    return float(resultado.iloc[0]) if escalar else resultado
+
+
+def _centavos_arredondados(numeros):
+    """
+    |numeros| em centavos inteiros (int64), arredondados como o '{:.2f}' do Python:
+    pelo valor binário exato do float, com empate exato indo para o par.
+    Um simples round(x * 100) erra nos dois sentidos: 0.005 * 100 vira exatamente 0.5
+    (e iria para 0, embora 0.005 em binário seja um pouco maior que a metade).
+    O produto exato x * 100 é recuperado como p + e (divisão de Veltkamp), sem laço Python.
+    """
+    x = np.abs(np.asarray(numeros, dtype=np.float64))
+    partido = x * 134217729.0  # 2**27 + 1
+    alto = partido - (partido - x)
+    baixo = x - alto
+    p = x * 100.0
+    e = (alto * 100.0 - p) + baixo * 100.0  # x * 100 == p + e, exatamente
+    inteiro = np.floor(p)
+    d = (p - inteiro) - 0.5  # exato; |e| é menor que meio ulp de p
+    sobe = (d > 0) | ((d == 0) & ((e > 0) | ((e == 0) & (inteiro % 2 == 1))))
+    return (inteiro + sobe).astype(np.int64)
+
+
+def _tres_digitos(numeros):
+    """Inteiros de 0 a 999 como texto com zeros à esquerda ('007')"""
+    return pc.utf8_slice_codeunits(pc.cast(pa.array(numeros + 1000), pa.string()), 1)
+
+
+def formatar_brl(valores, simbolo="R$ ", vazio=""):
+    """
+    Formata números no padrão brasileiro (1.234,56), de forma vetorizada.
+    Negativos saem como 'R$ -1.234,56'; NaN e textos inválidos viram `vazio`.
+
+    Args:
+        valores: Series, lista ou valor único (números ou textos em reais)
+        simbolo: Prefixo da moeda ("" para só o número)
+        vazio: Texto usado para valores ausentes
+
+    Returns:
+        Series de textos com o mesmo índice (ou str, para valor único)
+    """
+    serie, escalar = _como_serie(valores)
+    numeros = converter_brl(serie).to_numpy()
+    validos = np.isfinite(numeros)
+
+    centavos = _centavos_arredondados(np.where(validos, numeros, 0))
+    inteiros = centavos // 100
+
+    # Todos os grupos de milhar com 3 dígitos, unidos por "." e sem os zeros à esquerda
+    n_grupos = max(1, -(-len(str(inteiros.max(initial=0))) // 3))
+    grupos = [_tres_digitos(inteiros // 1000 ** grupo % 1000) for grupo in reversed(range(n_grupos))]
+    texto = pc.binary_join_element_wise(*grupos, ".")
+    texto = pc.utf8_ltrim(texto, "0.")
+    texto = pc.if_else(pc.equal(texto, ""), "0", texto)
+
+    sinais = pa.array(np.where(validos & (numeros < 0) & (centavos > 0), "-", ""), type=pa.string())
+    decimais = pc.utf8_slice_codeunits(_tres_digitos(centavos % 100), 1)
+    texto = pc.binary_join_element_wise(sinais, texto, ",", decimais, "")
+    texto = pc.if_else(pa.array(validos), pc.binary_join_element_wise(simbolo, texto, ""), vazio)
+
+    resultado = pd.Series(texto.to_numpy(zero_copy_only=False), index=serie.index, dtype=object)
+    return resultado.iloc[0] if escalar else resultado
+
+
+def para_centavos(valores):
+    """
+    Converte valores em reais (números ou textos) para centavos inteiros (Int64; <NA> se inválido),
+    com o mesmo arredondamento de formatar_brl.
+    """
+    reais = converter_brl(valores)
+    numeros = reais.to_numpy()
+    validos = np.isfinite(numeros)
+    centavos = _centavos_arredondados(np.where(validos, numeros, 0)) * np.where(numeros < 0, -1, 1)
+    return pd.Series(pd.arrays.IntegerArray(centavos, ~validos), index=reais.index)
+
+
+def centavos_para_reais(centavos):
+    """Centavos inteiros -> float64 em reais (<NA> vira NaN)"""
+    return pd.Series(centavos).astype("Float64").div(100).astype("float64")
+
+
+def centavos_transacoes(df):
+    """
+    Centavos das transações: a coluna de centavos, quando existe, completada a partir
+    de Valor (R$) nas linhas sem ela (ex.: planilhas concatenadas com extratos).
+    """
+    if COLUNA_CENTAVOS not in df.columns:
+        return para_centavos(df[COLUNA_VALOR])
+    centavos = df[COLUNA_CENTAVOS].astype("Int64")
+    if centavos.isna().any() and COLUNA_VALOR in df.columns:
+        centavos = centavos.fillna(para_centavos(df[COLUNA_VALOR]))
+    return centavos
@@ -1,227 +1,100 @@
-import io
-import chardet
-import re
-from ofxparse import OfxParser
 import logging
+import pandas as pd
+from .utils import montar_lote_transacoes
+from .codificacao import detectar_codificacao
+from .cache_extracao import chave_cache, ler_cache, gravar_cache
+from .perfis_bancos import PERFIL_PADRAO, identificar_perfil, preprocessar_texto, primeiro_campo
+from .ofx_tokenizer import PADRAO_INICIO_OFX, iterar_transacoes_ofx, converter_valor_ofx, converter_data_ofx
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def detectar_codificacao(file_bytes):
+def montar_transacoes(itens_ofx, file_name, perfil=PERFIL_PADRAO):
     """
-    Detecta a codificação de um arquivo usando chardet e tenta múltiplas opções.
+    Constrói o lote tipado de transações (DataFrame) a partir dos blocos <STMTTRN>
+    lidos pelo tokenizador, usando o mapeamento de campos declarado no perfil do banco.
+    As colunas são acumuladas em listas, sem um dicionário por transação.
+    O período de cada extrato (DTSTART/DTEND) fica em df.attrs["periodos"].
     """
-    logger.info("Tentando detectar codificação do arquivo")
-    detectado = chardet.detect(file_bytes)
-    possiveis_encodings = [
-        detectado.get("encoding"),
-        "iso-8859-1",
-        "utf-8",
-        "latin1",
-        "windows-1252",
-        "cp1252",
-    ]
-    
-    for tentativa in possiveis_encodings:
-        if not tentativa:
-            continue
-        try:
-            texto = file_bytes.decode(tentativa, errors='replace')
-            logger.info(f"Arquivo decodificado com sucesso usando {tentativa}")
-            return texto, tentativa
-        except Exception as e:
-            logger.warning(f"Falha ao decodificar com {tentativa}: {e}")
-            continue
-            
-    logger.error("Falha em todas as tentativas de decodificação")
-    return None, "erro: falha na leitura com múltiplos encodings"
-
-
-def corrigir_valores_trnamt(texto):
-    """
-    Substitui vírgulas por ponto nos valores <TRNAMT>.
-    """
-    return re.sub(r"<TRNAMT>(-?\d+),(\d+)", r"<TRNAMT>\1.\2", texto)
+    datas, descricoes, valores, documentos, fitids = [], [], [], [], []
+    trntypes, bancos, contas = [], [], []
+    periodos = {}
 
-
-def corrigir_cabecalho_ofx(texto):
-    """
-    Corrige o cabeçalho OFX para usar UTF-8 no parser e evitar erro de ascii.
-    """
-    texto = re.sub(r"ENCODING:.*", "ENCODING:UTF-8", texto)
-    texto = re.sub(r"CHARSET:.*", "CHARSET:UTF-8", texto)
-    return texto
-
-
-def limpar_caracteres_invalidos(texto):
-    """
-    Remove ou substitui caracteres que podem causar problemas de codificação.
-    """
-    # Substitui caracteres não-ASCII por espaços ou equivalentes ASCII
-    texto_limpo = ""
-    for char in texto:
-        if ord(char) < 128:
-            texto_limpo += char
-        else:
-            # Substituições específicas para caracteres comuns em português
-            if char == 'ç':
-                texto_limpo += 'c'
-            elif char == 'ã' or char == 'â' or char == 'á' or char == 'à':
-                texto_limpo += 'a'
-            elif char == 'é' or char == 'ê' or char == 'è':
-                texto_limpo += 'e'
-            elif char == 'í' or char == 'ì':
-                texto_limpo += 'i'
-            elif char == 'ó' or char == 'ô' or char == 'õ' or char == 'ò':
-                texto_limpo += 'o'
-            elif char == 'ú' or char == 'ù':
-                texto_limpo += 'u'
-            else:
-                texto_limpo += ' '
-    
-    return texto_limpo
-
-
-def parsear_ofx(texto):
-    """
-    Usa ofxparse para interpretar o conteúdo do OFX em texto limpo.
-    """
-    try:
-        # Primeira tentativa com o texto original
-        return OfxParser.parse(io.StringIO(texto)), None
-    except UnicodeDecodeError as e:
-        logger.warning(f"Erro de codificação na primeira tentativa: {e}")
-        try:
-            # Segunda tentativa com texto limpo
-            texto_limpo = limpar_caracteres_invalidos(texto)
-            return OfxParser.parse(io.StringIO(texto_limpo)), None
-        except Exception as e2:
-            logger.error(f"Erro na segunda tentativa após limpeza: {e2}")
-            return None, f"erro após limpeza: {e2}"
-    except ValueError as e:
-        logger.error(f"Erro de formato: {e}")
-        return None, f"erro de formato: {e}"
-    except Exception as e:
-        logger.error(f"Erro no parser: {e}")
-        
-        # Tentativa alternativa com uma abordagem mais agressiva
+    for contexto, t in itens_ofx:
         try:
-            # Converter para ASCII, ignorando caracteres problemáticos
-            texto_ascii = texto.encode('ascii', 'ignore').decode('ascii')
-            return OfxParser.parse(io.StringIO(texto_ascii)), None
-        except Exception as e_ascii:
-            logger.error(f"Falha na tentativa ASCII: {e_ascii}")
-            return None, f"erro no parser: {e}"
-
+            valor = converter_valor_ofx(t.get("TRNAMT", "0"))
+        except ValueError:
+            logger.warning(f"Valor inválido ignorado em {file_name}: {t.get('TRNAMT')}")
+            continue
 
-def montar_transacoes(ofx, file_name):
-    """
-    Constrói uma lista de transações a partir do objeto OFX parseado.
-    """
-    transacoes = []
-    
-    # Verificar se o objeto OFX tem a estrutura esperada
-    if not hasattr(ofx, 'account') or not hasattr(ofx.account, 'statement'):
-        logger.warning("Estrutura OFX inválida ou incompleta")
-        return transacoes
-    
-    # Extrair informações da conta
-    conta_info = {
-        "banco": getattr(ofx.account, 'routing_number', 'N/A'),
-        "agencia": getattr(ofx.account, 'branch_id', 'N/A'),
-        "conta": getattr(ofx.account, 'account_id', 'N/A'),
-        "tipo_conta": getattr(ofx.account, 'account_type', 'N/A'),
-        "moeda": getattr(ofx.account.statement, 'currency', 'BRL')
-    }
-    
-    logger.info(f"Processando {len(ofx.account.statement.transactions)} transações")
-    
-    for t in ofx.account.statement.transactions:
-        # Validar valores antes de adicionar
-        valor = getattr(t, 'amount', 0.0)
-        data = t.date.strftime('%d/%m/%Y') if hasattr(t, 'date') else 'N/A'
-        
-        transacoes.append({
-            "Arquivo": file_name,
-            "Data": data,
-            "Descrição": getattr(t, 'memo', ''),
-            "Valor (R$)": valor,
-            "Num Doc.": getattr(t, "checknum", None),
-            "TRNTYPE": getattr(t, "type", ""),
-            "Tipo": "Crédito" if getattr(t, "type", "").upper() == "CREDIT" else "Débito",
-            "Banco": conta_info["banco"],
-            "Conta": conta_info["conta"]
-        })
-    
+        datas.append(converter_data_ofx(t.get("DTPOSTED", "")))
+        descricoes.append(primeiro_campo(t, perfil["campos_descricao"], ""))
+        valores.append(valor)
+        documentos.append(primeiro_campo(t, perfil["campos_documento"]))
+        fitids.append(t.get("FITID"))
+        trntypes.append(t.get("TRNTYPE", "").lower())
+        bancos.append(contexto.get("BANKID", "N/A"))
+        contas.append(contexto.get("ACCTID", "N/A"))
+
+        inicio = converter_data_ofx(contexto.get("DTSTART", ""))
+        fim = converter_data_ofx(contexto.get("DTEND", ""))
+        if inicio and fim:
+            periodos[(bancos[-1], contas[-1], inicio.date().isoformat(), fim.date().isoformat())] = None
+
+    transacoes = montar_lote_transacoes({
+        "Arquivo": [file_name] * len(valores),
+        "Data": datas,
+        "Descrição": descricoes,
+        "Valor (R$)": valores,
+        "Num Doc.": documentos,
+        "TRNTYPE": trntypes,
+        "Tipo": ["Crédito" if t == "credit" else "Débito" for t in trntypes],
+        "Banco": bancos,
+        "Conta": contas,
+        "FITID": fitids
+    })
+    transacoes.attrs["periodos"] = [
+        {"Banco": banco, "Conta": conta, "Inicio": inicio, "Fim": fim}
+        for banco, conta, inicio, fim in periodos
+    ]
     return transacoes
 
 
 def extrair_lancamentos_ofx(file, file_name):
     """
-    Função principal: faz todo o processamento para retornar as transações.
+    Função principal: decodifica o arquivo e lê as transações em uma única passagem.
+    Retorna (DataFrame de transações, encoding ou mensagem de erro).
     """
     logger.info(f"Iniciando processamento do arquivo: {file_name}")
-    
+
     try:
         file_bytes = file.read()
-        texto, encoding_usado = detectar_codificacao(file_bytes)
 
-        if texto is None:
-            logger.error("Não foi possível detectar a codificação do arquivo")
-            return [], encoding_usado
+        # O nome não influencia a leitura do OFX: a chave usa só o conteúdo
+        chave = chave_cache(file_bytes, "ofx")
+        em_cache = ler_cache(chave)
+        if em_cache is not None:
+            transacoes = em_cache["transacoes"]
+            transacoes["Arquivo"] = pd.Categorical([file_name] * len(transacoes))
+            return transacoes, f"{em_cache['encoding']} (cache)"
 
-        # Aplicar correções no texto
-        texto_corrigido = corrigir_valores_trnamt(texto)
-        texto_corrigido = corrigir_cabecalho_ofx(texto_corrigido)
+        perfil = identificar_perfil(file_bytes)
 
-        # Tentativa com abordagem mais específica para Bradesco
-        if "Bradesco" in file_name:
-            logger.info("Arquivo do Bradesco detectado, aplicando tratamento específico")
-            # Forçar codificação específica para arquivos do Bradesco
-            try:
-                # Reabrir o arquivo e tentar com codificação específica
-                file.seek(0)
-                texto_bradesco = file.read().decode('iso-8859-1', errors='replace')
-                texto_bradesco = corrigir_valores_trnamt(texto_bradesco)
-                texto_bradesco = corrigir_cabecalho_ofx(texto_bradesco)
-                
-                # Remover caracteres problemáticos específicos
-                texto_bradesco = re.sub(r'[^\x00-\x7F]+', ' ', texto_bradesco)
-                
-                ofx, erro = parsear_ofx(texto_bradesco)
-                if not erro:
-                    transacoes = montar_transacoes(ofx, file_name)
-                    logger.info(f"Processamento específico para Bradesco concluído: {len(transacoes)} transações")
-                    return transacoes, "iso-8859-1 (tratamento especial)"
-            except Exception as e_bradesco:
-                logger.warning(f"Falha no tratamento específico para Bradesco: {e_bradesco}")
-                # Continuar com o fluxo normal se falhar
+        texto, encoding_usado, confianca = detectar_codificacao(file_bytes, perfil["encoding"])
+        logger.info(f"Arquivo decodificado com {encoding_usado} (confiança {confianca:.0%}, perfil {perfil['nome']})")
 
-        # Fluxo normal
-        ofx, erro = parsear_ofx(texto_corrigido)
-        if erro:
-            logger.error(f"Erro ao fazer parse do arquivo: {erro}")
-            
-            # Tentativa alternativa com codificação forçada
-            try:
-                # Converter para ASCII puro
-                texto_ascii = ''.join(char for char in texto_corrigido if ord(char) < 128)
-                ofx_alt, erro_alt = parsear_ofx(texto_ascii)
-                
-                if not erro_alt:
-                    transacoes = montar_transacoes(ofx_alt, file_name)
-                    logger.info(f"Processamento com ASCII puro concluído: {len(transacoes)} transações")
-                    return transacoes, f"{encoding_usado} (convertido para ASCII)"
-            except Exception as e_alt:
-                logger.error(f"Falha na tentativa alternativa: {e_alt}")
-            
-            return [], erro
+        texto = preprocessar_texto(texto, perfil)
+        transacoes = montar_transacoes(iterar_transacoes_ofx(texto), file_name, perfil)
+        if transacoes.empty and not PADRAO_INICIO_OFX.search(texto):
+            logger.error(f"Marcação <OFX> não encontrada em {file_name}")
+            return pd.DataFrame(), "erro de formato: marcação <OFX> não encontrada"
 
-        transacoes = montar_transacoes(ofx, file_name)
         logger.info(f"Processamento concluído: {len(transacoes)} transações extraídas")
+        if not transacoes.empty:
+            gravar_cache(chave, {"transacoes": transacoes, "encoding": encoding_usado})
         return transacoes, encoding_usado
-        
+
     except Exception as e:
         logger.exception(f"Erro não tratado: {e}")
-        return [], f"erro não tratado: {e}"
\ No newline at end of file
+        return pd.DataFrame(), f"erro não tratado: {e}"
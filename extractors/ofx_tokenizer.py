@@ -0,0 +1,84 @@
+import re
+import html
+from datetime import datetime
+
+# Marcações OFX no formato <TAG>valor ou </TAG>.
+# Em SGML (OFX 1.x) os elementos folha não têm fechamento; em XML (OFX 2.x) têm.
+PADRAO_MARCACAO = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+PADRAO_INICIO_OFX = re.compile(r"<OFX>", re.IGNORECASE)
+
+# Agregados que encerram um <STMTTRN> aberto quando o arquivo não traz o fechamento
+TAGS_FIM_TRANSACAO = {"BANKTRANLIST", "STMTRS", "CCSTMTRS", "OFX"}
+
+
+def iterar_marcacoes(texto):
+    """
+    Percorre o corpo OFX uma única vez, gerando (fechamento, tag, valor).
+    O cabeçalho (OFXHEADER, ENCODING, CHARSET...) é ignorado, então
+    cabeçalhos quebrados não interrompem a leitura.
+    """
+    inicio = PADRAO_INICIO_OFX.search(texto)
+    posicao = inicio.start() if inicio else 0
+
+    for match in PADRAO_MARCACAO.finditer(texto, posicao):
+        valor = match.group(3).strip()
+        if "&" in valor:
+            valor = html.unescape(valor)
+        yield match.group(1) == "/", match.group(2).upper(), valor
+
+
+def iterar_transacoes_ofx(texto):
+    """
+    Lê os blocos <STMTTRN> em passagem única e gera (contexto, transacao).
+
+    `contexto` reúne os campos fora das transações (BANKID, ACCTID, ORG,
+    DTSTART...) vistos até aquele ponto; `transacao` traz os campos folha
+    do bloco. O dicionário de contexto é reutilizado entre as transações,
+    portanto deve ser lido no momento em que é recebido.
+    """
+    contexto = {}
+    atual = None
+
+    for fechamento, tag, valor in iterar_marcacoes(texto):
+        if tag == "STMTTRN":
+            if atual is not None:
+                yield contexto, atual
+            atual = None if fechamento else {}
+            continue
+
+        if atual is not None:
+            if tag in TAGS_FIM_TRANSACAO:
+                # Arquivo sem </STMTTRN>: encerra o bloco no fim da lista
+                yield contexto, atual
+                atual = None
+            elif not fechamento and valor:
+                atual.setdefault(tag, valor)
+            continue
+
+        if not fechamento and valor:
+            contexto[tag] = valor
+
+    if atual is not None:
+        yield contexto, atual
+
+
+def converter_valor_ofx(valor_str):
+    """
+    Converte o conteúdo de <TRNAMT> para float, aceitando vírgula decimal.
+    Ex: '-1885,09' → -1885.09 | '1.234,56' → 1234.56 | '+10.00' → 10.0
+    """
+    valor_str = valor_str.strip().replace(" ", "")
+    if "," in valor_str:
+        valor_str = valor_str.replace(".", "").replace(",", ".")
+    return float(valor_str)
+
+
+def converter_data_ofx(data_str):
+    """
+    Converte datas OFX (AAAAMMDD[HHMMSS[.XXX]][TZ]) para datetime.
+    Retorna None quando a data não puder ser interpretada.
+    """
+    try:
+        return datetime(int(data_str[0:4]), int(data_str[4:6]), int(data_str[6:8]))
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,192 @@
+import re
+from .moeda import converter_brl
+from .utils import montar_lote_transacoes
+from .contexto_extrato import ContextoExtrato
+
+# Padrões compilados uma vez e compartilhados por todos os extratos em texto (PDF e TXT)
+PADRAO_VALOR_RESUMO = re.compile(r"R\$[\s\.]*([\d.,-]+)")
+# Valor no final da linha, com o documento (5+ dígitos) opcional logo antes
+PADRAO_VALOR_FINAL = re.compile(r"(?:(\d{5,})\s+)?([\d.]+,\d{2}-?)$")
+PADRAO_DIA = re.compile(r"^(\d{2})\s+(.*)")
+PADRAO_LINHA_TXT = re.compile(r"^\s{0,2}(\d{2})\s{2,}(.+?)\s{2,}(\d+)\s+([\d.,-]+)$")
+
+# Campos de texto do resumo: (marcador na linha em maiúsculas, campo)
+CAMPOS_TEXTO_RESUMO = (
+    ("AGENCIA", "Agencia"),
+    ("NOME", "Cliente"),
+    ("IDENTIFICACAO", "Identificação"),
+)
+# Campos de valor do resumo, na ordem de prioridade dos marcadores
+CAMPOS_VALOR_RESUMO = (
+    ("SALDO DISPONIVEL", "Saldo Disponível"),
+    ("SALDO LIVRE", "Saldo Livre"),
+    ("LIMITE DA CONTA DISPONIVEL", "Limite Disponível"),
+    ("LIMITE DA CONTA", "Limite Conta"),
+)
+
+
+def novo_resumo(nome_arquivo):
+    return {
+        "Arquivo": nome_arquivo,
+        "Agencia": "",
+        "Conta": "",
+        "Cliente": "",
+        "Identificação": "",
+        "Saldo Disponível": None,
+        "Saldo Livre": None,
+        "Limite Conta": None,
+        "Limite Disponível": None
+    }
+
+
+def ler_resumo(linha, dados):
+    """
+    Preenche no resumo os campos presentes na linha.
+    Retorna True quando a linha trouxe algum saldo ou limite.
+    """
+    linha_upper = linha.upper()
+
+    for marcador, campo in CAMPOS_TEXTO_RESUMO:
+        if marcador in linha_upper:
+            dados[campo] = linha.split(":")[-1].strip()
+    if "CONTA" in linha_upper and "SALDO" not in linha_upper:
+        dados["Conta"] = linha.split(":")[-1].strip()
+
+    if "R$" not in linha:
+        return False
+
+    campos = [campo for marcador, campo in CAMPOS_VALOR_RESUMO if marcador in linha_upper]
+    # "LIMITE DA CONTA DISPONIVEL" também contém "LIMITE DA CONTA"
+    if "Limite Disponível" in campos:
+        campos.remove("Limite Conta")
+    if not campos:
+        return False
+
+    valor = PADRAO_VALOR_RESUMO.search(linha)
+    if not valor:
+        return False
+    for campo in campos:
+        dados[campo] = converter_brl(valor.group(1))
+    return True
+
+
+def montar_lote_texto(datas, descricoes, documentos, valores):
+    """
+    Monta o lote de transações com os valores ainda em texto, convertidos de uma vez
+    no fim; linhas com valor que não pôde ser convertido são descartadas.
+    """
+    valores = converter_brl(valores).to_numpy()
+    transacoes = montar_lote_transacoes({
+        "Data": datas,
+        "Descrição": descricoes,
+        "Documento": documentos,
+        "Valor (R$)": valores
+    })
+    validos = ~transacoes["Valor (R$)"].isna()
+    if validos.all():
+        return transacoes
+    return transacoes[validos].reset_index(drop=True)
+
+
+def ler_transacao_pdf(linha):
+    """
+    Lançamento de extrato em PDF: valor no fim da linha, dia opcional no início
+    (linhas sem dia herdam o dia do lançamento anterior).
+    Retorna (dia ou None, descrição, documento, valor) ou None.
+    """
+    match = PADRAO_VALOR_FINAL.search(linha)
+    if not match:
+        return None
+
+    documento, valor = match.groups()
+    parte_esquerda = linha[:match.start(2)].rstrip()
+
+    match_dia = PADRAO_DIA.match(parte_esquerda)
+    if match_dia:
+        return match_dia.group(1), match_dia.group(2).strip(), documento or "", valor
+    return None, parte_esquerda.strip(), documento or "", valor
+
+
+def ler_transacao_txt(linha):
+    """
+    Lançamento de extrato em TXT: dia, histórico, documento e valor separados por espaços.
+    """
+    match = PADRAO_LINHA_TXT.match(linha)
+    if not match:
+        return None
+    dia, descricao, documento, valor = match.groups()
+    return dia, descricao.strip(), documento, valor
+
+
+# resumo: lê os campos de resumo da conta
+# marcador_movimentos: só lê lançamentos depois da linha "Movimentos ... Conta"
+# transacao: leitor de lançamentos (None = só o resumo, ex.: PDF lido pelo layout da tabela)
+LAYOUTS = {
+    "pdf": {"resumo": True, "marcador_movimentos": False, "transacao": ler_transacao_pdf},
+    "txt": {"resumo": False, "marcador_movimentos": True, "transacao": ler_transacao_txt},
+    "resumo": {"resumo": True, "marcador_movimentos": False, "transacao": None},
+}
+
+
+def analisar_linhas(linhas, nome_arquivo, layout="pdf", contexto=None):
+    """
+    Percorre as linhas do extrato uma única vez, preenchendo o resumo da conta
+    e as colunas de lançamentos ao mesmo tempo. As linhas anteriores ao primeiro
+    lançamento são lidas como cabeçalho, à procura do período do extrato;
+    os dias viram datas só no fim, pela tabela do contexto.
+
+    Args:
+        linhas: Iterável de linhas (pode ser um gerador, página a página)
+        nome_arquivo: Nome do arquivo (resumo e, na falta de cabeçalho, mês/ano das datas)
+        layout: Chave de LAYOUTS ("pdf", "txt" ou "resumo")
+        contexto: ContextoExtrato do arquivo (criado aqui se não for informado);
+            o relatório das datas fica em transacoes.attrs["contexto"]
+
+    Returns:
+        Tuple[List[dict], pd.DataFrame]: resumo (vazio se não houver saldos) e lote de transações
+    """
+    config = LAYOUTS[layout]
+    ler_transacao = config["transacao"]
+    contexto = contexto or ContextoExtrato(nome_arquivo)
+
+    resumo = novo_resumo(nome_arquivo)
+    encontrou_resumo = False
+    movimento_ativo = not config["marcador_movimentos"]
+    dia_atual = None
+    dias, descricoes, documentos, valores = [], [], [], []
+
+    for linha in linhas:
+        if config["resumo"] and ler_resumo(linha, resumo):
+            encontrou_resumo = True
+        if not dias and not contexto.do_cabecalho:
+            contexto.ler_cabecalho(linha)
+
+        if not ler_transacao:
+            continue
+        if not movimento_ativo:
+            linha_lower = linha.lower()
+            movimento_ativo = "movimentos" in linha_lower and "conta" in linha_lower
+            continue
+
+        linha = linha.strip()
+        if not linha:
+            continue
+
+        lancamento = ler_transacao(linha)
+        if not lancamento:
+            continue
+
+        dia, descricao, documento, valor = lancamento
+        dia_atual = dia or dia_atual
+        if not dia_atual:
+            continue  # ainda não temos data
+
+        dias.append(dia_atual)
+        descricoes.append(descricao)
+        documentos.append(documento)
+        valores.append(valor)
+
+    datas = contexto.converter_dias(dias, descricoes)
+    transacoes = montar_lote_texto(datas, descricoes, documentos, valores)
+    transacoes.attrs["contexto"] = contexto.relatorio()
+    return ([resumo] if encontrou_resumo else []), transacoes
@@ -1,120 +1,109 @@
+import io
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import pdfplumber
-import re
-from .utils import parse_valor, construir_data_completa
+from .parser_linhas import analisar_linhas
+from .layout_pdf import detectar_modelo_pdf, ler_tabela_pagina, montar_transacoes_tabela
+from .contexto_extrato import ContextoExtrato
+
+# Processos usados para ler as páginas; PDF_WORKERS=1 força a leitura sequencial
+MAX_WORKERS_PDF = int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+# Abaixo disso, subir processos custa mais do que ler as páginas em sequência
+MIN_PAGINAS_PARALELO = int(os.getenv("PDF_MIN_PAGINAS_PARALELO", "40"))
+# "layout": lê a tabela de lançamentos pelas posições das palavras
+# "texto": aplica as regras de linha ao texto corrido da página
+# "auto": layout quando o cabeçalho da tabela é encontrado, senão texto
+MODO_PDF = os.getenv("PDF_MODO", "auto")
+
+
+def ler_pagina(page, modelo=None):
+    if modelo is None:
+        return page.extract_text() or ""
+    return ler_tabela_pagina(page, modelo)
+
+
+def extrair_paginas(conteudo, inicio, fim, modelo=None):
+    """
+    Lê as páginas [inicio, fim) com um handle próprio do pdfplumber,
+    para poder rodar em outro processo.
+    """
+    with pdfplumber.open(io.BytesIO(conteudo)) as pdf:
+        return [ler_pagina(pdf.pages[i], modelo) for i in range(inicio, fim)]
+
+
+def ler_paginas_pdf(conteudo, modelo=None):
+    """
+    Retorna o conteúdo de cada página, na ordem do documento: o texto corrido ou,
+    com um modelo de layout, as linhas da tabela de lançamentos já separadas em colunas.
+    PDFs grandes são divididos em faixas de páginas lidas em processos paralelos,
+    exceto quando já estamos num processo da ingestão (que paraleliza por arquivo).
+    """
+    with pdfplumber.open(io.BytesIO(conteudo)) as pdf:
+        total = len(pdf.pages)
+        workers = min(MAX_WORKERS_PDF, total // MIN_PAGINAS_PARALELO)
+        if workers <= 1 or multiprocessing.parent_process() is not None:
+            return [ler_pagina(page, modelo) for page in pdf.pages]
+
+    tamanho = -(-total // workers)
+    faixas = [(inicio, min(inicio + tamanho, total)) for inicio in range(0, total, tamanho)]
+
+    # spawn pelo mesmo motivo da ingestão: fork no servidor multithread do Streamlit pode travar
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(faixas), mp_context=contexto) as executor:
+        lotes = executor.map(
+            extrair_paginas, [conteudo] * len(faixas), *zip(*faixas), [modelo] * len(faixas)
+        )
+        return [pagina for lote in lotes for pagina in lote]
+
+
+def extrair_por_layout(conteudo, nome_arquivo):
+    """
+    Lê os lançamentos pela tabela (colunas localizadas uma vez, páginas recortadas).
+    O resumo da conta vem do texto da primeira e da última página, onde ficam
+    os dados da conta e os quadros de saldo; o período do extrato, do texto da primeira.
+    Retorna None se não houver tabela reconhecível.
+    """
+    with pdfplumber.open(io.BytesIO(conteudo)) as pdf:
+        modelo = detectar_modelo_pdf(pdf)
+        if modelo is None:
+            return None
+        paginas_resumo = pdf.pages[:1] + pdf.pages[1:][-1:]
+        textos_resumo = [page.extract_text() or "" for page in paginas_resumo]
+
+    contexto = ContextoExtrato(nome_arquivo)
+    for linha in textos_resumo[0].splitlines():
+        if contexto.ler_cabecalho(linha):
+            break
+
+    transacoes = montar_transacoes_tabela(ler_paginas_pdf(conteudo, modelo), nome_arquivo, contexto)
+    if transacoes.empty:
+        return None
+
+    linhas = (linha for texto in textos_resumo for linha in texto.splitlines())
+    resumo, _ = analisar_linhas(linhas, nome_arquivo, layout="resumo")
+    return {
+        "resumo": resumo,
+        "transacoes": transacoes
+    }
+
 
 def extrair_lancamentos_pdf(file, nome_arquivo):
-    texto_completo = ""
-    with pdfplumber.open(file) as pdf:
-        for page in pdf.pages:
-            texto = page.extract_text()
-            if texto:
-                texto_completo += texto + "\n"
+    conteudo = file.read()
 
-    resumo = extrair_resumo(texto_completo, nome_arquivo)
-    transacoes = extrair_transacoes(texto_completo, nome_arquivo)
+    if MODO_PDF != "texto":
+        resultado = extrair_por_layout(conteudo, nome_arquivo)
+        if resultado is not None or MODO_PDF == "layout":
+            return resultado or {"resumo": [], "transacoes": montar_transacoes_tabela([], nome_arquivo)}
+
+    textos = ler_paginas_pdf(conteudo)
+
+    # Linhas entregues página a página, na ordem do documento, sem montar o texto completo
+    linhas = (linha for texto in textos for linha in texto.splitlines())
+    resumo, transacoes = analisar_linhas(linhas, nome_arquivo, layout="pdf")
 
     return {
         "resumo": resumo,
         "transacoes": transacoes
     }
-
-def extrair_resumo(texto, nome_arquivo):
-    dados = {
-        "Arquivo": nome_arquivo,
-        "Agencia": "",
-        "Conta": "",
-        "Cliente": "",
-        "Identificação": "",
-        "Saldo Disponível": None,
-        "Saldo Livre": None,
-        "Limite Conta": None,
-        "Limite Disponível": None
-    }
-
-    encontrou_valor = False
-
-    for linha in texto.splitlines():
-        linha_upper = linha.upper()
-
-        if "AGENCIA" in linha_upper:
-            dados["Agencia"] = linha.split(":")[-1].strip()
-        if "CONTA" in linha_upper and "SALDO" not in linha_upper:
-            dados["Conta"] = linha.split(":")[-1].strip()
-        if "NOME" in linha_upper:
-            dados["Cliente"] = linha.split(":")[-1].strip()
-        if "IDENTIFICACAO" in linha_upper:
-            dados["Identificação"] = linha.split(":")[-1].strip()
-
-        if "SALDO DISPONIVEL" in linha_upper and "R$" in linha:
-            valor = re.search(r"R\$[\s\.]*([\d.,-]+)", linha)
-            if valor:
-                dados["Saldo Disponível"] = parse_valor(valor.group(1))
-                encontrou_valor = True
-
-        if "SALDO LIVRE" in linha_upper and "R$" in linha:
-            valor = re.search(r"R\$[\s\.]*([\d.,-]+)", linha)
-            if valor:
-                dados["Saldo Livre"] = parse_valor(valor.group(1))
-                encontrou_valor = True
-
-        if "LIMITE DA CONTA DISPONIVEL" in linha_upper:
-            valor = re.search(r"R\$[\s\.]*([\d.,-]+)", linha)
-            if valor:
-                dados["Limite Disponível"] = parse_valor(valor.group(1))
-                encontrou_valor = True
-
-        elif "LIMITE DA CONTA" in linha_upper:
-            valor = re.search(r"R\$[\s\.]*([\d.,-]+)", linha)
-            if valor:
-                dados["Limite Conta"] = parse_valor(valor.group(1))
-                encontrou_valor = True
-
-    return [dados] if encontrou_valor else []
-
-def extrair_transacoes(texto, nome_arquivo):
-    linhas = texto.splitlines()
-    transacoes = []
-    dia_atual = None
-
-    for linha in linhas:
-        linha = linha.strip()
-        if not linha:
-            continue
-
-        # Detecta valor no final da linha
-        match_valor = re.search(r"([\d.]+,\d{2}-?)$", linha)
-        if not match_valor:
-            continue
-
-        valor_str = match_valor.group(1)
-        valor_pos = linha.rfind(valor_str)
-        parte_esquerda = linha[:valor_pos].rstrip()
-
-        # tenta pegar o documento (últimos 5+ dígitos antes do valor)
-        match_doc = re.search(r"(\d{5,})\s+" + re.escape(valor_str), linha)
-        documento = match_doc.group(1) if match_doc else ""
-
-        # verifica se começa com dia (dois dígitos)
-        match_dia = re.match(r"^(\d{2})\s+(.*)", parte_esquerda)
-        if match_dia:
-            dia_atual = match_dia.group(1)
-            descricao = match_dia.group(2).strip()
-        else:
-            descricao = parte_esquerda.strip()
-
-        if not dia_atual:
-            continue  # ainda não temos data
-
-        data_formatada = construir_data_completa(dia_atual, nome_arquivo)
-        try:
-            valor = parse_valor(valor_str)
-            transacoes.append({
-                "Data": data_formatada,
-                "Descrição": descricao,
-                "Documento": documento,
-                "Valor (R$)": valor
-            })
-        except:
-            continue
-
-    return transacoes
\ No newline at end of file
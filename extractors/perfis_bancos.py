@@ -0,0 +1,146 @@
+import re
+import logging
+import unicodedata
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes lidos para identificar o banco: o cabeçalho termina antes do primeiro <STMTTRN>
+TAMANHO_CABECALHO = 8 * 1024
+
+PADRAO_BANKID = re.compile(rb"<BANKID>\s*([^<\r\n]+)", re.IGNORECASE)
+PADRAO_ORG = re.compile(rb"<ORG>\s*([^<\r\n]+)", re.IGNORECASE)
+PADRAO_FID = re.compile(rb"<FID>\s*([^<\r\n]+)", re.IGNORECASE)
+PADRAO_CONTROLE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+PERFIL_PADRAO = {
+    "nome": "Padrão",
+    "codigos": set(),
+    "orgs": (),
+    "encoding": None,  # preferida quando o conteúdo não é UTF-8; None = cabeçalho/chardet
+    "limpar_controle": False,
+    "campos_descricao": ("MEMO", "NAME"),
+    "campos_documento": ("CHECKNUM",),
+}
+
+# Perfis por banco: apenas as chaves que diferem do PERFIL_PADRAO.
+# "codigos" usa o código COMPE sem zeros à esquerda (0041 → 41);
+# "orgs" em maiúsculas e sem acentos, como sai de normalizar_cabecalho.
+PERFIS_BANCOS = {
+    "bradesco": {
+        "nome": "Bradesco",
+        "codigos": {"237"},
+        "orgs": ("BRADESCO",),
+        "encoding": "iso-8859-1",
+        "limpar_controle": True,
+    },
+    "sicredi": {
+        "nome": "Sicredi",
+        "codigos": {"748"},
+        "orgs": ("SICREDI",),
+        "campos_documento": ("CHECKNUM", "REFNUM"),
+    },
+    "banrisul": {
+        "nome": "Banrisul",
+        "codigos": {"41"},
+        "orgs": ("BANRISUL",),
+        "campos_documento": ("CHECKNUM", "REFNUM"),
+    },
+    "itau": {
+        "nome": "Itaú",
+        "codigos": {"341"},
+        "orgs": ("ITAU",),
+        "campos_documento": ("CHECKNUM", "REFNUM"),
+    },
+}
+
+
+def normalizar_cabecalho(valor):
+    """
+    Decodifica um campo do cabeçalho e o deixa em maiúsculas e sem acentos.
+    Desfaz o mojibake de UTF-8 lido como latin-1/cp1252 ("ITAÃš" → "ITAU").
+    """
+    try:
+        texto = valor.decode("utf-8")
+    except UnicodeDecodeError:
+        texto = valor.decode("latin-1")
+
+    for codificacao in ("cp1252", "latin-1"):
+        try:
+            texto = texto.encode(codificacao).decode("utf-8")
+            break
+        except UnicodeError:
+            continue
+
+    sem_acentos = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in sem_acentos if not unicodedata.combining(c)).strip().upper()
+
+
+def _primeiro_valor(padrao, cabecalho):
+    match = padrao.search(cabecalho)
+    if not match:
+        return ""
+    return normalizar_cabecalho(match.group(1))
+
+
+def ler_cabecalho_ofx(file_bytes):
+    """
+    Lê BANKID, ORG e FID do início do arquivo, sem decodificar o conteúdo todo.
+    Os valores saem normalizados por normalizar_cabecalho.
+    """
+    cabecalho = file_bytes[:TAMANHO_CABECALHO]
+    fim = cabecalho.upper().find(b"<STMTTRN>")
+    if fim >= 0:
+        cabecalho = cabecalho[:fim]
+
+    return {
+        "BANKID": _primeiro_valor(PADRAO_BANKID, cabecalho),
+        "ORG": _primeiro_valor(PADRAO_ORG, cabecalho),
+        "FID": _primeiro_valor(PADRAO_FID, cabecalho),
+    }
+
+
+def identificar_perfil(file_bytes):
+    """
+    Escolhe o perfil do banco a partir do cabeçalho OFX (BANKID, FID e ORG, nessa ordem).
+    Retorna o perfil completo, já mesclado com o PERFIL_PADRAO.
+    """
+    cabecalho = ler_cabecalho_ofx(file_bytes)
+
+    # Cada critério é procurado em todos os perfis antes do seguinte: um BANKID
+    # conhecido vence um ORG que cite outro banco
+    criterios = [
+        ("BANKID", lambda perfil: cabecalho["BANKID"].lstrip("0") in perfil["codigos"]),
+        ("FID", lambda perfil: cabecalho["FID"].lstrip("0") in perfil["codigos"]),
+        ("ORG", lambda perfil: any(org in cabecalho["ORG"] for org in perfil["orgs"])),
+    ]
+    for campo, corresponde in criterios:
+        if not cabecalho[campo]:
+            continue
+        for chave, perfil in PERFIS_BANCOS.items():
+            if corresponde(perfil):
+                logger.info(f"Perfil bancário identificado pelo {campo}: {perfil['nome']} ({cabecalho})")
+                return {**PERFIL_PADRAO, **perfil, "chave": chave}
+
+    return {**PERFIL_PADRAO, "chave": "padrao"}
+
+
+def preprocessar_texto(texto, perfil):
+    """
+    Aplica ao texto decodificado as limpezas declaradas no perfil.
+    """
+    if perfil.get("limpar_controle"):
+        texto = PADRAO_CONTROLE.sub(" ", texto)
+    return texto
+
+
+def primeiro_campo(transacao, campos, padrao=None):
+    """
+    Retorna o primeiro campo preenchido da transação, na ordem declarada no perfil.
+    """
+    for campo in campos:
+        valor = transacao.get(campo)
+        if valor:
+            return valor
+    return padrao
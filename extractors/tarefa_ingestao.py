@@ -0,0 +1,112 @@
+import os
+import logging
+import threading
+
+from .ingestao import processar_arquivos
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Intervalo, em segundos, com que a página consulta o andamento da ingestão
+INTERVALO_ATUALIZACAO = float(os.getenv("INGESTAO_INTERVALO_ATUALIZACAO", "1"))
+
+ICONES_STATUS = {"pendente": "⏳", "sucesso": "✅", "debug": "🔍", "erro": "❌"}
+
+
+class TarefaIngestao:
+    """
+    Ingestão de arquivos em segundo plano: processar_arquivos roda numa thread própria,
+    fora da thread do script do Streamlit, e cada arquivo concluído é publicado aqui.
+    A página guarda a tarefa no session_state e, a cada rerun, lê os resultados novos;
+    a thread nunca acessa o session_state.
+    """
+
+    def __init__(self, arquivos: list, max_workers: int = None):
+        """
+        Prepara a tarefa (a thread só começa em iniciar)
+
+        Args:
+            arquivos: Lista de tuplas (nome, conteudo em bytes), na ordem do upload
+            max_workers: Número máximo de processos (padrão de processar_arquivos)
+        """
+        self.nomes = [nome for nome, _ in arquivos]
+        self.total = len(arquivos)
+        # Por posição no upload: dois arquivos com o mesmo nome não se confundem
+        self.status_arquivos = ["pendente"] * self.total
+        self.resultados = []  # na ordem de conclusão
+        self.erro = None
+        self._finalizada = False
+        self._cancelamento = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._executar,
+            args=(arquivos, max_workers),
+            name="ingestao-extratos",
+            daemon=True
+        )
+
+    def iniciar(self):
+        """Inicia o processamento em segundo plano"""
+        logger.info(f"Ingestão em segundo plano iniciada: {self.total} arquivo(s)")
+        self._thread.start()
+        return self
+
+    def cancelar(self):
+        """
+        Pede o cancelamento: nenhum arquivo novo é iniciado, a fila é descartada e a
+        thread termina sem esperar os arquivos em andamento (cujos resultados são ignorados)
+        """
+        self._cancelamento.set()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelamento.is_set()
+
+    def _executar(self, arquivos, max_workers):
+        try:
+            processar_arquivos(
+                arquivos, max_workers=max_workers, ao_concluir=self._registrar, cancelado=self._cancelamento
+            )
+        except Exception as e:
+            logger.exception(f"Falha na ingestão em segundo plano: {e}")
+            with self._lock:
+                self.erro = str(e)
+        finally:
+            with self._lock:
+                self._finalizada = True
+            logger.info("Ingestão em segundo plano finalizada")
+
+    def _registrar(self, concluidos, total, resultado):
+        """Chamado pela thread da tarefa a cada arquivo concluído"""
+        if self.cancelada:
+            return
+        with self._lock:
+            self.resultados.append(resultado)
+            self.status_arquivos[resultado["posicao"]] = resultado["status"]
+
+    @property
+    def finalizada(self) -> bool:
+        with self._lock:
+            return self._finalizada
+
+    @property
+    def concluidos(self) -> int:
+        with self._lock:
+            return len(self.resultados)
+
+    @property
+    def progresso(self) -> float:
+        return self.concluidos / self.total if self.total else 1.0
+
+    def resultados_desde(self, posicao: int) -> list:
+        """Resultados concluídos a partir da posição (na ordem de conclusão)"""
+        with self._lock:
+            return self.resultados[posicao:]
+
+    def resumo_status(self) -> str:
+        """Situação de cada arquivo, em uma linha, para exibição"""
+        with self._lock:
+            return " · ".join(
+                f"{ICONES_STATUS.get(status, '❔')} {nome}" for nome, status in zip(self.nomes, self.status_arquivos)
+            )
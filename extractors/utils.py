@@ -1,39 +1,64 @@
 import re
-from datetime import datetime
+import pickle
+import hashlib
+import pandas as pd
+from .moeda import COLUNA_CENTAVOS, CENTAVOS_ATIVO, para_centavos, centavos_transacoes
 
-def parse_valor(valor_str: str) -> float:
+# Colunas de baixa cardinalidade armazenadas como category nos lotes de transações
+COLUNAS_CATEGORICAS = ["Arquivo", "Banco", "Conta", "TRNTYPE", "Tipo"]
+
+def normalizar_descricao(desc: str) -> str:
     """
-    Converte valor no formato brasileiro para float.
-    Ex: '1.234,56-' → -1234.56
+    Remove espaços duplicados, converte para minúsculas e remove espaços laterais.
     """
-    valor_str = valor_str.replace(".", "").replace(",", ".")
-    if valor_str.endswith("-"):
-        return -float(valor_str[:-1])
-    return float(valor_str)
+    return re.sub(r"\s+", " ", str(desc).strip().lower())
 
-def inferir_mes_ano_do_nome(arquivo_nome: str) -> tuple:
+def montar_lote_transacoes(colunas: dict) -> pd.DataFrame:
     """
-    Tenta extrair mês e ano do nome do arquivo com padrão 01-2025.
+    Monta o lote tipado de transações a partir de listas por coluna:
+    Data em datetime64, Valor (R$) em float64 (e em centavos Int64, se ativo)
+    e colunas repetitivas como category.
     """
-    match = re.search(r"(\d{2})-(\d{4})", arquivo_nome)
-    if match:
-        mes, ano = match.groups()
-        return int(mes), int(ano)
-    return 1, 2025  # fallback padrão
+    df = pd.DataFrame(colunas)
+    if "Data" in df.columns:
+        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    if "Valor (R$)" in df.columns:
+        df["Valor (R$)"] = df["Valor (R$)"].astype("float64")
+        if CENTAVOS_ATIVO:
+            df.insert(df.columns.get_loc("Valor (R$)") + 1, COLUNA_CENTAVOS, para_centavos(df["Valor (R$)"]))
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    return df
 
-def construir_data_completa(dia_str: str, nome_arquivo: str) -> str:
+def concatenar_lotes(lotes: list) -> pd.DataFrame:
     """
-    Monta uma data completa (DD/MM/YYYY) a partir do dia + nome do arquivo.
+    Concatena lotes de transações mantendo as colunas categóricas
+    (o pd.concat converte para object quando as categorias diferem).
     """
-    dia = int(dia_str)
-    mes, ano = inferir_mes_ano_do_nome(nome_arquivo)
-    try:
-        return datetime(ano, mes, dia).strftime("%d/%m/%Y")
-    except ValueError:
-        return ""
+    df = pd.concat(lotes, ignore_index=True)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and df[coluna].dtype != "category":
+            df[coluna] = df[coluna].astype("category")
+    # Lotes sem centavos (ex.: planilhas) recebem a coluna a partir de Valor (R$)
+    if COLUNA_CENTAVOS in df.columns:
+        df[COLUNA_CENTAVOS] = centavos_transacoes(df)
+    return df
 
-def normalizar_descricao(desc: str) -> str:
+def impressao_digital(valor) -> str:
     """
-    Remove espaços duplicados, converte para minúsculas e remove espaços laterais.
+    Impressão digital (SHA-256) de um valor para chaves de cache.
+    DataFrames usam o hash vetorizado do pandas sobre valores, índice, colunas e tipos.
     """
-    return re.sub(r"\s+", " ", str(desc).strip().lower())
\ No newline at end of file
+    h = hashlib.sha256()
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        colunas = valor.dtypes.items() if isinstance(valor, pd.DataFrame) else [(valor.name, valor.dtype)]
+        h.update(repr([(str(nome), str(tipo)) for nome, tipo in colunas]).encode("utf-8"))
+        try:
+            h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Células não hasheáveis (listas, dicts): cai para a serialização completa
+            h.update(pickle.dumps(valor))
+    else:
+        h.update(repr(valor).encode("utf-8"))
+    return h.hexdigest()
\ No newline at end of file
@@ -24,7 +24,14 @@ def preparar_dre_para_prompt(df_dre, max_linhas=50):
         df_dre = df_dre.tail(max_linhas)
     return df_dre.to_markdown(index=False)
 
-def analisar_dfs_com_gpt(df_dre, df_fluxo, descricao_empresa, modelo="gpt-4-turbo", temperatura=0.2):
+def gerar_analise_gpt(df_dre, df_fluxo, descricao_empresa, modelo="gpt-4-turbo", temperatura=0.2):
+    """
+    Gera o parecer com o ChatGPT. O texto aparece em streaming enquanto é gerado,
+    mas a exibição final fica com exibir_analise_gpt.
+
+    Returns:
+        dict: "status" ("sucesso" ou "erro"), "mensagem" e "texto"
+    """
     if isinstance(df_dre, tuple): df_dre = df_dre[0]
     if isinstance(df_fluxo, tuple): df_fluxo = df_fluxo[0]
 
@@ -57,6 +64,7 @@ Seja objetivo, evite jargões técnicos excessivos e use listas sempre que poss
     with st.spinner("🔎 Gerando análise financeira personalizada com IA..."):
         placeholder = st.empty()
         full_response = ""
+        erro = None
         try:
             # Chamada com streaming usando a nova API
             stream = client.chat.completions.create(
@@ -75,8 +83,21 @@ Seja objetivo, evite jargões técnicos excessivos e use listas sempre que poss
                     full_response += content
                     placeholder.markdown(full_response)
         except Exception as e:
-            st.error(f"Erro ao gerar análise financeira: {e}")
-            full_response = f"Erro: {str(e)}"
+            erro = e
+        placeholder.empty()
+
+    if erro is not None:
+        return {"status": "erro", "mensagem": f"Erro ao gerar análise financeira: {erro}", "texto": f"Erro: {str(erro)}"}
+    return {"status": "sucesso", "mensagem": "", "texto": full_response}
+
+def exibir_analise_gpt(resultado):
+    """Exibe o parecer gerado por gerar_analise_gpt e retorna o texto."""
+    if resultado["status"] == "erro":
+        st.error(resultado["mensagem"])
+        return resultado["texto"]
+
+    full_response = resultado["texto"]
+    st.markdown(full_response)
     # Botão para baixar análise
     if full_response and len(full_response) > 20:
         st.markdown("---")
@@ -89,5 +110,8 @@ Seja objetivo, evite jargões técnicos excessivos e use listas sempre que poss
         )
     return full_response
 
+def analisar_dfs_com_gpt(df_dre, df_fluxo, descricao_empresa, modelo="gpt-4-turbo", temperatura=0.2):
+    return exibir_analise_gpt(gerar_analise_gpt(df_dre, df_fluxo, descricao_empresa, modelo, temperatura))
+
 # Exemplo de uso:
 # parecer = analisar_dfs_com_gpt(df_dre, df_fluxo, "Empresa de tecnologia focada em SaaS B2B.")
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMINHO_CATEGORIAS_SALVAS = "./logic/CSVs/categorias_salvas.csv"
+
+
+class IndiceCategorias:
+    """
+    Índice (Descricao, Tipo) → Categoria das categorizações salvas.
+    Cada Tipo vira uma Series indexada pela descrição, e a resolução de todas
+    as descrições é um único map. Arquivos sem a coluna Tipo (empréstimos)
+    ficam todos sob o tipo "".
+    """
+
+    def __init__(self, df_categorias: pd.DataFrame):
+        """
+        Monta o índice; em descrições repetidas para o mesmo tipo vale a primeira linha
+
+        Args:
+            df_categorias: DataFrame com as colunas Descricao, Categoria e, opcionalmente, Tipo
+        """
+        df = df_categorias.dropna(subset=["Descricao", "Categoria"])
+        df = df[df["Categoria"].astype(str).str.strip() != ""]
+        tipos = df["Tipo"].fillna("") if "Tipo" in df.columns else ""
+        df = df.assign(Tipo=tipos).drop_duplicates(subset=["Descricao", "Tipo"], keep="first")
+
+        self.total = len(df)
+        self.por_tipo = {
+            tipo: pd.Series(grupo["Categoria"].to_numpy(), index=grupo["Descricao"].to_numpy())
+            for tipo, grupo in df.groupby("Tipo", sort=False)
+        }
+
+    def resolver(self, descricoes: pd.Series, tipo: str = "") -> pd.Series:
+        """Categoria salva de cada descrição para o tipo (NaN onde não há)"""
+        mapa = self.por_tipo.get(tipo)
+        if mapa is None:
+            return pd.Series(np.nan, index=descricoes.index, dtype=object)
+        return descricoes.map(mapa)
+
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def carregar_indice_categorias(caminho: str = CAMINHO_CATEGORIAS_SALVAS) -> IndiceCategorias:
+    """
+    Índice das categorias salvas, carregado uma vez por processo e
+    refeito só quando o arquivo muda (data de modificação ou tamanho).
+    """
+    try:
+        info = os.stat(caminho)
+        assinatura = (info.st_mtime_ns, info.st_size)
+    except OSError:
+        assinatura = None
+
+    with _lock:
+        salvo = _indices.get(caminho)
+        if salvo is not None and salvo[0] == assinatura:
+            return salvo[1]
+
+        if assinatura is not None:
+            df_categorias = pd.read_csv(caminho)
+        else:
+            df_categorias = pd.DataFrame(columns=["Descricao", "Tipo", "Categoria"])
+        indice = IndiceCategorias(df_categorias)
+        logger.info(f"Categorias salvas carregadas de {caminho}: {indice.total}")
+        _indices[caminho] = (assinatura, indice)
+        return indice
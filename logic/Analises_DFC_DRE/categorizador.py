@@ -1,6 +1,90 @@
 import pandas as pd
 import streamlit as st
 import os
+from extractors.moeda import centavos_transacoes, centavos_para_reais, formatar_brl
+from logic.Analises_DFC_DRE.palavras_chave import carregar_classificador_palavras
+from logic.Analises_DFC_DRE.categorias_salvas import carregar_indice_categorias
+from logic.Analises_DFC_DRE.modelo_categorias import CONFIANCA_MINIMA, carregar_modelo_categorias
+
+TAMANHOS_PAGINA_GRADE = [25, 50, 100, 200]
+
+
+def _aplicar_edicoes_grade(chave_editor, prefixo_key, descricoes):
+    """
+    Callback da grade: aplica às escolhas da sessão só as linhas alteradas
+    (o diff "edited_rows" do data_editor) e renova a grade para o próximo rerun.
+    """
+    escolhas = st.session_state[f"{prefixo_key}_escolhas"]
+    for posicao, alteracoes in st.session_state[chave_editor]["edited_rows"].items():
+        if "Categoria" not in alteracoes:
+            continue
+        desc = descricoes[int(posicao)]
+        if alteracoes["Categoria"]:
+            escolhas[desc] = alteracoes["Categoria"]
+        else:
+            escolhas.pop(desc, None)
+    chave_versao = f"{prefixo_key}_grade_versao"
+    st.session_state[chave_versao] = st.session_state.get(chave_versao, 0) + 1
+
+
+def _aplicar_escolha_campo(chave_campo, prefixo_key, desc):
+    """
+    Callback do modo "um campo por descrição": grava a opção nas mesmas escolhas
+    da sessão que a grade usa, para os dois modos mostrarem a mesma categorização.
+    """
+    escolhas = st.session_state[f"{prefixo_key}_escolhas"]
+    if st.session_state[chave_campo]:
+        escolhas[desc] = st.session_state[chave_campo]
+    else:
+        escolhas.pop(desc, None)
+
+
+def exibir_grade_categorizacao(df_pendentes, opcoes_categorias, prefixo_key):
+    """
+    Categorização manual em uma única tabela editável: busca e paginação no
+    servidor, coluna de categoria com lista de opções e só a página atual na tela.
+    Colunas extras de df_pendentes (ex.: Sugestão e Confiança) aparecem só para leitura.
+    As escolhas ficam em st.session_state[f"{prefixo_key}_escolhas"] (descrição → opção).
+    """
+    escolhas = st.session_state[f"{prefixo_key}_escolhas"]
+
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    busca = col1.text_input("🔍 Buscar descrição:", key=f"{prefixo_key}_grade_busca").strip().lower()
+    so_pendentes = col2.checkbox("Só sem categoria", key=f"{prefixo_key}_grade_pendentes")
+    tamanho = col3.selectbox("Linhas por página:", TAMANHOS_PAGINA_GRADE, index=1, key=f"{prefixo_key}_grade_tamanho")
+
+    df_filtrado = df_pendentes
+    if busca:
+        df_filtrado = df_filtrado[df_filtrado["Descrição"].str.lower().str.contains(busca, regex=False)]
+    if so_pendentes:
+        df_filtrado = df_filtrado[~df_filtrado["Descrição"].isin(escolhas.keys())]
+
+    total_paginas = max(1, -(-len(df_filtrado) // tamanho))
+    pagina = min(int(col4.number_input("Página:", min_value=1, value=1, step=1, key=f"{prefixo_key}_grade_pagina")), total_paginas)
+    inicio = (pagina - 1) * tamanho
+    df_pagina = df_filtrado.iloc[inicio:inicio + tamanho]
+    df_pagina = df_pagina.assign(Categoria=df_pagina["Descrição"].map(escolhas)).reset_index(drop=True)
+
+    chave_editor = f"{prefixo_key}_grade_v{st.session_state.get(f'{prefixo_key}_grade_versao', 0)}"
+    st.data_editor(
+        df_pagina,
+        key=chave_editor,
+        hide_index=True,
+        use_container_width=True,
+        disabled=[coluna for coluna in df_pagina.columns if coluna != "Categoria"],
+        column_config={
+            "Quantidade": st.column_config.NumberColumn("Qtd.", width="small"),
+            "Valores": st.column_config.TextColumn("Valores"),
+            "Confiança": st.column_config.ProgressColumn("Confiança", format="%.2f", min_value=0, max_value=1, width="small"),
+            "Categoria": st.column_config.SelectboxColumn("Categoria", options=opcoes_categorias, width="large")
+        },
+        on_change=_aplicar_edicoes_grade,
+        args=(chave_editor, prefixo_key, df_pagina["Descrição"].tolist())
+    )
+    st.caption(
+        f"{len(escolhas)} de {len(df_pendentes)} descrições categorizadas manualmente · "
+        f"página {pagina} de {total_paginas} ({len(df_filtrado)} descrições no filtro)"
+    )
 
 def categorizar_transacoes(
     df_transacoes,
@@ -9,18 +93,18 @@ def categorizar_transacoes(
     prefixo_key="cat",
     tipo_lancamento=""
 ):
-    # Verificar se o arquivo de categorias salvas existe
-    if os.path.exists(categorias_salvas_path):
-        df_categorias = pd.read_csv(categorias_salvas_path)
-    else:
-        df_categorias = pd.DataFrame(columns=["Descricao", "Tipo", "Categoria"])
+    # Categorias salvas: índice (Descricao, Tipo) carregado uma vez e refeito só quando o CSV muda
+    indice_categorias = carregar_indice_categorias(categorias_salvas_path)
 
-    # Agrupar descrições únicas
+    # Agrupar descrições únicas numa só passada: quantidade, total (somado em centavos
+    # inteiros) e os valores já formatados, usados nos rótulos da categorização
     df_desc = (
         df_transacoes
+        .assign(__centavos=centavos_transacoes(df_transacoes), __texto=formatar_brl(df_transacoes["Valor (R$)"]))
         .groupby("Descrição", as_index=False)
-        .agg(Quantidade=("Valor (R$)", "count"), Total=("Valor (R$)", "sum"))
+        .agg(Quantidade=("Valor (R$)", "count"), Total=("__centavos", "sum"), Valores=("__texto", " - ".join))
     )
+    df_desc["Total"] = centavos_para_reais(df_desc["Total"])
     df_desc["Categoria"] = ""
 
     # Verificar se o plano de contas existe
@@ -65,11 +149,11 @@ def categorizar_transacoes(
     opcoes_categorias = df_plano_filtrado["Opcao"].tolist()
     mapa_opcao_categoria = dict(zip(df_plano_filtrado["Opcao"], df_plano_filtrado["Categoria"]))
 
-    # Carregar palavras-chave
-    try:
-        df_palavras = pd.read_csv("./logic/CSVs/palavras_chave.csv")
-    except:
-        df_palavras = pd.DataFrame(columns=["PalavraChave", "Tipo", "Categoria"])
+    # Palavras-chave: autômato por Tipo, montado uma vez e refeito só quando o CSV muda
+    classificador_palavras = carregar_classificador_palavras()
+
+    # Escolhas manuais da sessão (descrição → opção do plano), usadas pela grade e pelo lote
+    escolhas = st.session_state.setdefault(f"{prefixo_key}_escolhas", {})
 
     st.markdown("### 🧠 Categorize as Descrições")
     st.info("Para cada descrição, selecione uma categoria do plano de contas.")
@@ -96,78 +180,109 @@ def categorizar_transacoes(
             if opcao_lote and selecionadas:
                 categoria_escolhida = mapa_opcao_categoria.get(opcao_lote, "")
                 df_desc.loc[df_desc["Descrição"].isin(selecionadas), "Categoria"] = categoria_escolhida
+                escolhas.update(dict.fromkeys(selecionadas, opcao_lote))
                 st.success(f"✅ Categoria '{categoria_escolhida}' aplicada em {len(selecionadas)} descrições.")
 
     # Preparar registros para categorização
     registros_categorizados = []
     registros_nao_categorizados = []
 
+    # Categorias salvas de todas as descrições de uma vez (um único map pelo índice)
+    categorias_salvas = indice_categorias.resolver(df_desc["Descrição"], tipo_lancamento)
+
+    # Palavras-chave em lote, só para as pendentes que não têm categoria salva
+    sem_salva = (df_desc["Categoria"].isnull() | (df_desc["Categoria"] == "")) & categorias_salvas.isna()
+    categorias_palavras = pd.Series(
+        classificador_palavras.categorizar(df_desc.loc[sem_salva, "Descrição"].tolist(), tipo_lancamento),
+        index=df_desc.index[sem_salva],
+        dtype=object
+    )
+
     for idx, row in df_desc.iterrows():
-        desc = row["Descrição"]
         if pd.notnull(row["Categoria"]) and row["Categoria"] != "":
             continue
 
-        categoria_salva = df_categorias[
-            (df_categorias["Descricao"] == desc) &
-            (df_categorias["Tipo"] == tipo_lancamento)
-        ]["Categoria"].values
-
-        if len(categoria_salva) > 0:
-            categoria_padrao = categoria_salva[0]
-        else:
-            categoria_padrao = ""
-            for _, row_palavra in df_palavras.iterrows():
-                if row_palavra["Tipo"] == tipo_lancamento and row_palavra["PalavraChave"].lower() in desc.lower():
-                    categoria_padrao = row_palavra["Categoria"]
-                    break
+        categoria_padrao = categorias_salvas[idx]
+        if pd.isna(categoria_padrao):
+            categoria_padrao = categorias_palavras[idx]
 
         if categoria_padrao:
             registros_categorizados.append((row, categoria_padrao))
         else:
             registros_nao_categorizados.append(row)
 
-    # Categorização manual individual
+    # Sugestões do modelo treinado com as categorias salvas, para todas as pendentes de uma vez
+    df_pendentes = df_desc.loc[[row.name for row in registros_nao_categorizados], ["Descrição", "Quantidade", "Valores"]]
+    modelo = carregar_modelo_categorias(categorias_salvas_path, plano_path)
+    df_pendentes = df_pendentes.join(modelo.prever(df_pendentes["Descrição"], tipo_mapeado))
+    # Categoria sugerida → opção do plano; sugestões fora do plano filtrado são descartadas
+    mapa_categoria_opcao = dict(zip(df_plano_filtrado["Categoria"][::-1], df_plano_filtrado["Opcao"][::-1]))
+    df_pendentes["Sugestão"] = df_pendentes["Sugestão"].where(df_pendentes["Sugestão"].isin(mapa_categoria_opcao.keys()), "")
+    df_pendentes.loc[df_pendentes["Sugestão"] == "", "Confiança"] = 0.0
+
+    # Categorização manual: grade editável (padrão) ou um campo por descrição
     st.markdown("### 📝 Categorização Manual Individual")
-    for row in registros_nao_categorizados:
-        desc = row["Descrição"]
-        valores = df_transacoes[df_transacoes["Descrição"] == desc]["Valor (R$)"].tolist()
-        
-        # Formatar valores para exibição
-        valores_formatados = []
-        for v in valores:
-            if isinstance(v, (int, float)):
-                valores_formatados.append(f"R$ {abs(v):.2f}".replace(".", ","))
-            else:
-                valores_formatados.append(str(v))
-        
-        valores_texto = " - ".join(valores_formatados)
-        label = f"📌 {desc} — {row['Quantidade']}x — Total: {valores_texto}"
-
-        categoria_escolhida = st.selectbox(
-            label,
-            options=[""] + opcoes_categorias,
-            key=f"{prefixo_key}_{desc}"
+    if (df_pendentes["Confiança"] > 0).any():
+        coluna1, coluna2 = st.columns([2, 3])
+        confianca_minima = coluna1.slider(
+            "Confiança mínima das sugestões:", 0.0, 1.0, CONFIANCA_MINIMA, 0.05, key=f"{prefixo_key}_confianca"
         )
+        confiaveis = df_pendentes[
+            (df_pendentes["Confiança"] >= confianca_minima) & ~df_pendentes["Descrição"].isin(escolhas.keys())
+        ]
+        coluna2.write("")
+        if coluna2.button(
+            f"✨ Aceitar {len(confiaveis)} sugestões com confiança ≥ {confianca_minima:.2f}",
+            key=f"{prefixo_key}_aceitar_sugestoes",
+            disabled=confiaveis.empty
+        ):
+            escolhas.update(zip(confiaveis["Descrição"], confiaveis["Sugestão"].map(mapa_categoria_opcao)))
+            chave_versao = f"{prefixo_key}_grade_versao"
+            st.session_state[chave_versao] = st.session_state.get(chave_versao, 0) + 1
+            st.success(f"✅ {len(confiaveis)} sugestões aceitas. Revise-as na categorização abaixo.")
 
-        categoria_limpa = mapa_opcao_categoria.get(categoria_escolhida, "")
-        df_desc.loc[df_desc["Descrição"] == desc, "Categoria"] = categoria_limpa
+    modo = st.radio(
+        "Modo:",
+        ["📋 Grade", "📝 Um campo por descrição"],
+        horizontal=True,
+        key=f"{prefixo_key}_modo_manual",
+        help="A grade mostra uma página por vez e aguenta milhares de descrições"
+    )
+    if modo == "📋 Grade":
+        if registros_nao_categorizados:
+            exibir_grade_categorizacao(df_pendentes, opcoes_categorias, prefixo_key)
+            categorias_manuais = df_pendentes["Descrição"].map(escolhas).map(mapa_opcao_categoria).fillna("")
+            df_desc.loc[df_pendentes.index, "Categoria"] = categorias_manuais
+    else:
+        # A versão da grade entra na chave: sugestões aceitas renovam os campos com as novas escolhas
+        versao = st.session_state.get(f"{prefixo_key}_grade_versao", 0)
+        for row in registros_nao_categorizados:
+            desc = row["Descrição"]
+            label = f"📌 {desc} — {row['Quantidade']}x — Total: {row['Valores']}"
+            sugestao = df_pendentes.at[row.name, "Sugestão"]
+            if sugestao:
+                label += f" — ✨ Sugestão: {sugestao} ({df_pendentes.at[row.name, 'Confiança']:.0%})"
+
+            opcoes = [""] + opcoes_categorias
+            escolha = escolhas.get(desc, "")
+            chave_campo = f"{prefixo_key}_{desc}_v{versao}"
+            categoria_escolhida = st.selectbox(
+                label,
+                options=opcoes,
+                index=opcoes.index(escolha) if escolha in opcoes else 0,
+                key=chave_campo,
+                on_change=_aplicar_escolha_campo,
+                args=(chave_campo, prefixo_key, desc)
+            )
+
+            categoria_limpa = mapa_opcao_categoria.get(categoria_escolhida, "")
+            df_desc.loc[df_desc["Descrição"] == desc, "Categoria"] = categoria_limpa
 
     # Exibir descrições já categorizadas
     with st.expander("✅ Descrições já categorizadas automaticamente"):
         for row, categoria in registros_categorizados:
             desc = row["Descrição"]
-            valores = df_transacoes[df_transacoes["Descrição"] == desc]["Valor (R$)"].tolist()
-            
-            # Formatar valores para exibição
-            valores_formatados = []
-            for v in valores:
-                if isinstance(v, (int, float)):
-                    valores_formatados.append(f"R$ {abs(v):.2f}".replace(".", ","))
-                else:
-                    valores_formatados.append(str(v))
-            
-            valores_texto = " - ".join(valores_formatados)
-            st.markdown(f"**📌 {desc}** — {row['Quantidade']}x — Total: {valores_texto}")
+            st.markdown(f"**📌 {desc}** — {row['Quantidade']}x — Total: {row['Valores']}")
             st.markdown(f"✔️ Categoria aplicada: {categoria}")
             df_desc.loc[df_desc["Descrição"] == desc, "Categoria"] = categoria
 
@@ -183,6 +298,10 @@ def categorizar_transacoes(
 
     # Botão para salvar categorias
     if st.button("💾 Salvar Categorias no CSV", key=f"btn_salvar_{prefixo_key}"):
+        if os.path.exists(categorias_salvas_path):
+            df_categorias = pd.read_csv(categorias_salvas_path)
+        else:
+            df_categorias = pd.DataFrame(columns=["Descricao", "Tipo", "Categoria"])
         novas = pd.DataFrame({
             "Descricao": df_desc["Descrição"],
             "Tipo": tipo_lancamento,
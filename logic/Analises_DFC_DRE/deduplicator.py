@@ -1,21 +1,321 @@
+import os
+import logging
+from difflib import SequenceMatcher
+
+import numpy as np
 import pandas as pd
-from extractors.utils import normalizar_descricao
+from extractors.moeda import centavos_transacoes
+from extractors.utils import concatenar_lotes
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Passe aproximado: datas até JANELA_DIAS de distância e descrições com similaridade mínima
+JANELA_DIAS = int(os.getenv("DEDUP_JANELA_DIAS", "1"))
+SIMILARIDADE_MINIMA = float(os.getenv("DEDUP_SIMILARIDADE", "0.6"))
+# Máximo de vizinhos comparados por transação na janela (mesmo valor, datas próximas)
+MAX_VIZINHOS = 50
+
+COLUNAS_RELATORIO = ["Data", "Descrição", "Valor (R$)", "Banco", "Conta", "Arquivo"]
+
+
+def normalizar_descricoes(descricoes: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de normalizar_descricao: remove espaços duplicados,
+    converte para minúsculas e remove espaços laterais.
+    """
+    return descricoes.astype(str).str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
 
-def remover_duplicatas(df: pd.DataFrame) -> pd.DataFrame:
+
+def _texto_ou_vazio(df: pd.DataFrame, coluna: str) -> pd.Series:
+    if coluna not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    serie = df[coluna].astype(object)
+    return serie.where(serie.notna(), "").astype(str)
+
+
+def _hash_linhas(colunas: dict) -> np.ndarray:
+    """Hash de 64 bits por linha combinando as colunas"""
+    return pd.util.hash_pandas_object(pd.DataFrame(colunas), index=False).to_numpy()
+
+
+def _similares(a: str, b: str, minima: float) -> float:
+    """Similaridade entre descrições normalizadas (1.0 se uma contém a outra; 0 abaixo da mínima)"""
+    if a in b or b in a:
+        return 1.0
+    razao = SequenceMatcher(None, a, b).ratio()
+    return razao if razao >= minima else 0.0
+
+
+def _pares_na_janela(centavos: np.ndarray, dias: np.ndarray, janela: int):
     """
-    Remove linhas duplicadas com base em Data, Descrição e Valor (R$), se essas colunas existirem.
+    Pares (i, j) de posições com o mesmo valor e datas a até `janela` dias.
+    Ordena por (valor, data) e compara cada linha com as seguintes, deslocamento
+    a deslocamento, enquanto algum par ainda couber na janela.
     """
-    colunas_necessarias = {"Data", "Descrição", "Valor (R$)"}
-    if not colunas_necessarias.issubset(set(df.columns)):
-        return df  # Retorna sem modificar se não tiver colunas esperadas
+    ordem = np.lexsort((dias, centavos))
+    c, d = centavos[ordem], dias[ordem]
+    pares_i, pares_j = [], []
+    for deslocamento in range(1, min(MAX_VIZINHOS, len(ordem) - 1) + 1):
+        na_janela = (c[deslocamento:] == c[:-deslocamento]) & (d[deslocamento:] - d[:-deslocamento] <= janela)
+        if not na_janela.any():
+            break
+        posicoes = np.flatnonzero(na_janela)
+        pares_i.append(ordem[posicoes])
+        pares_j.append(ordem[posicoes + deslocamento])
+    if not pares_i:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(pares_i), np.concatenate(pares_j)
+
+
+COLUNAS_NECESSARIAS = {"Data", "Descrição", "Valor (R$)"}
+
+
+def _colunas_comparadas(df: pd.DataFrame):
+    """Descrições normalizadas, centavos (inválidos como um valor fora da faixa real) e contas"""
+    descricoes = normalizar_descricoes(df["Descrição"])
+    centavos = centavos_transacoes(df)
+    centavos_chave = centavos.fillna(np.iinfo(np.int64).min).astype("int64").to_numpy()
+    return descricoes, centavos, centavos_chave, _texto_ou_vazio(df, "Conta")
+
+
+def _chaves_exatas(datas: pd.Series, descricoes: pd.Series, centavos_chave: np.ndarray, contas: pd.Series):
+    """Hashes do passe exato: (data, valor em centavos, descrição normalizada) sem e com a conta"""
+    datas = datas if pd.api.types.is_datetime64_any_dtype(datas) else datas.astype(str).str.strip()
+    sem_conta = _hash_linhas({"data": datas.to_numpy(), "valor": centavos_chave, "descricao": descricoes.to_numpy()})
+    chave = _hash_linhas({"transacao": sem_conta, "conta": contas.to_numpy()})
+    return sem_conta, chave
+
+
+def _passe_exato(sem_conta: np.ndarray, chave: np.ndarray, tem_conta: np.ndarray):
+    """Motivo da remoção (None = fica) e posição da linha mantida, pelas chaves exatas"""
+    n = len(chave)
+    motivos = np.full(n, None, dtype=object)
+    mantida = np.full(n, -1, dtype=np.int64)
+    posicoes = pd.Series(np.arange(n))
+
+    # Repetidas na mesma conta: fica a primeira ocorrência
+    primeira = posicoes.groupby(chave).transform("first").to_numpy()
+    repetidas = primeira != np.arange(n)
+    motivos[repetidas] = "exata"
+    mantida[repetidas] = primeira[repetidas]
+
+    # Sem conta, mas já presente com conta: fica a linha com conta
+    primeira_com_conta = (
+        pd.Series(np.where(tem_conta, np.arange(n), n)).groupby(sem_conta).transform("min").to_numpy()
+    )
+    substituidas = ~tem_conta & (primeira_com_conta < n) & ~repetidas
+    motivos[substituidas] = "exata (sem conta)"
+    mantida[substituidas] = primeira_com_conta[substituidas]
+    return motivos, mantida
+
+
+def _relatorio_removidas(df: pd.DataFrame, motivos: np.ndarray, mantida: np.ndarray):
+    """
+    Máscara das linhas removidas e relatório com "Motivo", "Descrição mantida" e "Arquivo mantido".
+    """
+    removidas = ~pd.isna(motivos)
+    # A primeira ocorrência de uma repetida pode ter saído também (ex.: a mesma linha
+    # de PDF duas vezes e a do OFX): aponta para a linha que de fato ficou
+    while True:
+        seguir = removidas & (mantida >= 0)
+        seguir[seguir] = removidas[mantida[seguir]]
+        if not seguir.any():
+            break
+        mantida[seguir] = mantida[mantida[seguir]]
+
+    relatorio = df.loc[removidas, [c for c in COLUNAS_RELATORIO if c in df.columns]].copy()
+    relatorio["Motivo"] = motivos[removidas]
+    relatorio["Descrição mantida"] = df["Descrição"].to_numpy()[mantida[removidas]]
+    if "Arquivo" in df.columns:
+        relatorio["Arquivo mantido"] = df["Arquivo"].to_numpy()[mantida[removidas]]
+    return removidas, relatorio
 
-    df["__desc"] = df["Descrição"].apply(normalizar_descricao)
-    df["__valor"] = df["Valor (R$)"].astype(float).round(2)
-    df["__chave"] = (
-        df["Data"].astype(str).str.strip() +
-        df["__desc"] +
-        df["__valor"].astype(str)
+
+def _passe_aproximado(
+    df: pd.DataFrame,
+    colunas: tuple,
+    tem_conta: np.ndarray,
+    motivos: np.ndarray,
+    mantida: np.ndarray,
+    janela_dias: int,
+    similaridade_minima: float
+):
+    """Marca em motivos/mantida as duplicatas aproximadas entre as linhas que o passe exato deixou"""
+    descricoes, centavos, centavos_chave, contas = colunas
+    restantes = np.flatnonzero(pd.isna(motivos))
+    dias = pd.to_datetime(df["Data"], errors="coerce").to_numpy(dtype="datetime64[D]").astype("int64")
+    validas = restantes[centavos.notna().to_numpy()[restantes] & (dias[restantes] != np.iinfo(np.int64).min)]
+    i, j = _pares_na_janela(centavos_chave[validas], dias[validas], janela_dias)
+    i, j = validas[i], validas[j]
+
+    # Mesmo movimento em arquivos diferentes, contas compatíveis
+    arquivos = _texto_ou_vazio(df, "Arquivo").to_numpy()
+    contas_array = contas.to_numpy()
+    compativeis = (
+        ((arquivos[i] != arquivos[j]) | (arquivos[i] == "")) &
+        ((contas_array[i] == contas_array[j]) | ~tem_conta[i] | ~tem_conta[j])
     )
+    i, j = i[compativeis], j[compativeis]
+
+    desc = descricoes.to_numpy()
+    pares = [(_similares(desc[a], desc[b], similaridade_minima), a, b) for a, b in zip(i, j)]
+    for similaridade, a, b in sorted(pares, key=lambda par: -par[0]):
+        if similaridade == 0 or motivos[a] is not None or motivos[b] is not None:
+            continue
+        # Fica a linha com conta (OFX); empate: a que veio primeiro
+        if tem_conta[a] != tem_conta[b]:
+            fica, sai = (a, b) if tem_conta[a] else (b, a)
+        else:
+            fica, sai = min(a, b), max(a, b)
+        motivos[sai] = f"aproximada ({similaridade:.0%})"
+        mantida[sai] = fica
+
+
+def deduplicar(
+    df: pd.DataFrame,
+    aproximadas: bool = False,
+    janela_dias: int = JANELA_DIAS,
+    similaridade_minima: float = SIMILARIDADE_MINIMA
+):
+    """
+    Remove transações duplicadas sem alterar o DataFrame recebido.
+
+    Passe exato: hash de 64 bits de (data, conta, valor em centavos, descrição normalizada).
+    Uma linha sem conta (PDF/TXT) também sai quando a mesma transação aparece com conta (OFX).
+    Passe aproximado (opcional): mesmo valor, datas a até `janela_dias` dias, arquivos
+    diferentes, contas compatíveis e descrições parecidas; fica a linha com conta ou a primeira.
+
+    Returns:
+        tuple: (DataFrame sem duplicatas, relatório das linhas removidas com
+            "Motivo", "Descrição mantida" e "Arquivo mantido")
+    """
+    if not COLUNAS_NECESSARIAS.issubset(set(df.columns)) or df.empty:
+        return df, pd.DataFrame()
+
+    n = len(df)
+    colunas = _colunas_comparadas(df)
+    descricoes, _, centavos_chave, contas = colunas
+    sem_conta, chave = _chaves_exatas(df["Data"], descricoes, centavos_chave, contas)
+    tem_conta = (contas != "").to_numpy()
+    motivos, mantida = _passe_exato(sem_conta, chave, tem_conta)
+
+    if aproximadas:
+        _passe_aproximado(df, colunas, tem_conta, motivos, mantida, janela_dias, similaridade_minima)
+
+    removidas, relatorio = _relatorio_removidas(df, motivos, mantida)
+    # Cópia: quem chama pode alterar colunas do resultado sem mexer no original
+    df_final = df[~removidas].copy()
 
-    df_final = df.drop_duplicates(subset="__chave").drop(columns=["__chave", "__desc", "__valor"])
-    return df_final
\ No newline at end of file
+    if len(relatorio):
+        logger.info(f"Deduplicação: {len(relatorio)} de {n} transações removidas")
+    return df_final, relatorio
+
+
+class DeduplicacaoIncremental:
+    """
+    Consolidação arquivo a arquivo, para a ingestão em segundo plano: cada lote novo é
+    normalizado e hasheado uma vez e o passe exato é refeito só sobre os hashes guardados
+    (sem reprocessar descrições). Todas as linhas recebidas, inclusive as removidas,
+    ficam na ordem do upload, então resultado e relatório não dependem da ordem em que
+    os arquivos terminam e são os mesmos de deduplicar sobre todos os arquivos.
+    O passe aproximado, que compara descrições, roda uma única vez, em finalizar.
+    """
+
+    def __init__(self, aproximadas: bool = False):
+        """
+        Consolidação vazia
+
+        Args:
+            aproximadas: Aplica o passe aproximado de deduplicar ao finalizar
+        """
+        self.aproximadas = aproximadas
+        self.df = None
+        # Todas as linhas recebidas e, paralelos a elas, posição do arquivo no upload,
+        # chaves do passe exato e o resultado do passe (motivo e linha mantida)
+        self.todas = None
+        self.ordem = np.array([], dtype=np.int64)
+        self.sem_conta = np.array([], dtype=np.uint64)
+        self.chave = np.array([], dtype=np.uint64)
+        self.tem_conta = np.array([], dtype=bool)
+        self.motivos = np.array([], dtype=object)
+        self.mantida = np.array([], dtype=np.int64)
+        self._linhas_sem_chave = 0
+
+    def _chaves_lote(self, df: pd.DataFrame):
+        """Chaves exatas do lote; lotes sem Data/Descrição/Valor recebem chaves únicas (nunca repetem)"""
+        if COLUNAS_NECESSARIAS.issubset(df.columns):
+            descricoes, _, centavos_chave, contas = _colunas_comparadas(df)
+            sem_conta, chave = _chaves_exatas(df["Data"], descricoes, centavos_chave, contas)
+            return sem_conta, chave, (contas != "").to_numpy()
+        linhas = np.arange(self._linhas_sem_chave, self._linhas_sem_chave + len(df))
+        self._linhas_sem_chave += len(df)
+        unicas = _hash_linhas({"sem_chave": np.full(len(df), "sem chave", dtype=object), "linha": linhas})
+        return unicas, unicas, np.ones(len(df), dtype=bool)
+
+    def acrescentar(self, df_novo: pd.DataFrame, ordem: int = 0):
+        """
+        Acrescenta o lote de um arquivo e refaz o passe exato sobre todas as linhas
+        recebidas (uma linha já consolidada pode sair por causa do lote novo)
+
+        Args:
+            df_novo: Transações do arquivo
+            ordem: Posição do arquivo no upload (ordem final das linhas)
+        """
+        if df_novo is None or df_novo.empty:
+            return
+        sem_conta, chave, tem_conta = self._chaves_lote(df_novo)
+
+        todas = concatenar_lotes([df_novo] if self.todas is None else [self.todas, df_novo])
+        ordem_lote = ordem
+        ordem = np.concatenate([self.ordem, np.full(len(df_novo), ordem_lote, dtype=np.int64)])
+        sem_conta = np.concatenate([self.sem_conta, sem_conta])
+        chave = np.concatenate([self.chave, chave])
+        tem_conta = np.concatenate([self.tem_conta, tem_conta])
+
+        # Arquivo concluído antes de um anterior no upload: entra na posição dele
+        if len(self.ordem) and ordem_lote < self.ordem[-1]:
+            posicoes = np.argsort(ordem, kind="stable")
+            todas = todas.iloc[posicoes].reset_index(drop=True)
+            ordem, sem_conta, chave, tem_conta = ordem[posicoes], sem_conta[posicoes], chave[posicoes], tem_conta[posicoes]
+
+        self.todas, self.ordem, self.sem_conta, self.chave, self.tem_conta = todas, ordem, sem_conta, chave, tem_conta
+        self.motivos, self.mantida = _passe_exato(sem_conta, chave, tem_conta)
+        removidas = ~pd.isna(self.motivos)
+        self.df = todas[~removidas].reset_index(drop=True) if removidas.any() else todas
+
+    def relatorio(self) -> pd.DataFrame:
+        """Linhas removidas até aqui, apontando para as linhas que de fato ficaram"""
+        if self.todas is None or pd.isna(self.motivos).all():
+            return pd.DataFrame()
+        return _relatorio_removidas(self.todas, self.motivos, self.mantida.copy())[1]
+
+    def finalizar(self):
+        """
+        Aplica o passe aproximado (se pedido) às transações consolidadas.
+
+        Returns:
+            tuple: (DataFrame consolidado ou None, relatório das linhas removidas)
+        """
+        if self.todas is None:
+            return None, self.relatorio()
+        todas = self.todas
+        motivos, mantida = self.motivos.copy(), self.mantida.copy()
+        if self.aproximadas and COLUNAS_NECESSARIAS.issubset(todas.columns):
+            _passe_aproximado(
+                todas, _colunas_comparadas(todas), self.tem_conta, motivos, mantida,
+                JANELA_DIAS, SIMILARIDADE_MINIMA
+            )
+        removidas, relatorio = _relatorio_removidas(todas, motivos, mantida)
+        df = todas[~removidas].reset_index(drop=True)
+        logger.info(f"Consolidação: {len(df)} transações, {len(relatorio)} duplicatas removidas")
+        return df, relatorio
+
+
+def remover_duplicatas(df: pd.DataFrame, aproximadas: bool = False) -> pd.DataFrame:
+    """
+    Remove linhas duplicadas com base em Data, Conta, Descrição e Valor (R$), se essas colunas existirem.
+    """
+    df_final, _ = deduplicar(df, aproximadas=aproximadas)
+    return df_final
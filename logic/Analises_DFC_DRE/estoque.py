@@ -1,23 +1,7 @@
 import streamlit as st
 import pandas as pd
-import re
 import os
-
-def parse_brl(valor):
-    valor = str(valor)
-    if valor:
-        valor = re.sub(r"[^\d,]", "", valor)
-        try:
-            return float(valor.replace(".", "").replace(",", "."))
-        except:
-            return 0.0
-    return 0.0
-
-def format_brl(valor):
-    try:
-        return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except:
-        return "0,00"
+from extractors.moeda import converter_brl, formatar_brl
 
 def coletar_estoques(df_transacoes, path_csv="./logic/CSVs/estoques.csv"):
     st.markdown("## 📦 Cadastro de Estoque Final por Mês")
@@ -35,7 +19,7 @@ def coletar_estoques(df_transacoes, path_csv="./logic/CSVs/estoques.csv"):
     for mes in meses:
         valor_antigo = df_estoques[df_estoques["Mes"] == mes]["Estoque"]
         valor_float = float(valor_antigo.values[0]) if not valor_antigo.empty else 0.0
-        valor_formatado = format_brl(valor_float)
+        valor_formatado = formatar_brl(valor_float, simbolo="")
 
         col1, col2 = st.columns([1.5, 3])
         with col1:
@@ -53,7 +37,7 @@ def coletar_estoques(df_transacoes, path_csv="./logic/CSVs/estoques.csv"):
     if st.button("💾 Salvar Estoques"):
         novos = []
         for mes, valor_str in valores_input.items():
-            valor_float = parse_brl(valor_str)
+            valor_float = converter_brl(valor_str, padrao=0.0)
             novos.append({"Mes": mes, "Estoque": valor_float})
 
         df_salvo = pd.DataFrame(novos)
@@ -3,6 +3,7 @@ import streamlit as st
 import os
 import plotly.graph_objects as go
 from typing import Dict, List, Tuple, Optional
+from extractors.moeda import formatar_brl
 
 # Constantes
 GRUPOS_DESPESAS = ["Despesas", "Investimentos", "Retiradas", "Extra Operacional"]
@@ -16,10 +17,6 @@ ESTILO_LINHAS = {
     "RESULTADO GERENCIAL": ("#216a5a", "white"),
 }
 
-def formatar_brl(valor: float) -> str:
-    """Formata um valor para o formato de moeda brasileira."""
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
 def carregar_dados(path_fluxo: str, path_plano: str) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
     """Carrega os dados dos arquivos e retorna os DataFrames."""
     if not os.path.exists(path_fluxo) or not os.path.exists(path_plano):
@@ -49,8 +46,9 @@ def soma_por_categoria(df_fluxo: pd.DataFrame, *categorias) -> pd.Series:
     return df_fluxo.loc[df_fluxo.index.isin(categorias)].sum()
 
 def criar_dre(df_fluxo: pd.DataFrame, plano: pd.DataFrame) -> pd.DataFrame:
-    """Cria o DataFrame do DRE com todos os cálculos."""
+    """Cria o DataFrame do DRE com todos os cálculos (em centavos inteiros, devolvidos em reais)."""
     meses = df_fluxo.columns.tolist()
+    df_fluxo = (df_fluxo.apply(pd.to_numeric, errors="coerce") * 100).round().fillna(0).astype("int64")
     
     # Função auxiliar para criar linhas
     def linha(nome, serie):
@@ -109,6 +107,7 @@ def criar_dre(df_fluxo: pd.DataFrame, plano: pd.DataFrame) -> pd.DataFrame:
     dre["TOTAL"] = dre[meses].sum(axis=1)
     total_receita = dre.loc["RECEITA", "TOTAL"]
     dre["%"] = dre["TOTAL"] / total_receita * 100 if total_receita != 0 else 0
+    dre[meses + ["TOTAL"]] = dre[meses + ["TOTAL"]] / 100
     
     return dre
 
@@ -118,7 +117,7 @@ def formatar_dre(dre: pd.DataFrame, meses: List[str]) -> pd.DataFrame:
     
     # Formata valores monetários e percentuais
     for col in meses + ["TOTAL"]:
-        dre_formatado[col] = dre_formatado[col].apply(formatar_brl)
+        dre_formatado[col] = formatar_brl(dre_formatado[col])
     dre_formatado["%"] = dre["%"].apply(lambda x: f"{x:.1f}%")
     
     # Resetando índice para que a primeira coluna seja exibida normalmente
@@ -173,45 +172,66 @@ def criar_grafico_dre(dre: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def exibir_dre(df_fluxo=None, path_fluxo="./logic/CSVs/transacoes_numericas.xlsx", path_plano="./logic/CSVs/plano_de_contas.csv"):
-    """Função principal que exibe o DRE no Streamlit."""
+def calcular_dre(df_fluxo: pd.DataFrame, path_plano: str = "./logic/CSVs/plano_de_contas.csv") -> Dict:
+    """
+    Calcula o DRE a partir do fluxo de caixa, sem exibir nada.
+
+    Returns:
+        dict: "status", "mensagem" e, no sucesso, o DRE numérico, o formatado e o CSV
+    """
+    if df_fluxo is None or df_fluxo.empty:
+        return {"status": "aviso", "mensagem": "⚠️ Fluxo de caixa indisponível para gerar o DRE."}
+
+    try:
+        plano = pd.read_csv(path_plano)
+        meses = df_fluxo.columns.tolist()
+        dre = criar_dre(df_fluxo, plano)
+        dre_formatado = formatar_dre(dre, meses)
+    except Exception as e:
+        return {"status": "erro", "mensagem": f"❌ Erro ao calcular o DRE: {e}"}
+
+    return {
+        "status": "sucesso",
+        "mensagem": "",
+        "meses": meses,
+        "dre": dre,
+        "dre_formatado": dre_formatado,
+        "csv": dre_formatado.to_csv(index=False).encode('utf-8')
+    }
+
+def renderizar_dre(resultado: Dict):
+    """Exibe o DRE calculado por calcular_dre e retorna o DRE numérico (None se indisponível)."""
     st.markdown("## 📊 Demonstrativo de Resultados (DRE)")
 
-    # Se não vier DataFrame, carrega do Excel
-    if df_fluxo is None:
-        df_fluxo, _ = carregar_dados(path_fluxo, path_plano)
-        if df_fluxo is None:
-            return
+    if resultado["status"] != "sucesso":
+        if resultado["status"] == "erro":
+            st.error(resultado["mensagem"])
+        else:
+            st.warning(resultado["mensagem"])
+        return None
 
-    plano = pd.read_csv(path_plano)
-    meses = df_fluxo.columns.tolist()
+    dre = resultado["dre"]
 
     # Criar abas para diferentes visualizações
     tab1, tab2 = st.tabs(["Tabela DRE", "Visualização Gráfica"])
     
     with tab1:
-        # Criar e formatar o DRE
-        dre = criar_dre(df_fluxo, plano)
-        dre_formatado = formatar_dre(dre, meses)
-        
         # Exibir o DRE formatado
         st.dataframe(
-            dre_formatado.style.apply(highlight_rows, axis=1).hide(axis="index"),
+            resultado["dre_formatado"].style.apply(highlight_rows, axis=1).hide(axis="index"),
             use_container_width=True
         )
         
         # Adicionar opção para download
-        csv = dre_formatado.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📥 Baixar DRE como CSV",
-            data=csv,
+            data=resultado["csv"],
             file_name="dre_report.csv",
             mime="text/csv",
         )
     
     with tab2:
         # Criar e exibir o gráfico
-        dre = criar_dre(df_fluxo, plano)
         fig = criar_grafico_dre(dre)
         st.plotly_chart(fig, use_container_width=True)
         
@@ -236,4 +256,14 @@ def exibir_dre(df_fluxo=None, path_fluxo="./logic/CSVs/transacoes_numericas.xlsx
                 f"{dre.loc['RESULTADO', '%']:.1f}%"
             )
     
-    return dre
\ No newline at end of file
+    return dre
+
+def exibir_dre(df_fluxo=None, path_fluxo="./logic/CSVs/transacoes_numericas.xlsx", path_plano="./logic/CSVs/plano_de_contas.csv"):
+    """Função principal que exibe o DRE no Streamlit."""
+    # Se não vier DataFrame, carrega do Excel
+    if df_fluxo is None:
+        df_fluxo, _ = carregar_dados(path_fluxo, path_plano)
+        if df_fluxo is None:
+            return
+
+    return renderizar_dre(calcular_dre(df_fluxo, path_plano))
\ No newline at end of file
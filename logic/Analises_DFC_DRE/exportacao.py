@@ -0,0 +1,176 @@
+import io
+import os
+import logging
+import zipfile
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+from openpyxl import Workbook
+
+from extractors.utils import impressao_digital
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Formato -> (extensão, mime)
+FORMATOS = {
+    "Excel (.xlsx)": ("xlsx", MIME_XLSX),
+    "CSV (.csv)": ("csv", "text/csv"),
+    "Parquet (.parquet)": ("parquet", "application/octet-stream"),
+}
+
+# Limite de linhas de uma aba do Excel (fora o cabeçalho)
+MAX_LINHAS_EXCEL = 1_048_575
+# Linhas convertidas por vez na escrita em streaming
+TAMANHO_BLOCO = 10_000
+# Quantos arquivos gerados ficam guardados na sessão
+MAX_EXPORTACOES = int(os.getenv("EXPORTACAO_MAX_CACHE", "6"))
+
+
+def _preparar(df: pd.DataFrame, indice: bool) -> pd.DataFrame:
+    """Índice vira coluna (quando exportado) e os nomes de coluna viram texto"""
+    if indice:
+        df = df.reset_index(names=[nome if nome is not None else "" for nome in df.index.names])
+    return df.set_axis([str(coluna) for coluna in df.columns], axis=1)
+
+
+def _linhas(df: pd.DataFrame):
+    """Linhas como tuplas de valores Python (None nos ausentes), convertidas em blocos"""
+    for inicio in range(0, len(df), TAMANHO_BLOCO):
+        bloco = df.iloc[inicio:inicio + TAMANHO_BLOCO].astype(object)
+        yield from bloco.where(bloco.notna(), None).itertuples(index=False, name=None)
+
+
+def escrever_excel(planilhas: list) -> bytes:
+    """
+    Pasta de trabalho com uma aba por tabela, escrita em streaming
+    (openpyxl em modo write_only: as células não ficam todas em memória).
+
+    Args:
+        planilhas: Lista de tuplas (nome da aba, DataFrame, exportar índice)
+    """
+    pasta = Workbook(write_only=True)
+    for nome, df, indice in planilhas:
+        if len(df) > MAX_LINHAS_EXCEL:
+            raise ValueError(
+                f"A aba {nome} tem {len(df)} linhas, acima do limite do Excel ({MAX_LINHAS_EXCEL}); "
+                "use CSV ou Parquet"
+            )
+        df = _preparar(df, indice)
+        aba = pasta.create_sheet(title=nome[:31])
+        aba.append(list(df.columns))
+        for linha in _linhas(df):
+            aba.append(linha)
+
+    output = io.BytesIO()
+    pasta.save(output)
+    return output.getvalue()
+
+
+def escrever_tabela(df: pd.DataFrame, indice: bool, extensao: str) -> bytes:
+    """Uma tabela em CSV (UTF-8) ou Parquet"""
+    df = _preparar(df, indice)
+    if extensao == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    output = io.BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def exportar(planilhas: list, formato: str) -> bytes:
+    """
+    Gera o arquivo no formato escolhido. Em CSV e Parquet, várias tabelas
+    vão num .zip com um arquivo por aba.
+    """
+    extensao, _ = FORMATOS[formato]
+    if extensao == "xlsx":
+        return escrever_excel(planilhas)
+    if len(planilhas) == 1:
+        _, df, indice = planilhas[0]
+        return escrever_tabela(df, indice, extensao)
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, df, indice in planilhas:
+            arquivo_zip.writestr(f"{nome}.{extensao}", escrever_tabela(df, indice, extensao))
+    return output.getvalue()
+
+
+class CacheExportacoes:
+    """
+    Arquivos gerados para download, guardados pela impressão digital dos dados e pelo formato.
+    Fica no session_state: baixar de novo os mesmos dados não regera o arquivo.
+    """
+
+    def __init__(self, max_itens: int = MAX_EXPORTACOES):
+        """Inicializa o cache vazio, com no máximo `max_itens` arquivos (os mais antigos saem)"""
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+
+    @staticmethod
+    def chave(planilhas: list, formato: str) -> str:
+        partes = [formato] + [f"{nome}|{indice}|{impressao_digital(df)}" for nome, df, indice in planilhas]
+        return "||".join(partes)
+
+    def obter(self, planilhas: list, formato: str) -> bytes:
+        """Bytes do arquivo, gerando-o só se os dados (ou o formato) mudaram"""
+        chave = self.chave(planilhas, formato)
+        if chave in self.itens:
+            self.itens.move_to_end(chave)
+            return self.itens[chave]
+
+        logger.info(f"Gerando exportação {formato}: {sum(len(df) for _, df, _ in planilhas)} linhas")
+        conteudo = exportar(planilhas, formato)
+        self.itens[chave] = conteudo
+        while len(self.itens) > self.max_itens:
+            self.itens.popitem(last=False)
+        return conteudo
+
+
+def exibir_download(planilhas: list, nome_arquivo: str, chave: str, rotulo: str = "📥 Baixar", formatos: list = None):
+    """
+    Download sob demanda: o arquivo só é gerado quando o usuário pede,
+    no formato escolhido, e reaproveitado enquanto os dados não mudarem.
+
+    Args:
+        planilhas: Lista de tuplas (nome da aba, DataFrame, exportar índice)
+        nome_arquivo: Nome do arquivo, sem extensão
+        chave: Prefixo das chaves dos widgets (único na página)
+        rotulo: Texto do botão de download
+        formatos: Formatos oferecidos (padrão: todos de FORMATOS)
+    """
+    if "cache_exportacoes" not in st.session_state:
+        st.session_state.cache_exportacoes = CacheExportacoes()
+
+    formatos = formatos or list(FORMATOS)
+    col1, col2 = st.columns([1, 2])
+    formato = col1.selectbox("Formato", formatos, key=f"{chave}_formato", label_visibility="collapsed")
+    if len(planilhas) > 1 and FORMATOS[formato][0] != "xlsx":
+        col1.caption("Uma tabela por arquivo, compactadas em .zip")
+
+    if not col2.button(f"⚙️ Preparar {formato}", key=f"{chave}_preparar"):
+        return
+
+    try:
+        with st.spinner("Gerando arquivo..."):
+            conteudo = st.session_state.cache_exportacoes.obter(planilhas, formato)
+    except Exception as e:
+        logger.error(f"Erro ao exportar {nome_arquivo}: {e}")
+        st.error(f"❌ Erro ao gerar o arquivo: {e}")
+        return
+
+    extensao, mime = FORMATOS[formato]
+    if len(planilhas) > 1 and extensao != "xlsx":
+        extensao, mime = "zip", "application/zip"
+    col2.download_button(
+        label=rotulo,
+        data=conteudo,
+        file_name=f"{nome_arquivo}.{extensao}",
+        mime=mime,
+        key=f"{chave}_download",
+        on_click="ignore"
+    )
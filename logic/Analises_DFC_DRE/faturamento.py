@@ -1,25 +1,7 @@
 import streamlit as st
 import pandas as pd
-import re
 import os
-
-def parse_brl(valor):
-    """Converte string BRL ex: '1.234,56' -> 1234.56 (float)"""
-    valor = str(valor)
-    if valor:
-        valor = re.sub(r"[^\d,]", "", valor)
-        try:
-            return float(valor.replace(".", "").replace(",", "."))
-        except:
-            return 0.0
-    return 0.0
-
-def format_brl(valor):
-    """Converte float -> BRL formatado como 150.000,00"""
-    try:
-        return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except:
-        return "0,00"
+from extractors.moeda import converter_brl, formatar_brl
 
 def coletar_faturamentos(df_transacoes, path_csv="./logic/CSVs/faturamentos.csv"):
     st.markdown("## 🧾 Cadastro de Faturamento por Mês")
@@ -39,7 +21,7 @@ def coletar_faturamentos(df_transacoes, path_csv="./logic/CSVs/faturamentos.csv"
     for mes in meses:
         valor_antigo = df_faturamentos[df_faturamentos["Mes"] == mes]["Faturamento"]
         valor_float = float(valor_antigo.values[0]) if not valor_antigo.empty else 0.0
-        valor_formatado = format_brl(valor_float)
+        valor_formatado = formatar_brl(valor_float, simbolo="")
 
         col1, col2 = st.columns([1.5, 3])
         with col1:
@@ -57,7 +39,7 @@ def coletar_faturamentos(df_transacoes, path_csv="./logic/CSVs/faturamentos.csv"
     if st.button("💾 Salvar Faturamentos"):
         novos = []
         for mes, valor_str in valores_input.items():
-            valor_float = parse_brl(valor_str)
+            valor_float = converter_brl(valor_str, padrao=0.0)
             novos.append({"Mes": mes, "Faturamento": valor_float})
 
         df_salvo = pd.DataFrame(novos)
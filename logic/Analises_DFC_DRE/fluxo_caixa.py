@@ -1,19 +1,11 @@
 import pandas as pd
 import streamlit as st
 from datetime import datetime
-import io
 import os
 import plotly.express as px
 import plotly.graph_objects as go
-
-def formatar_brl(valor):
-    """Formata um valor numérico para o formato brasileiro (R$)"""
-    if pd.isna(valor) or valor is None:
-        return ""
-    try:
-        return f"R$ {float(valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except:
-        return str(valor)
+from extractors.moeda import COLUNA_CENTAVOS, formatar_brl, centavos_transacoes, centavos_para_reais
+from logic.Analises_DFC_DRE.exportacao import exibir_download
 
 def calcular_variacao_percentual(valor_atual, valor_anterior):
     """Calcula a variação percentual entre dois valores"""
@@ -21,24 +13,36 @@ def calcular_variacao_percentual(valor_atual, valor_anterior):
         return float('inf') if valor_atual > 0 else float('-inf') if valor_atual < 0 else 0
     return ((valor_atual - valor_anterior) / abs(valor_anterior)) * 100
 
-def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamentos.csv", path_estoque="./logic/CSVs/estoques.csv"):
-    """
-    Gera e exibe o fluxo de caixa por categoria e mês a partir das transações categorizadas.
+def planilhas_fluxo(fluxo):
+    """Abas do download do fluxo: formatado, numérico e transações detalhadas"""
+    # A coluna interna de centavos não vai para a planilha
+    df_detalhado = fluxo["df_detalhado"].drop(columns=[COLUNA_CENTAVOS], errors="ignore")
+    return [
+        ("Fluxo de Caixa", fluxo["df_formatado"], True),
+        ("Dados Numéricos", fluxo["df_final"], True),
+        ("Transações Detalhadas", df_detalhado, False),
+    ]
+
+def calcular_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamentos.csv", path_estoque="./logic/CSVs/estoques.csv", path_plano="./logic/CSVs/plano_de_contas.csv"):
     """
-    st.markdown("## 📊 Fluxo de Caixa (por Categoria e Mês)")
+    Calcula o fluxo de caixa por categoria e mês, sem exibir nada.
 
+    Returns:
+        dict: "status" ("sucesso", "aviso" ou "erro"), "mensagem" e "avisos";
+            no sucesso, as tabelas e séries usadas na exibição e nos downloads
+    """
     # Verificar se o DataFrame está vazio
     if df_transacoes.empty:
-        st.warning("⚠️ Não há transações para gerar o fluxo de caixa.")
-        return pd.DataFrame()
+        return {"status": "aviso", "mensagem": "⚠️ Não há transações para gerar o fluxo de caixa."}
 
     # Verificar se as colunas necessárias existem
     colunas_necessarias = ["Considerar", "Valor (R$)", "Data", "Categoria"]
     colunas_faltantes = [col for col in colunas_necessarias if col not in df_transacoes.columns]
 
     if colunas_faltantes:
-        st.error(f"❌ Colunas necessárias ausentes: {', '.join(colunas_faltantes)}")
-        return pd.DataFrame()
+        return {"status": "erro", "mensagem": f"❌ Colunas necessárias ausentes: {', '.join(colunas_faltantes)}"}
+
+    avisos = []
 
     # Criar cópia para não modificar o original
     df_filtrado = df_transacoes.copy()
@@ -47,63 +51,51 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
     if "Considerar" in df_filtrado.columns:
         df_filtrado = df_filtrado[df_filtrado["Considerar"].astype(str).str.lower() == "sim"].copy()
 
-    # Converter valores para numérico
-    with st.spinner("Processando valores..."):
-        try:
-            df_filtrado["Valor (R$)"] = pd.to_numeric(
-                df_filtrado["Valor (R$)"].astype(str)
-                .replace("R$", "", regex=False)
-                .replace(".", "", regex=False)
-                .replace(",", ".", regex=False)
-                .str.strip(),
-                errors="coerce"
-            )
-        except Exception as e:
-            st.error(f"❌ Erro ao converter valores: {e}")
-            st.dataframe(df_filtrado.head())
-            return pd.DataFrame()
+    # Converter valores para centavos inteiros: as somas do fluxo ficam exatas
+    try:
+        df_filtrado["__centavos"] = centavos_transacoes(df_filtrado).fillna(0).astype("int64")
+        df_filtrado["Valor (R$)"] = centavos_para_reais(df_filtrado["__centavos"])
+    except Exception as e:
+        return {"status": "erro", "mensagem": f"❌ Erro ao converter valores: {e}", "amostra": df_filtrado.head()}
 
     # Converter datas
-    with st.spinner("Processando datas..."):
-        try:
+    try:
+        # Lotes vindos dos extratores já trazem datetime64; só texto precisa de conversão
+        if not pd.api.types.is_datetime64_any_dtype(df_filtrado["Data"]):
             for formato in ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y"]:
                 try:
                     df_filtrado["Data"] = pd.to_datetime(df_filtrado["Data"], format=formato, errors="raise")
                     break
                 except:
                     continue
-            if not pd.api.types.is_datetime64_any_dtype(df_filtrado["Data"]):
-                df_filtrado["Data"] = pd.to_datetime(df_filtrado["Data"], errors="coerce")
-            df_filtrado = df_filtrado.dropna(subset=["Data"])
-            df_filtrado["Mes"] = df_filtrado["Data"].dt.to_period("M").astype(str)
-        except Exception as e:
-            st.error(f"❌ Erro ao processar datas: {e}")
-            st.dataframe(df_filtrado.head())
-            return pd.DataFrame()
+        if not pd.api.types.is_datetime64_any_dtype(df_filtrado["Data"]):
+            df_filtrado["Data"] = pd.to_datetime(df_filtrado["Data"], errors="coerce")
+        df_filtrado = df_filtrado.dropna(subset=["Data"])
+        df_filtrado["Mes"] = df_filtrado["Data"].dt.to_period("M").astype(str)
+    except Exception as e:
+        return {"status": "erro", "mensagem": f"❌ Erro ao processar datas: {e}", "amostra": df_filtrado.head()}
 
     # Criar tabela pivô
-    with st.spinner("Gerando tabela de fluxo de caixa..."):
-        try:
-            df_pivot = pd.pivot_table(
-                df_filtrado,
-                values="Valor (R$)",
-                index="Categoria",
-                columns="Mes",
-                aggfunc="sum",
-                fill_value=0
-            )
-        except Exception as e:
-            st.error(f"❌ Erro ao criar tabela pivô: {e}")
-            return pd.DataFrame()
+    try:
+        df_pivot = pd.pivot_table(
+            df_filtrado,
+            values="__centavos",
+            index="Categoria",
+            columns="Mes",
+            aggfunc="sum",
+            fill_value=0
+        )
+    except Exception as e:
+        return {"status": "erro", "mensagem": f"❌ Erro ao criar tabela pivô: {e}"}
 
     # Carregar plano de contas para ordenação
     try:
-        plano = pd.read_csv("./logic/CSVs/plano_de_contas.csv")
+        plano = pd.read_csv(path_plano)
         ordem_map = plano.set_index("Categoria")["Ordem"].to_dict()
         tipo_map = plano.set_index("Categoria")["Tipo"].to_dict()
         grupo_map = plano.set_index("Categoria")["Grupo"].to_dict()
     except Exception as e:
-        st.warning(f"⚠️ Plano de contas não encontrado ou inválido: {e}")
+        avisos.append(f"⚠️ Plano de contas não encontrado ou inválido: {e}")
         ordem_map = {}
         tipo_map = {}
         grupo_map = {}
@@ -118,13 +110,14 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
     meses = [col for col in df_pivot.columns if col not in ["__ordem__", "__tipo__", "__grupo__"]]
 
     if not meses:
-        st.warning("⚠️ Não há dados suficientes para gerar o fluxo de caixa.")
-        return pd.DataFrame()
+        return {"status": "aviso", "mensagem": "⚠️ Não há dados suficientes para gerar o fluxo de caixa.", "avisos": avisos}
 
-    # Calcular totais
+    # Calcular totais em centavos e só então passar para reais
     receitas = df_pivot[df_pivot["__tipo__"] == "Crédito"][meses].sum()
     despesas = df_pivot[df_pivot["__tipo__"] == "Débito"][meses].sum()
     resultado = receitas + despesas  # Despesas já são negativas
+    receitas, despesas, resultado = receitas / 100, despesas / 100, resultado / 100
+    df_pivot[meses] = df_pivot[meses] / 100
 
     # Carregar dados de faturamento
     if os.path.exists(path_faturamento):
@@ -133,7 +126,7 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
             linha_fat = df_fat.set_index("Mes").T.reindex(columns=meses).fillna(0)
             linha_fat.index = ["💰 Faturamento Bruto"]
         except Exception as e:
-            st.warning(f"⚠️ Erro ao carregar dados de faturamento: {e}")
+            avisos.append(f"⚠️ Erro ao carregar dados de faturamento: {e}")
             linha_fat = pd.DataFrame(0, index=["💰 Faturamento Bruto"], columns=meses)
     else:
         linha_fat = pd.DataFrame(0, index=["💰 Faturamento Bruto"], columns=meses)
@@ -145,7 +138,7 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
             linha_estoque = df_estoque.set_index("Mes").T.reindex(columns=meses).fillna(0)
             linha_estoque.index = ["📦 Estoque Final"]
         except Exception as e:
-            st.warning(f"⚠️ Erro ao carregar dados de estoque: {e}")
+            avisos.append(f"⚠️ Erro ao carregar dados de estoque: {e}")
             linha_estoque = pd.DataFrame(0, index=["📦 Estoque Final"], columns=meses)
     else:
         linha_estoque = pd.DataFrame(0, index=["📦 Estoque Final"], columns=meses)
@@ -194,7 +187,53 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
     # Formatar valores para exibição
     df_formatado = df_final_com_var.copy()
     for col in meses:
-        df_formatado[col] = df_formatado[col].apply(lambda x: formatar_brl(x) if pd.notnull(x) else "")
+        df_formatado[col] = formatar_brl(df_formatado[col])
+
+    df_detalhado = df_filtrado.drop(columns=["__centavos"])
+
+    return {
+        "status": "sucesso",
+        "mensagem": "",
+        "avisos": avisos,
+        "meses": meses,
+        "df_final": df_final,
+        "df_formatado": df_formatado,
+        "df_pivot": df_pivot,
+        "df_receitas": df_receitas,
+        "df_despesas": df_despesas,
+        "receitas": receitas,
+        "despesas": despesas,
+        "resultado": resultado,
+        "df_detalhado": df_detalhado
+    }
+
+def renderizar_fluxo_caixa(fluxo):
+    """
+    Exibe o fluxo de caixa calculado por calcular_fluxo_caixa: tabela, gráficos e downloads.
+    Retorna o DataFrame numérico do fluxo (vazio se o cálculo não teve sucesso).
+    """
+    st.markdown("## 📊 Fluxo de Caixa (por Categoria e Mês)")
+
+    for aviso in fluxo.get("avisos", []):
+        st.warning(aviso)
+    if fluxo["status"] != "sucesso":
+        if fluxo["status"] == "erro":
+            st.error(fluxo["mensagem"])
+            if "amostra" in fluxo:
+                st.dataframe(fluxo["amostra"])
+        else:
+            st.warning(fluxo["mensagem"])
+        return pd.DataFrame()
+
+    meses = fluxo["meses"]
+    df_final = fluxo["df_final"]
+    df_formatado = fluxo["df_formatado"]
+    df_pivot = fluxo["df_pivot"]
+    df_receitas = fluxo["df_receitas"]
+    df_despesas = fluxo["df_despesas"]
+    receitas = fluxo["receitas"]
+    despesas = fluxo["despesas"]
+    resultado = fluxo["resultado"]
 
     # Exibir tabela formatada
     st.markdown("### 📋 Tabela de Fluxo de Caixa")
@@ -331,28 +370,25 @@ def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamento
 
     # Opções de download
     st.markdown("### 📥 Download dos Dados")
-    col1, col2 = st.columns(2)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df_formatado.to_excel(writer, sheet_name="Fluxo de Caixa")
-        df_final.to_excel(writer, sheet_name="Dados Numéricos")
-        df_filtrado.to_excel(writer, sheet_name="Transações Detalhadas", index=False)
-    output.seek(0)
-
-    col1.download_button(
-        label="📄 Baixar Fluxo de Caixa (Excel)",
-        data=output,
-        file_name=f"fluxo_caixa_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    exibir_download(
+        planilhas_fluxo(fluxo),
+        f"fluxo_caixa_{datetime.now().strftime('%Y%m%d_%H%M')}",
+        chave="download_fluxo",
+        rotulo="📄 Baixar Fluxo de Caixa"
     )
 
-    if col2.button("💾 Salvar na pasta do sistema"):
+    if st.button("💾 Salvar na pasta do sistema"):
         try:
             df_formatado.to_excel("./logic/CSVS/transacoes_categorizadas.xlsx", index=True)
             df_final.to_excel("./logic/CSVs/transacoes_numericas.xlsx", index=True)
-            col2.success("✅ Arquivos salvos com sucesso!")
+            st.success("✅ Arquivos salvos com sucesso!")
         except Exception as e:
-            col2.error(f"❌ Erro ao salvar arquivos: {e}")
+            st.error(f"❌ Erro ao salvar arquivos: {e}")
+
+    return df_final
 
-    return df_final
\ No newline at end of file
+def exibir_fluxo_caixa(df_transacoes, path_faturamento="./logic/CSVs/faturamentos.csv", path_estoque="./logic/CSVs/estoques.csv"):
+    """
+    Gera e exibe o fluxo de caixa por categoria e mês a partir das transações categorizadas.
+    """
+    return renderizar_fluxo_caixa(calcular_fluxo_caixa(df_transacoes, path_faturamento, path_estoque))
\ No newline at end of file
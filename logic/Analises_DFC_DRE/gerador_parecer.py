@@ -6,10 +6,7 @@ import plotly.graph_objects as go
 from typing import Optional, Tuple, Dict
 import numpy as np
 from datetime import datetime
-
-def formatar_brl(valor: float) -> str:
-    """Formata um valor para o formato de moeda brasileira."""
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+from extractors.moeda import formatar_brl
 
 def carregar_dados(path_fluxo: str) -> Optional[pd.DataFrame]:
     """Carrega os dados do arquivo de fluxo e realiza o pré-processamento básico."""
@@ -401,27 +398,56 @@ def exibir_recomendacoes(insights: Dict[str, Dict], indicadores: Dict[str, float
     else:
         st.markdown("- Continue monitorando os indicadores financeiros e mantenha as boas práticas de gestão.")
 
-def gerar_parecer_automatico(df):
-    """Função principal que gera o parecer financeiro automático."""
-    st.header("📄 Diagnóstico Financeiro Interativo")
-    
-    # Adiciona seletor de período
-    hoje = datetime.now()
-    periodo_options = ["Últimos 3 meses", "Últimos 6 meses", "Último ano", "Todo o período"]
-    periodo_selecionado = st.selectbox("Selecione o período para análise:", periodo_options, index=3)
-    
+PERIODOS_PARECER = ["Últimos 3 meses", "Últimos 6 meses", "Último ano", "Todo o período"]
+
+def selecionar_periodo_parecer() -> str:
+    """Exibe o seletor de período do parecer e retorna a opção escolhida."""
+    return st.selectbox("Selecione o período para análise:", PERIODOS_PARECER, index=3)
+
+def calcular_parecer(df: pd.DataFrame, periodo_selecionado: str = "Todo o período") -> Dict:
+    """
+    Calcula métricas, indicadores e insights do parecer para o período, sem exibir nada.
+
+    Returns:
+        dict: "status", "mensagem" e, no sucesso, "metricas", "indicadores" e "insights"
+    """
+    if df is None or df.empty:
+        return {"status": "aviso", "mensagem": "⚠️ Fluxo de caixa indisponível para gerar o parecer."}
+
     # Filtrar por período selecionado
     if periodo_selecionado != "Todo o período":
         num_meses = 3 if "3" in periodo_selecionado else (6 if "6" in periodo_selecionado else 12)
         if len(df.columns) > num_meses:
             df = df.iloc[:, -num_meses:]
     
-    # Extrair métricas principais
-    metricas = extrair_metricas_principais(df)
-    
-    # Calcular indicadores
-    indicadores = calcular_indicadores(metricas)
-    
+    try:
+        metricas = extrair_metricas_principais(df)
+        indicadores = calcular_indicadores(metricas)
+        insights = gerar_insights(metricas, indicadores)
+    except Exception as e:
+        return {"status": "erro", "mensagem": f"❌ Erro ao calcular o parecer: {e}"}
+
+    return {
+        "status": "sucesso",
+        "mensagem": "",
+        "metricas": metricas,
+        "indicadores": indicadores,
+        "insights": insights
+    }
+
+def exibir_parecer(parecer: Dict):
+    """Exibe o parecer calculado por calcular_parecer."""
+    if parecer["status"] != "sucesso":
+        if parecer["status"] == "erro":
+            st.error(parecer["mensagem"])
+        else:
+            st.warning(parecer["mensagem"])
+        return
+
+    metricas = parecer["metricas"]
+    indicadores = parecer["indicadores"]
+    insights = parecer["insights"]
+
     # Exibir métricas principais
     exibir_metricas_principais(metricas, indicadores)
     
@@ -444,9 +470,6 @@ def gerar_parecer_automatico(df):
                 st.plotly_chart(fig_estoque, use_container_width=True)
     
     with tab2:
-        # Gerar insights
-        insights = gerar_insights(metricas, indicadores)
-        
         # Exibir insights
         exibir_insights(insights)
         
@@ -459,4 +482,12 @@ def gerar_parecer_automatico(df):
         st.markdown("Baixe o relatório completo para compartilhar ou arquivar.")
         
         if st.button("Gerar Relatório PDF"):
-            st.info("Funcionalidade de exportação para PDF em desenvolvimento. Em breve estará disponível!")
\ No newline at end of file
+            st.info("Funcionalidade de exportação para PDF em desenvolvimento. Em breve estará disponível!")
+
+def gerar_parecer_automatico(df):
+    """Função principal que gera o parecer financeiro automático."""
+    st.header("📄 Diagnóstico Financeiro Interativo")
+    
+    # Adiciona seletor de período
+    periodo_selecionado = selecionar_periodo_parecer()
+    exibir_parecer(calcular_parecer(df, periodo_selecionado))
\ No newline at end of file
@@ -0,0 +1,171 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from extractors.moeda import COLUNA_VALOR, COLUNA_CENTAVOS, converter_brl, formatar_brl
+from extractors.utils import impressao_digital
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TAMANHOS_PAGINA = [50, 100, 250, 500]
+ORDENACOES = ["Data", "Valor (R$)", "Descrição", "Categoria"]
+
+
+def _postos(valores: pd.Series) -> np.ndarray:
+    """Posição de cada texto na ordem alfabética (sem diferenciar maiúsculas); ausentes vão ao fim"""
+    return valores.str.lower().rank(method="dense", na_option="bottom").to_numpy(dtype=np.int64)
+
+
+class GradeTransacoes:
+    """
+    Índice da tabela "Todas as Transações" para filtrar, ordenar e paginar no servidor.
+    Crédito/débito, códigos de categoria, chaves de ordenação e o índice de busca
+    (descrições distintas em minúsculas + código de cada linha) são calculados uma vez;
+    a cada rerun só as posições filtradas mudam e apenas a página visível vai ao navegador.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Pré-calcula as colunas auxiliares
+
+        Args:
+            df: Transações categorizadas (Valor (R$) numérico)
+        """
+        self.df = df
+        self.total = len(df)
+
+        valores = converter_brl(df[COLUNA_VALOR]).to_numpy() if COLUNA_VALOR in df.columns else np.zeros(self.total)
+        self.credito = valores > 0
+
+        categorias = df["Categoria"] if "Categoria" in df.columns else pd.Series(np.nan, index=df.index)
+        categorias = categorias.astype("category")
+        self.categorias = sorted(categorias.cat.categories.astype(str).tolist())
+        self.codigos_categoria = categorias.cat.codes.to_numpy()
+        self.posicao_categoria = {str(nome): codigo for codigo, nome in enumerate(categorias.cat.categories)}
+
+        # Índice de busca: cada descrição distinta é pesquisada uma vez só
+        descricoes = df["Descrição"].astype(str) if "Descrição" in df.columns else pd.Series("", index=df.index)
+        self.codigos_descricao, unicas = pd.factorize(descricoes.str.lower().to_numpy(dtype=object))
+        self.descricoes_unicas = pd.Series(unicas, dtype=object)
+
+        # Chaves de ordenação; datas, valores e categorias ausentes vão para o fim
+        datas = pd.to_datetime(df["Data"], errors="coerce") if "Data" in df.columns else pd.Series(pd.NaT, index=df.index)
+        nomes_categoria = pd.Series(categorias.cat.categories.astype(str), dtype=object)
+        # Código -1 (sem categoria) lê o último elemento, depois de todos os postos
+        postos_categoria = np.append(_postos(nomes_categoria), len(nomes_categoria) + 1)
+        self.chaves_ordenacao = {
+            "Data": datas.fillna(pd.Timestamp.max).to_numpy(dtype="datetime64[ns]"),
+            "Valor (R$)": np.nan_to_num(valores, nan=np.inf),
+            "Descrição": _postos(self.descricoes_unicas)[self.codigos_descricao],
+            "Categoria": postos_categoria[self.codigos_categoria],
+        }
+
+    def filtrar(self, tipos: list = None, categorias: list = None, texto: str = "") -> np.ndarray:
+        """
+        Posições das linhas que passam nos filtros
+
+        Args:
+            tipos: "Crédito" (valor > 0) e/ou "Débito"; ambos ou nenhum não filtram
+            categorias: Categorias aceitas (vazio = todas)
+            texto: Trecho procurado na descrição, sem diferenciar maiúsculas
+        """
+        mascara = np.ones(self.total, dtype=bool)
+
+        if tipos and len(tipos) < 2:
+            mascara &= self.credito if "Crédito" in tipos else ~self.credito
+
+        if categorias:
+            codigos = [self.posicao_categoria[c] for c in categorias if c in self.posicao_categoria]
+            mascara &= np.isin(self.codigos_categoria, codigos)
+
+        texto = (texto or "").strip().lower()
+        if texto:
+            encontradas = self.descricoes_unicas.str.contains(texto, regex=False).to_numpy(dtype=bool)
+            mascara &= encontradas[self.codigos_descricao]
+
+        return np.flatnonzero(mascara)
+
+    def ordenar(self, posicoes: np.ndarray, coluna: str = "Data", crescente: bool = True) -> np.ndarray:
+        """Posições ordenadas pela coluna (ordem estável: empates mantêm a ordem original)"""
+        chaves = self.chaves_ordenacao[coluna][posicoes]
+        if not crescente:
+            # Inverte a ordem das chaves, mantendo os empates na ordem original
+            _, chaves = np.unique(chaves, return_inverse=True)
+            chaves = -chaves
+        return posicoes[np.argsort(chaves, kind="stable")]
+
+    def pagina(self, posicoes: np.ndarray, numero: int, tamanho: int) -> pd.DataFrame:
+        """Linhas da página (numerada a partir de 1), com Valor (R$) formatado só nelas"""
+        inicio = (numero - 1) * tamanho
+        df_pagina = self.df.iloc[posicoes[inicio:inicio + tamanho]]
+        if COLUNA_VALOR in df_pagina.columns:
+            df_pagina = df_pagina.assign(**{COLUNA_VALOR: formatar_brl(df_pagina[COLUNA_VALOR])})
+        return df_pagina
+
+
+def obter_grade(df: pd.DataFrame, chave: str = "grade_transacoes") -> GradeTransacoes:
+    """Grade guardada no session_state, recriada só quando as transações mudam"""
+    impressao = impressao_digital(df)
+    salvo = st.session_state.get(chave)
+    if salvo is not None and salvo[0] == impressao:
+        return salvo[1]
+    logger.info(f"Indexando {len(df)} transações para a grade")
+    grade = GradeTransacoes(df)
+    st.session_state[chave] = (impressao, grade)
+    return grade
+
+
+def exibir_grade_transacoes(df: pd.DataFrame, chave: str = "grade_transacoes"):
+    """
+    Tabela filtrável e paginada das transações: filtros, ordenação e paginação
+    rodam no servidor e só a página atual é enviada ao navegador.
+    """
+    grade = obter_grade(df, chave)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filtro_tipo = st.multiselect(
+            "Filtrar por Tipo:",
+            options=["Crédito", "Débito"],
+            default=["Crédito", "Débito"],
+            key=f"{chave}_tipo"
+        )
+    with col2:
+        filtro_categoria = st.multiselect(
+            "Filtrar por Categoria:",
+            options=grade.categorias,
+            default=[],
+            key=f"{chave}_categoria"
+        )
+    with col3:
+        filtro_texto = st.text_input("Buscar na descrição:", "", key=f"{chave}_texto")
+
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    ordenar_por = col1.selectbox("Ordenar por:", ORDENACOES, key=f"{chave}_ordem")
+    crescente = col2.radio("Ordem:", ["↑", "↓"], horizontal=True, key=f"{chave}_crescente") == "↑"
+    tamanho = col3.selectbox("Linhas por página:", TAMANHOS_PAGINA, index=1, key=f"{chave}_tamanho")
+
+    posicoes = grade.ordenar(grade.filtrar(filtro_tipo, filtro_categoria, filtro_texto), ordenar_por, crescente)
+    total_paginas = max(1, -(-len(posicoes) // tamanho))
+    # Sem max_value: a página guardada pode passar do fim quando o filtro muda
+    numero = col4.number_input("Página:", min_value=1, value=1, step=1, key=f"{chave}_pagina")
+    numero = min(int(numero), total_paginas)
+
+    st.dataframe(
+        grade.pagina(posicoes, numero, tamanho),
+        use_container_width=True,
+        column_config={
+            "Data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+            COLUNA_CENTAVOS: None
+        }
+    )
+
+    inicio = (numero - 1) * tamanho
+    st.info(
+        f"Exibindo {min(inicio + 1, len(posicoes))}–{min(inicio + tamanho, len(posicoes))} de "
+        f"{len(posicoes)} transações filtradas ({grade.total} no total) · página {numero} de {total_paginas}."
+    )
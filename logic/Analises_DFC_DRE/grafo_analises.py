@@ -0,0 +1,152 @@
+import os
+import hashlib
+import logging
+
+from extractors.utils import impressao_digital
+from logic.Analises_DFC_DRE.fluxo_caixa import calcular_fluxo_caixa
+from logic.Analises_DFC_DRE.exibir_dre import calcular_dre
+from logic.Analises_DFC_DRE.gerador_parecer import calcular_parecer
+from logic.Analises_DFC_DRE.analise_gpt import gerar_analise_gpt
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def impressao_arquivo(caminho: str) -> str:
+    """Impressão digital de um arquivo pelo caminho, tamanho e data de modificação"""
+    try:
+        info = os.stat(caminho)
+        return f"{caminho}|{info.st_size}|{info.st_mtime_ns}"
+    except OSError:
+        return f"{caminho}|ausente"
+
+
+def resultado_incompleto(valor) -> bool:
+    """Resultados no padrão {"status": ...} que não são sucesso interrompem as etapas seguintes"""
+    return isinstance(valor, dict) and valor.get("status", "sucesso") != "sucesso"
+
+
+class GrafoAnalises:
+    """
+    Grafo de etapas das análises (fluxo → DRE → parecer → GPT) com memoização.
+    Cada etapa declara as dependências (entradas, arquivos ou outras etapas) e só é
+    recalculada quando a impressão digital de alguma delas muda; o resultado fica
+    guardado na instância, que vive no session_state entre os reruns do Streamlit.
+    """
+
+    def __init__(self):
+        """Inicializa o grafo sem entradas nem etapas"""
+        self.entradas = {}
+        self.arquivos = {}
+        self.etapas = {}
+        self.resultados = {}
+
+    def etapa(self, nome: str, funcao, dependencias: list):
+        """
+        Registra uma etapa
+
+        Args:
+            nome: Nome da etapa
+            funcao: Função chamada com o valor de cada dependência, na ordem declarada
+            dependencias: Nomes de entradas, arquivos ou etapas
+        """
+        self.etapas[nome] = (funcao, list(dependencias))
+
+    def definir_entrada(self, nome: str, valor):
+        """Define (ou atualiza) uma entrada; a impressão digital é calculada uma vez aqui"""
+        self.entradas[nome] = (impressao_digital(valor), valor)
+
+    def definir_arquivo(self, nome: str, caminho: str):
+        """Define uma entrada de arquivo, verificada pela data de modificação a cada uso"""
+        self.arquivos[nome] = caminho
+
+    def chave(self, nome: str) -> str:
+        """Chave atual de uma entrada, arquivo ou etapa (a da etapa combina as das dependências)"""
+        if nome in self.entradas:
+            return self.entradas[nome][0]
+        if nome in self.arquivos:
+            return impressao_arquivo(self.arquivos[nome])
+        if nome not in self.etapas:
+            raise KeyError(f"Entrada ou etapa não definida no grafo: {nome}")
+        _, dependencias = self.etapas[nome]
+        partes = [nome] + [self.chave(dependencia) for dependencia in dependencias]
+        return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+    def valor(self, nome: str):
+        if nome in self.entradas:
+            return self.entradas[nome][1]
+        if nome in self.arquivos:
+            return self.arquivos[nome]
+        return self.obter(nome)
+
+    def obter(self, nome: str):
+        """
+        Retorna o resultado da etapa, recalculando-a (e às etapas anteriores)
+        só se alguma dependência mudou. Um resultado com status diferente de
+        "sucesso" numa dependência é devolvido sem executar a etapa;
+        resultados com status "erro" não ficam guardados.
+        """
+        chave = self.chave(nome)
+        salvo = self.resultados.get(nome)
+        if salvo is not None and salvo[0] == chave:
+            return salvo[1]
+
+        funcao, dependencias = self.etapas[nome]
+        argumentos = []
+        for dependencia in dependencias:
+            valor = self.valor(dependencia)
+            if resultado_incompleto(valor):
+                return valor
+            argumentos.append(valor)
+
+        logger.info(f"Calculando etapa {nome}")
+        resultado = funcao(*argumentos)
+        if not (isinstance(resultado, dict) and resultado.get("status") == "erro"):
+            self.resultados[nome] = (chave, resultado)
+        return resultado
+
+    def ultimo_resultado(self, nome: str):
+        """Último resultado guardado da etapa, mesmo que as entradas tenham mudado (ou None)"""
+        salvo = self.resultados.get(nome)
+        return salvo[1] if salvo is not None else None
+
+    def invalidar(self, nome: str = None):
+        """Descarta o resultado guardado de uma etapa (ou de todas)"""
+        if nome is None:
+            self.resultados = {}
+        else:
+            self.resultados.pop(nome, None)
+
+
+def criar_grafo_analises(
+    path_faturamento="./logic/CSVs/faturamentos.csv",
+    path_estoque="./logic/CSVs/estoques.csv",
+    path_plano="./logic/CSVs/plano_de_contas.csv"
+) -> GrafoAnalises:
+    """
+    Monta o grafo da Pré-Análise. Entradas definidas pela página: "transacoes"
+    (transações categorizadas), "periodo_parecer" e "descricao_empresa".
+    """
+    grafo = GrafoAnalises()
+    grafo.definir_arquivo("faturamento", path_faturamento)
+    grafo.definir_arquivo("estoque", path_estoque)
+    grafo.definir_arquivo("plano", path_plano)
+
+    grafo.etapa("fluxo", calcular_fluxo_caixa, ["transacoes", "faturamento", "estoque", "plano"])
+    grafo.etapa(
+        "dre",
+        lambda fluxo, plano: calcular_dre(fluxo["df_final"], plano),
+        ["fluxo", "plano"]
+    )
+    grafo.etapa(
+        "parecer",
+        lambda fluxo, periodo: calcular_parecer(fluxo["df_final"], periodo),
+        ["fluxo", "periodo_parecer"]
+    )
+    grafo.etapa(
+        "analise_gpt",
+        lambda dre, fluxo, descricao: gerar_analise_gpt(dre["dre"], fluxo["df_final"], descricao),
+        ["dre", "fluxo", "descricao_empresa"]
+    )
+    return grafo
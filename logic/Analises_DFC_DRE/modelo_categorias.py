@@ -0,0 +1,268 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMINHO_MODELO = os.getenv("MODELO_CATEGORIAS", "./data/modelo_categorias.npz")
+# Sugestões abaixo desta confiança não são aceitas automaticamente
+CONFIANCA_MINIMA = float(os.getenv("CATEGORIZACAO_CONFIANCA_MINIMA", "0.5"))
+
+# Versão do formato do modelo: mudar invalida os artefatos já salvos
+VERSAO_MODELO = "1"
+NGRAMAS = (3, 4, 5)
+BITS_HASH = 16  # 65.536 posições por Tipo
+MAX_CARACTERES = 64
+# Descrições pontuadas por vez (limita a memória da pontuação em lote)
+TAMANHO_LOTE = 2_000
+CATEGORIAS_IGNORADAS = {"Sem Identificação"}
+
+
+def normalizar_textos(descricoes) -> list:
+    """Minúsculas, espaços simples, dígitos trocados por 0 (datas e números variam) e bordas marcadas"""
+    textos = (
+        pd.Series(descricoes, dtype=object).astype(str)
+        .str.lower()
+        .str.replace(r"\d", "0", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.slice(0, MAX_CARACTERES - 2)
+    )
+    return (" " + textos + " ").tolist()
+
+
+def ngramas_hash(textos: list):
+    """
+    N-gramas de caracteres de todas as descrições de uma vez, como triplas
+    (linha, posição no hash, contagem). Cada texto vira uma linha de códigos
+    Unicode e os n-gramas são hashes polinomiais calculados com numpy.
+    """
+    if not textos:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio, vazio
+    largura = max(max(len(t) for t in textos), max(NGRAMAS))
+    codigos = np.array(textos, dtype=f"<U{largura}").view(np.uint32).reshape(len(textos), largura).astype(np.uint64)
+
+    linhas, posicoes = [], []
+    for n in NGRAMAS:
+        janelas = largura - n + 1
+        h = np.zeros((len(textos), janelas), dtype=np.uint64)
+        for k in range(n):
+            h = h * np.uint64(1_000_003) + codigos[:, k:k + janelas]
+        # Hash multiplicativo (Fibonacci) + tamanho do n-grama, nos BITS_HASH bits mais altos
+        h = (h + np.uint64(n)) * np.uint64(0x9E3779B97F4A7C15) >> np.uint64(64 - BITS_HASH)
+        validas = codigos[:, n - 1:n - 1 + janelas] != 0
+        linha, coluna = np.nonzero(validas)
+        linhas.append(linha)
+        posicoes.append(h[linha, coluna].astype(np.int64))
+
+    chaves = np.concatenate(linhas).astype(np.int64) << BITS_HASH | np.concatenate(posicoes)
+    chaves, contagens = np.unique(chaves, return_counts=True)
+    return chaves >> BITS_HASH, chaves & ((1 << BITS_HASH) - 1), contagens
+
+
+def vetorizar(textos: list, idf: np.ndarray):
+    """TF-IDF (tf sublinear) normalizado por linha, como triplas (linha, posição, peso)"""
+    linhas, posicoes, contagens = ngramas_hash(textos)
+    pesos = (1 + np.log(contagens)) * idf[posicoes]
+    normas = np.sqrt(np.bincount(linhas, weights=pesos ** 2, minlength=len(textos)))
+    pesos = pesos / np.where(normas > 0, normas, 1)[linhas]
+    return linhas, posicoes, pesos
+
+
+class ModeloCategorias:
+    """
+    Classificador local de descrições: n-gramas de caracteres com TF-IDF e um
+    centroide por categoria, separado por Tipo (Crédito/Débito). A previsão é a
+    categoria de maior similaridade de cosseno, e a confiança é essa similaridade.
+    """
+
+    def __init__(self, impressao: str = ""):
+        """Modelo vazio; preencha com treinar ou carregar"""
+        self.impressao = impressao
+        self.tipos = {}  # tipo -> {"categorias": [...], "idf": array, "centroides": array K x D}
+
+    def treinar(self, df_rotulos: pd.DataFrame, df_plano: pd.DataFrame = None):
+        """
+        Treina um modelo por Tipo com as descrições já categorizadas e os nomes das
+        categorias do plano de contas; só entram categorias do plano daquele Tipo.
+
+        Args:
+            df_rotulos: DataFrame com Descricao, Tipo e Categoria (categorias_salvas.csv)
+            df_plano: Plano de contas (Categoria, Tipo), opcional
+        """
+        rotulos = df_rotulos.dropna(subset=["Descricao", "Tipo", "Categoria"])
+        rotulos = rotulos[~rotulos["Categoria"].isin(CATEGORIAS_IGNORADAS)][["Descricao", "Tipo", "Categoria"]]
+        if df_plano is not None and not df_plano.empty:
+            nomes = df_plano[["Categoria", "Tipo"]].dropna().assign(Descricao=lambda d: d["Categoria"])
+            rotulos = pd.concat([rotulos, nomes[["Descricao", "Tipo", "Categoria"]]], ignore_index=True)
+
+        for tipo, grupo in rotulos.groupby("Tipo", sort=False):
+            if df_plano is not None and not df_plano.empty:
+                permitidas = set(df_plano.loc[df_plano["Tipo"] == tipo, "Categoria"])
+                grupo = grupo[grupo["Categoria"].isin(permitidas)]
+            if grupo.empty:
+                continue
+
+            textos = normalizar_textos(grupo["Descricao"])
+            linhas, posicoes, _ = ngramas_hash(textos)
+            # Frequência em documentos: cada (linha, posição) aparece uma vez nas triplas
+            frequencia = np.bincount(posicoes, minlength=1 << BITS_HASH)
+            idf = np.log((1 + len(textos)) / (1 + frequencia)) + 1
+
+            linhas, posicoes, pesos = vetorizar(textos, idf)
+            categorias, codigos = np.unique(grupo["Categoria"].to_numpy(dtype=str), return_inverse=True)
+            centroides = np.zeros((len(categorias), 1 << BITS_HASH), dtype=np.float64)
+            np.add.at(centroides, (codigos[linhas], posicoes), pesos)
+            centroides /= np.maximum(np.linalg.norm(centroides, axis=1, keepdims=True), 1e-12)
+
+            self.tipos[tipo] = {
+                "categorias": categorias.tolist(),
+                "idf": idf.astype(np.float32),
+                "centroides": centroides.astype(np.float32),
+            }
+            logger.info(f"Modelo de categorias ({tipo}): {len(grupo)} exemplos, {len(categorias)} categorias")
+        return self
+
+    def prever(self, descricoes, tipo: str) -> pd.DataFrame:
+        """
+        Categoria prevista e confiança (0 a 1) de cada descrição, pontuadas em lote.
+        Sem modelo para o Tipo, a categoria fica vazia e a confiança 0.
+        """
+        descricoes = pd.Series(descricoes, dtype=object)
+        resultado = pd.DataFrame({"Sugestão": "", "Confiança": 0.0}, index=descricoes.index)
+        modelo = self.tipos.get(tipo)
+        if modelo is None or descricoes.empty:
+            return resultado
+
+        # Cada texto distinto é pontuado uma vez
+        unicas, inverso = np.unique(normalizar_textos(descricoes), return_inverse=True)
+        centroides, idf = modelo["centroides"], modelo["idf"]
+        melhores = np.zeros(len(unicas), dtype=np.int64)
+        confiancas = np.zeros(len(unicas))
+        for inicio in range(0, len(unicas), TAMANHO_LOTE):
+            lote = unicas[inicio:inicio + TAMANHO_LOTE].tolist()
+            linhas, posicoes, pesos = vetorizar(lote, idf)
+            pesos = pesos.astype(np.float32)
+            # Uma categoria por vez sobre as triplas: a memória extra é uma linha de
+            # n-gramas do lote, não categorias x n-gramas
+            pontuacoes = np.empty((len(centroides), len(lote)))
+            for k, centroide in enumerate(centroides):
+                pontuacoes[k] = np.bincount(linhas, weights=centroide[posicoes] * pesos, minlength=len(lote))
+            melhores[inicio:inicio + len(lote)] = pontuacoes.argmax(axis=0)
+            confiancas[inicio:inicio + len(lote)] = pontuacoes.max(axis=0)
+
+        categorias = np.array(modelo["categorias"], dtype=object)
+        resultado["Sugestão"] = categorias[melhores[inverso]]
+        resultado["Confiança"] = np.clip(confiancas[inverso], 0, 1).round(3)
+        return resultado
+
+    def salvar(self, caminho: str):
+        """Grava o modelo em um .npz (metadados em JSON + arrays por Tipo)"""
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        tipos = list(self.tipos)
+        metadados = {
+            "versao": VERSAO_MODELO,
+            "impressao": self.impressao,
+            "tipos": tipos,
+            "categorias": [self.tipos[t]["categorias"] for t in tipos],
+        }
+        arrays = {}
+        for i, tipo in enumerate(tipos):
+            arrays[f"idf_{i}"] = self.tipos[tipo]["idf"]
+            arrays[f"centroides_{i}"] = self.tipos[tipo]["centroides"]
+        with open(caminho, "wb") as arquivo:
+            np.savez_compressed(arquivo, metadados=np.array(json.dumps(metadados, ensure_ascii=False)), **arrays)
+
+    @classmethod
+    def carregar(cls, caminho: str):
+        """Lê um modelo salvo; None se o arquivo não existe ou é de outra versão"""
+        try:
+            with np.load(caminho, allow_pickle=False) as dados:
+                metadados = json.loads(str(dados["metadados"]))
+                if metadados.get("versao") != VERSAO_MODELO:
+                    return None
+                modelo = cls(metadados["impressao"])
+                for i, tipo in enumerate(metadados["tipos"]):
+                    modelo.tipos[tipo] = {
+                        "categorias": metadados["categorias"][i],
+                        "idf": dados[f"idf_{i}"],
+                        "centroides": dados[f"centroides_{i}"],
+                    }
+                return modelo
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Modelo de categorias ilegível em {caminho}: {e}")
+            return None
+
+
+def impressao_rotulos(*caminhos) -> str:
+    """Impressão digital (SHA-256) do conteúdo dos arquivos de rótulos e da versão do modelo"""
+    h = hashlib.sha256(VERSAO_MODELO.encode("utf-8"))
+    for caminho in caminhos:
+        try:
+            with open(caminho, "rb") as arquivo:
+                h.update(arquivo.read())
+        except OSError:
+            h.update(b"ausente")
+    return h.hexdigest()
+
+
+_modelos = {}
+_lock = threading.Lock()
+
+
+def carregar_modelo_categorias(
+    categorias_salvas_path: str = "./logic/CSVs/categorias_salvas.csv",
+    plano_path: str = "./logic/CSVs/plano_de_contas.csv",
+    caminho_modelo: str = CAMINHO_MODELO
+) -> ModeloCategorias:
+    """
+    Modelo treinado com as categorias salvas e o plano de contas.
+    Em memória, vale enquanto os arquivos não mudam; em disco, o artefato é
+    reaproveitado se foi treinado com o mesmo conteúdo. Só há novo treino
+    quando rótulos novos são salvos (ou o plano muda).
+    """
+    assinatura = []
+    for caminho in (categorias_salvas_path, plano_path):
+        try:
+            info = os.stat(caminho)
+            assinatura.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            assinatura.append(None)
+    chave = (categorias_salvas_path, plano_path, caminho_modelo)
+
+    with _lock:
+        salvo = _modelos.get(chave)
+        if salvo is not None and salvo[0] == assinatura:
+            return salvo[1]
+
+        impressao = impressao_rotulos(categorias_salvas_path, plano_path)
+        modelo = ModeloCategorias.carregar(caminho_modelo)
+        if modelo is None or modelo.impressao != impressao:
+            try:
+                df_rotulos = pd.read_csv(categorias_salvas_path)
+            except Exception:
+                df_rotulos = pd.DataFrame(columns=["Descricao", "Tipo", "Categoria"])
+            try:
+                df_plano = pd.read_csv(plano_path)
+            except Exception:
+                df_plano = None
+            modelo = ModeloCategorias(impressao).treinar(df_rotulos, df_plano)
+            try:
+                modelo.salvar(caminho_modelo)
+            except OSError as e:
+                logger.warning(f"Não foi possível salvar o modelo de categorias em {caminho_modelo}: {e}")
+
+        _modelos[chave] = (assinatura, modelo)
+        return modelo
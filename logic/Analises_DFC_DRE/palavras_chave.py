@@ -0,0 +1,139 @@
+import os
+import logging
+import threading
+from collections import deque
+
+import pandas as pd
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMINHO_PALAVRAS = "./logic/CSVs/palavras_chave.csv"
+
+
+class AutomatoPalavras:
+    """
+    Autômato de Aho-Corasick para procurar várias palavras-chave de uma vez.
+    A descrição é percorrida uma única vez, caractere a caractere, qualquer que seja
+    o número de palavras; vence a palavra que vem primeiro na lista (mesma regra do
+    laço antigo sobre o CSV: a primeira palavra contida na descrição).
+    """
+
+    def __init__(self, palavras: list):
+        """
+        Monta o autômato (sem diferenciar maiúsculas)
+
+        Args:
+            palavras: Palavras-chave na ordem de prioridade
+        """
+        self.total = len(palavras)
+        sem_saida = self.total  # prioridade "infinita": nenhuma palavra termina no estado
+        self.transicoes = [{}]
+        self.saida = [sem_saida]
+
+        for prioridade, palavra in enumerate(palavras):
+            estado = 0
+            for caractere in palavra.lower():
+                proximo = self.transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes[estado][caractere] = proximo
+                    self.transicoes.append({})
+                    self.saida.append(sem_saida)
+                estado = proximo
+            if estado:
+                self.saida[estado] = min(self.saida[estado], prioridade)
+
+        # Ligações de falha em largura; cada estado herda a melhor saída do seu sufixo
+        self.falha = [0] * len(self.transicoes)
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, filho in self.transicoes[estado].items():
+                fila.append(filho)
+                sufixo = self.falha[estado]
+                while sufixo and caractere not in self.transicoes[sufixo]:
+                    sufixo = self.falha[sufixo]
+                destino = self.transicoes[sufixo].get(caractere, 0) if estado else 0
+                self.falha[filho] = destino
+                self.saida[filho] = min(self.saida[filho], self.saida[destino])
+
+    def buscar(self, texto: str):
+        """Prioridade (posição na lista) da primeira palavra contida no texto, ou None"""
+        transicoes, falha, saida = self.transicoes, self.falha, self.saida
+        melhor = self.total
+        estado = 0
+        for caractere in texto.lower():
+            while estado and caractere not in transicoes[estado]:
+                estado = falha[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            if saida[estado] < melhor:
+                melhor = saida[estado]
+                if melhor == 0:
+                    break
+        return melhor if melhor < self.total else None
+
+
+class ClassificadorPalavras:
+    """
+    Palavras-chave do CSV (PalavraChave, Tipo, Categoria) com um autômato por Tipo.
+    """
+
+    def __init__(self, df_palavras: pd.DataFrame):
+        """
+        Monta os autômatos, mantendo a ordem do CSV como prioridade dentro de cada Tipo
+
+        Args:
+            df_palavras: DataFrame com as colunas PalavraChave, Tipo e Categoria
+        """
+        df_palavras = df_palavras.dropna(subset=["PalavraChave"])
+        df_palavras = df_palavras[df_palavras["PalavraChave"].astype(str).str.len() > 0]
+        self.automatos = {}
+        self.categorias = {}
+        for tipo, grupo in df_palavras.groupby("Tipo", sort=False):
+            self.automatos[tipo] = AutomatoPalavras(grupo["PalavraChave"].astype(str).tolist())
+            self.categorias[tipo] = grupo["Categoria"].tolist()
+
+    def categoria(self, descricao: str, tipo: str) -> str:
+        """Categoria da primeira palavra-chave do tipo contida na descrição ("" se nenhuma)"""
+        automato = self.automatos.get(tipo)
+        if automato is None:
+            return ""
+        prioridade = automato.buscar(str(descricao))
+        return self.categorias[tipo][prioridade] if prioridade is not None else ""
+
+    def categorizar(self, descricoes, tipo: str) -> list:
+        """Categoria de cada descrição (cada texto distinto é procurado uma vez)"""
+        unicas = {d: self.categoria(d, tipo) for d in dict.fromkeys(descricoes)}
+        return [unicas[d] for d in descricoes]
+
+
+_classificadores = {}
+_lock = threading.Lock()
+
+
+def carregar_classificador_palavras(caminho: str = CAMINHO_PALAVRAS) -> ClassificadorPalavras:
+    """
+    Classificador do CSV de palavras-chave, montado uma vez por processo e
+    refeito só quando o arquivo muda (data de modificação ou tamanho).
+    """
+    try:
+        info = os.stat(caminho)
+        assinatura = (info.st_mtime_ns, info.st_size)
+    except OSError:
+        assinatura = None
+
+    with _lock:
+        salvo = _classificadores.get(caminho)
+        if salvo is not None and salvo[0] == assinatura:
+            return salvo[1]
+
+        try:
+            df_palavras = pd.read_csv(caminho)
+        except Exception:
+            df_palavras = pd.DataFrame(columns=["PalavraChave", "Tipo", "Categoria"])
+        classificador = ClassificadorPalavras(df_palavras)
+        logger.info(f"Palavras-chave carregadas de {caminho}: {len(df_palavras)}")
+        _classificadores[caminho] = (assinatura, classificador)
+        return classificador
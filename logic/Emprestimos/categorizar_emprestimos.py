@@ -3,6 +3,8 @@ import streamlit as st
 import os
 import re
 from typing import Tuple, List, Dict
+from extractors.moeda import formatar_brl
+from logic.Analises_DFC_DRE.categorias_salvas import carregar_indice_categorias
 
 def categorizar_emprestimos(
     df_emprestimos,
@@ -27,17 +29,22 @@ def categorizar_emprestimos(
         st.warning("Nenhuma transação de empréstimo para categorizar.")
         return df_emprestimos, pd.DataFrame()
     
-    # Carregar categorias salvas
-    if os.path.exists(categorias_salvas_path):
-        df_categorias_salvas = pd.read_csv(categorias_salvas_path)
-    else:
-        df_categorias_salvas = pd.DataFrame(columns=["Descricao", "Categoria"])
-    
-    # Agrupar descrições únicas
+    # Agrupar descrições únicas numa só passada: quantidade, total, valores já
+    # formatados (em módulo; textos não numéricos ficam como vieram) e contrato
+    numeros = pd.to_numeric(df_emprestimos["Valor (R$)"], errors="coerce")
+    textos = formatar_brl(numeros.abs()).where(numeros.notna(), df_emprestimos["Valor (R$)"].astype(str))
+    agregacoes = {
+        "Quantidade": ("Valor (R$)", "count"),
+        "Total": ("Valor (R$)", "sum"),
+        "Valores": ("__texto", " - ".join),
+    }
+    if "Contrato" in df_emprestimos.columns:
+        agregacoes["Contrato"] = ("Contrato", "first")
     df_desc = (
         df_emprestimos
+        .assign(__texto=textos)
         .groupby("Descrição", as_index=False)
-        .agg(Quantidade=("Valor (R$)", "count"), Total=("Valor (R$)", "sum"))
+        .agg(**agregacoes)
     )
     df_desc["Categoria"] = ""
     
@@ -96,18 +103,12 @@ def categorizar_emprestimos(
         if st.button("Executar Categorização Automática", key=f"{prefixo_key}_auto_cat"):
             total_categorizadas = 0
             
-            # Aplicar categorias salvas
-            for idx, row in df_desc.iterrows():
-                desc = row["Descrição"]
-                if pd.isnull(row["Categoria"]) or row["Categoria"] == "":
-                    # Verificar nas categorias salvas
-                    categoria_salva = df_categorias_salvas[
-                        df_categorias_salvas["Descricao"] == desc
-                    ]["Categoria"].values
-                    
-                    if len(categoria_salva) > 0:
-                        df_desc.at[idx, "Categoria"] = categoria_salva[0]
-                        total_categorizadas += 1
+            # Aplicar categorias salvas (um único map pelo índice de descrições)
+            pendentes = df_desc["Categoria"].isnull() | (df_desc["Categoria"] == "")
+            salvas = carregar_indice_categorias(categorias_salvas_path).resolver(df_desc["Descrição"])
+            aplicar = pendentes & salvas.notna()
+            df_desc.loc[aplicar, "Categoria"] = salvas[aplicar]
+            total_categorizadas += int(aplicar.sum())
             
             # Aplicar palavras-chave
             for idx, row in df_desc.iterrows():
@@ -168,26 +169,13 @@ def categorizar_emprestimos(
         
         for idx, row in itens_nao_categorizados.iterrows():
             desc = row["Descrição"]
-            valores = df_emprestimos[df_emprestimos["Descrição"] == desc]["Valor (R$)"].tolist()
-            
-            # Formatar valores para exibição
-            valores_formatados = []
-            for v in valores:
-                if isinstance(v, (int, float)):
-                    valores_formatados.append(f"R$ {abs(v):.2f}".replace(".", ","))
-                else:
-                    valores_formatados.append(str(v))
-            
-            valores_texto = " - ".join(valores_formatados)
             
             # Exibir informações do contrato, se disponível
             contrato = ""
-            if "Contrato" in df_emprestimos.columns:
-                contratos = df_emprestimos[df_emprestimos["Descrição"] == desc]["Contrato"].unique()
-                if len(contratos) > 0 and pd.notna(contratos[0]):
-                    contrato = f" | Contrato: {contratos[0]}"
+            if pd.notna(row.get("Contrato")):
+                contrato = f" | Contrato: {row['Contrato']}"
             
-            label = f"📌 {desc}{contrato} — {row['Quantidade']}x — Total: {valores_texto}"
+            label = f"📌 {desc}{contrato} — {row['Quantidade']}x — Total: {row['Valores']}"
             
             categoria_escolhida = st.selectbox(
                 label,
@@ -230,6 +218,10 @@ def categorizar_emprestimos(
     
     # Salvar categorias
     if st.button("💾 Salvar Categorias", key=f"btn_salvar_{prefixo_key}"):
+        if os.path.exists(categorias_salvas_path):
+            df_categorias_salvas = pd.read_csv(categorias_salvas_path)
+        else:
+            df_categorias_salvas = pd.DataFrame(columns=["Descricao", "Categoria"])
         novas = pd.DataFrame({
             "Descricao": df_desc["Descrição"],
             "Categoria": df_desc["Categoria"]
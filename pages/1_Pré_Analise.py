@@ -1,21 +1,23 @@
 import streamlit as st
 import pandas as pd
-import io
-import os
 from datetime import datetime
 
 # Módulos do projeto
-from extractors.pdf_extractor import extrair_lancamentos_pdf
-from extractors.txt_extractor import extrair_lancamentos_txt
-from extractors.ofx_extractor import extrair_lancamentos_ofx
-from logic.Analises_DFC_DRE.deduplicator import remover_duplicatas
+from extractors.tarefa_ingestao import TarefaIngestao, INTERVALO_ATUALIZACAO
+from extractors.indice_extratos import IndiceExtratos
+from extractors.armazem_transacoes import ArmazemTransacoes
+from extractors.moeda import COLUNA_VALOR, COLUNA_CENTAVOS, converter_brl, formatar_brl, centavos_transacoes, centavos_para_reais
+from logic.Analises_DFC_DRE.deduplicator import DeduplicacaoIncremental, deduplicar
 from logic.Analises_DFC_DRE.categorizador import categorizar_transacoes
-from logic.Analises_DFC_DRE.fluxo_caixa import exibir_fluxo_caixa
+from logic.Analises_DFC_DRE.fluxo_caixa import renderizar_fluxo_caixa
 from logic.Analises_DFC_DRE.faturamento import coletar_faturamentos
 from logic.Analises_DFC_DRE.estoque import coletar_estoques
-from logic.Analises_DFC_DRE.gerador_parecer import gerar_parecer_automatico
-from logic.Analises_DFC_DRE.exibir_dre import exibir_dre
-from logic.Analises_DFC_DRE.analise_gpt import analisar_dfs_com_gpt
+from logic.Analises_DFC_DRE.gerador_parecer import selecionar_periodo_parecer, exibir_parecer
+from logic.Analises_DFC_DRE.exibir_dre import renderizar_dre
+from logic.Analises_DFC_DRE.analise_gpt import exibir_analise_gpt
+from logic.Analises_DFC_DRE.grafo_analises import criar_grafo_analises
+from logic.Analises_DFC_DRE.exportacao import exibir_download
+from logic.Analises_DFC_DRE.grade_transacoes import exibir_grade_transacoes
 
 # Configuração da página
 st.set_page_config(
@@ -24,111 +26,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Funções auxiliares
-def formatar_valor_br(valor):
-    """Formata um valor numérico para o formato brasileiro (R$)"""
-    if isinstance(valor, (int, float)):
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    elif isinstance(valor, str):
-        try:
-            valor_num = float(valor.replace(".", "").replace(",", "."))
-            return f"R$ {valor_num:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except:
-            return valor
-    return valor
-
-def converter_para_float(valor_str):
-    """Converte uma string de valor BR para float"""
-    if isinstance(valor_str, (int, float)):
-        return float(valor_str)
-    try:
-        return float(str(valor_str).replace("R$", "").replace(".", "").replace(",", ".").strip())
-    except:
-        return 0.0
-
-def processar_arquivo(file):
-    """Processa um arquivo e retorna os dataframes extraídos"""
-    nome = file.name
-    tipo = os.path.splitext(nome)[-1].lower()
-    
-    try:
-        if tipo == ".pdf":
-            resultado = extrair_lancamentos_pdf(file, nome)
-            
-            if isinstance(resultado, tuple) and resultado[0] == "debug":
-                return {
-                    "status": "debug",
-                    "mensagem": f"Texto da primeira página do PDF ({nome}):",
-                    "conteudo": resultado[1],
-                    "tipo": "pdf"
-                }
-            
-            df_resumo = pd.DataFrame(resultado["resumo"])
-            df_trans = pd.DataFrame(resultado["transacoes"])
-            
-            return {
-                "status": "sucesso",
-                "resumo": df_resumo,
-                "transacoes": df_trans,
-                "mensagem": f"📥 {nome} → PDF → {len(df_trans)} transações, {len(df_resumo)} resumos",
-                "tipo": "pdf"
-            }
-            
-        elif tipo == ".txt":
-            df_trans = pd.DataFrame(extrair_lancamentos_txt(file, nome))
-            df_trans["Arquivo"] = nome
-            
-            return {
-                "status": "sucesso",
-                "transacoes": df_trans,
-                "mensagem": f"📥 {nome} → TXT → {len(df_trans)} transações",
-                "tipo": "txt"
-            }
-            
-        elif tipo in [".xls", ".xlsx"]:
-            df = pd.read_excel(file)
-            df["Arquivo"] = nome
-            
-            return {
-                "status": "sucesso",
-                "transacoes": df,
-                "mensagem": f"📥 {nome} → Excel → {len(df)} linhas",
-                "tipo": "excel"
-            }
-            
-        elif tipo == ".ofx":
-            transacoes, encoding = extrair_lancamentos_ofx(file, nome)
-            
-            if isinstance(transacoes, str) or not transacoes:
-                return {
-                    "status": "erro",
-                    "mensagem": f"❌ Erro ao processar {nome}: {encoding}",
-                    "tipo": "ofx"
-                }
-                
-            df = pd.DataFrame(transacoes)
-            
-            return {
-                "status": "sucesso",
-                "transacoes": df,
-                "mensagem": f"📥 {nome} → OFX → {len(df)} transações (codificação: {encoding})",
-                "tipo": "ofx"
-            }
-            
-        else:
-            return {
-                "status": "erro",
-                "mensagem": f"⚠️ Tipo de arquivo não suportado: {nome}",
-                "tipo": "desconhecido"
-            }
-            
-    except Exception as e:
-        return {
-            "status": "erro",
-            "mensagem": f"❌ Erro ao processar {nome}: {str(e)}",
-            "tipo": tipo.replace(".", "")
-        }
-
 # Inicialização do estado da aplicação
 if "uploader_key" not in st.session_state:
     st.session_state.uploader_key = 0
@@ -170,18 +67,17 @@ with st.sidebar:
         
         # Estatísticas básicas se houver dados
         if st.session_state.df_transacoes_total is not None and "Valor (R$)" in st.session_state.df_transacoes_total.columns:
-            df = st.session_state.df_transacoes_total.copy()
-            df["Valor_Num"] = df["Valor (R$)"].apply(converter_para_float)
+            centavos = centavos_transacoes(st.session_state.df_transacoes_total).fillna(0)
             
-            creditos = df[df["Valor_Num"] > 0]["Valor_Num"].sum()
-            debitos = abs(df[df["Valor_Num"] <= 0]["Valor_Num"].sum())
+            creditos = centavos[centavos > 0].sum() / 100
+            debitos = abs(centavos[centavos <= 0].sum()) / 100
             
             col1, col2 = st.columns(2)
-            col1.metric("Total Créditos", formatar_valor_br(creditos))
-            col2.metric("Total Débitos", formatar_valor_br(debitos))
+            col1.metric("Total Créditos", formatar_brl(creditos))
+            col2.metric("Total Débitos", formatar_brl(debitos))
             
-            st.metric("Saldo", formatar_valor_br(creditos - debitos), 
-                     delta=formatar_valor_br(creditos - debitos))
+            st.metric("Saldo", formatar_brl(creditos - debitos), 
+                     delta=formatar_brl(creditos - debitos))
 
 # Descrição principal
 st.markdown("""
@@ -205,77 +101,227 @@ with st.expander("📎 Upload de Arquivos", expanded=True):
         key=f"uploader_{st.session_state.uploader_key}"
     )
 
-    col1, col2 = st.columns([1, 4])
-    processar = col1.button("🔄 Processar Arquivos", use_container_width=True)
+    empresa = st.text_input(
+        "🏢 Empresa / cliente",
+        help="Quando informada, as transações importadas ficam salvas no armazém local e a análise pode ser reaberta depois"
+    ).strip()
+
+    incremental = st.checkbox(
+        "➕ Importação incremental (OFX)",
+        help="Acrescenta aos dados atuais apenas as transações OFX ainda não importadas para cada conta (pelo FITID). "
+             "Com empresa informada, vale também o que já foi salvo no armazém dessa empresa"
+    )
+
+    aproximadas = st.checkbox(
+        "🔍 Remover também duplicatas aproximadas",
+        help="Mesmo valor, datas próximas e descrição parecida em arquivos diferentes (ex.: o mesmo lançamento no PDF e no OFX)"
+    )
+
+    col1, col2, col3 = st.columns([1, 1, 3])
+    processar = col1.button(
+        "🔄 Processar Arquivos",
+        use_container_width=True,
+        disabled=st.session_state.get("tarefa_ingestao") is not None
+    )
     limpar = col2.button("🧹 Limpar Tudo", use_container_width=True)
+    if col3.button(
+        "🗑️ Esquecer histórico de importações OFX",
+        disabled=not empresa,
+        help="Apaga o histórico de FITIDs importados da empresa informada"
+    ):
+        IndiceExtratos(empresa=empresa).limpar()
+        st.info(f"Histórico de importações OFX de {empresa} apagado.")
+
+# Reabrir transações já importadas, direto do armazém local
+armazem = ArmazemTransacoes()
+empresas_salvas = armazem.empresas()
+if empresas_salvas:
+    with st.expander("📂 Abrir análise salva", expanded=False):
+        empresa_salva = st.selectbox("Empresa", empresas_salvas)
+        inicio_salvo, fim_salvo = armazem.periodo(empresa_salva)
+        if inicio_salvo is None:
+            # Só transações sem data: não há período para escolher
+            st.info("Essa empresa só tem transações sem data salvas; todas serão abertas para revisão.")
+            data_inicio = data_fim = None
+        else:
+            col1, col2 = st.columns(2)
+            data_inicio = col1.date_input("De", value=inicio_salvo, format="DD/MM/YYYY")
+            data_fim = col2.date_input("Até", value=fim_salvo, format="DD/MM/YYYY")
+        contas_salvas = armazem.contas(empresa_salva)
+        contas_escolhidas = st.multiselect("Contas (vazio = todas)", contas_salvas) if contas_salvas else []
+
+        if st.button("📂 Abrir", disabled=st.session_state.get("tarefa_ingestao") is not None):
+            df_salvo = armazem.consultar(empresa_salva, data_inicio, data_fim, contas_escolhidas)
+            if df_salvo.empty:
+                st.warning("Nenhuma transação salva nesse período.")
+            else:
+                # O armazém guarda cada arquivo como foi importado (o mesmo período em PDF e OFX,
+                # tarifas iguais no dia): a análise reaberta passa pela mesma deduplicação da importação
+                carregadas = len(df_salvo)
+                df_salvo, relatorio_salvo = deduplicar(df_salvo, aproximadas=aproximadas)
+                st.session_state.df_transacoes_total = df_salvo.reset_index(drop=True)
+                st.session_state.df_resumo_total = None
+                st.session_state.relatorio_duplicatas = relatorio_salvo
+                st.session_state.processamento_concluido = True
+                if data_inicio and data_fim:
+                    periodo_salvo = f"{data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}"
+                elif data_inicio or data_fim:
+                    periodo_salvo = f"{'desde' if data_inicio else 'até'} {(data_inicio or data_fim):%d/%m/%Y}"
+                else:
+                    periodo_salvo = "todo o período"
+                st.session_state.log_uploads = [
+                    f"📂 {carregadas} transações de {empresa_salva} carregadas do armazém ({periodo_salvo}), "
+                    f"{len(relatorio_salvo)} duplicatas removidas"
+                ]
+                sem_data = int(df_salvo["Data"].isna().sum())
+                if sem_data:
+                    st.session_state.log_uploads.append(
+                        f"⚠️ {sem_data} transações sem data (mês/ano não identificado na importação) incluídas para revisão"
+                    )
 
-# Processamento dos arquivos
+# Processamento dos arquivos: roda em segundo plano e a página mostra o que já ficou pronto
 if processar and uploaded_files:
-    with st.spinner("Processando arquivos... ⏳"):
-        st.session_state.log_uploads = []
-        lista_resumos = []
-        lista_transacoes = []
+    arquivos = [(file.name, file.getvalue()) for file in uploaded_files]
+    st.session_state.log_uploads = []
+    st.session_state.resultados_ingestao = []
+    # Na importação incremental, os dados já carregados entram primeiro na consolidação
+    st.session_state.df_base_ingestao = st.session_state.df_transacoes_total if incremental else None
+    st.session_state.indice_ingestao = IndiceExtratos(empresa=empresa or None) if incremental else None
+    st.session_state.consolidacao_ingestao = DeduplicacaoIncremental(aproximadas=aproximadas)
+    if st.session_state.df_base_ingestao is not None:
+        st.session_state.consolidacao_ingestao.acrescentar(st.session_state.df_base_ingestao, ordem=-1)
+    st.session_state.processamento_concluido = False
+    st.session_state.empresa_ingestao = empresa or None
+    st.session_state.tarefa_ingestao = TarefaIngestao(arquivos).iniciar()
+
+def consolidar_ingestao(novos, finalizada):
+    """
+    Acrescenta à consolidação só os arquivos concluídos desde o último rerun: cada um é
+    deduplicado contra o que já foi consolidado, sem refazer os anteriores. Ao fim da
+    tarefa, aplica o passe aproximado (se pedido) uma única vez.
+    """
+    consolidacao = st.session_state.consolidacao_ingestao
+    for resultado in novos:
+        if resultado["status"] != "sucesso" or "transacoes" not in resultado:
+            continue
+        df_novo = resultado["transacoes"]
+        # Valor (R$) fica numérico na sessão (convertido uma vez, aqui, se alguma
+        # planilha trouxe texto); a formatação acontece só na exibição
+        if COLUNA_VALOR in df_novo.columns:
+            df_novo = df_novo.assign(**{COLUNA_VALOR: converter_brl(df_novo[COLUNA_VALOR])})
+        consolidacao.acrescentar(df_novo, ordem=resultado["posicao"])
+    
+    # Resumos: poucos por arquivo, concatenados na ordem do upload
+    resultados = sorted(
+        (r for r in st.session_state.resultados_ingestao if r["status"] == "sucesso"),
+        key=lambda r: r["posicao"]
+    )
+    lista_resumos = [r["resumo"] for r in resultados if "resumo" in r and not r["resumo"].empty]
+    st.session_state.df_resumo_total = pd.concat(lista_resumos, ignore_index=True) if lista_resumos else None
+    
+    if finalizada:
+        st.session_state.df_transacoes_total, st.session_state.relatorio_duplicatas = consolidacao.finalizar()
+    else:
+        st.session_state.df_transacoes_total = consolidacao.df
+        st.session_state.relatorio_duplicatas = consolidacao.relatorio()
+
+def aplicar_resultados_ingestao(tarefa):
+    """
+    Incorpora à sessão os arquivos concluídos desde o último rerun
+    e reconsolida os dados; ao fim da tarefa, libera-a do session_state.
+    """
+    # "finalizada" é lida antes dos resultados: se já era True, nenhum resultado fica para trás
+    finalizada = tarefa.finalizada
+    novos = tarefa.resultados_desde(len(st.session_state.resultados_ingestao))
+    indice = st.session_state.indice_ingestao
+    empresa = st.session_state.get("empresa_ingestao")
+    
+    for resultado in novos:
+        st.session_state.log_uploads.append(resultado["mensagem"])
+        st.session_state.log_uploads.extend(resultado.get("avisos", []))
         
-        # Barra de progresso
-        progress_bar = st.progress(0)
-        total_files = len(uploaded_files)
+        # Na importação incremental, cada OFX passa pelo índice de FITIDs da conta
+        # e pelas transações que já estão na sessão
+        ofx_incremental = indice and resultado["status"] == "sucesso" and resultado["tipo"] == "ofx"
+        if ofx_incremental:
+            novas, avisos = indice.filtrar_novas(resultado["transacoes"], st.session_state.df_base_ingestao)
+            st.session_state.log_uploads.extend(avisos)
+            resultado["transacoes"] = novas
         
-        for i, file in enumerate(uploaded_files):
-            # Atualizar progresso
-            progress_bar.progress((i + 0.5) / total_files)
-            
-            resultado = processar_arquivo(file)
-            st.session_state.log_uploads.append(resultado["mensagem"])
-            
-            if resultado["status"] == "debug":
-                st.code(resultado["conteudo"], language="text")
-            elif resultado["status"] == "sucesso":
-                if "resumo" in resultado and not resultado["resumo"].empty:
-                    lista_resumos.append(resultado["resumo"])
-                if "transacoes" in resultado and not resultado["transacoes"].empty:
-                    lista_transacoes.append(resultado["transacoes"])
-            elif resultado["status"] == "erro":
-                st.error(resultado["mensagem"])
-            
-            # Atualizar progresso
-            progress_bar.progress((i + 1) / total_files)
+        # Com empresa informada, o arquivo já vai para o armazém (só as transações ainda não salvas)
+        if empresa and resultado["status"] == "sucesso" and "transacoes" in resultado:
+            salvas = ArmazemTransacoes().inserir(resultado["transacoes"], empresa)
+            if salvas is None:
+                st.session_state.log_uploads.append(
+                    f"❌ {resultado['arquivo']}: não foi possível salvar as transações no armazém de {empresa}"
+                )
+            else:
+                st.session_state.log_uploads.append(
+                    f"💾 {resultado['arquivo']}: {salvas} transações novas salvas no armazém de {empresa}"
+                )
+                # FITIDs só entram no índice depois que as transações estão gravadas
+                if ofx_incremental:
+                    indice.registrar(resultado["transacoes"])
         
-        # Consolidar dados
-        if lista_resumos:
-            st.session_state.df_resumo_total = pd.concat(lista_resumos, ignore_index=True)
-        else:
-            st.session_state.df_resumo_total = None
-            
-        if lista_transacoes:
-            df_transacoes_total = pd.concat(lista_transacoes, ignore_index=True)
-            df_transacoes_total = remover_duplicatas(df_transacoes_total)
-            
-            # Formatar valores
-            if "Valor (R$)" in df_transacoes_total.columns:
-                df_transacoes_total["Valor (R$)"] = df_transacoes_total["Valor (R$)"].apply(formatar_valor_br)
-            
-            st.session_state.df_transacoes_total = df_transacoes_total
-            st.session_state.processamento_concluido = True
-        else:
-            st.session_state.df_transacoes_total = None
-            
-        # Finalizar progresso
-        progress_bar.progress(100)
+        if resultado["status"] == "debug":
+            st.code(resultado["conteudo"], language="text")
+        elif resultado["status"] == "erro":
+            st.error(resultado["mensagem"])
+        st.session_state.resultados_ingestao.append(resultado)
+    
+    if novos or finalizada:
+        consolidar_ingestao(novos, finalizada)
+    
+    if finalizada:
+        st.session_state.tarefa_ingestao = None
+        st.session_state.consolidacao_ingestao = None
+        if tarefa.erro:
+            st.error(f"❌ Erro na ingestão: {tarefa.erro}")
+        st.session_state.processamento_concluido = st.session_state.df_transacoes_total is not None
         st.success("✅ Processamento concluído!")
 
-# Limpar dados
+@st.fragment(run_every=INTERVALO_ATUALIZACAO)
+def acompanhar_ingestao():
+    """Consulta a tarefa periodicamente e dispara um rerun quando há arquivos novos prontos"""
+    tarefa = st.session_state.get("tarefa_ingestao")
+    if tarefa is None:
+        return
+    st.progress(tarefa.progresso, text=f"{tarefa.concluidos}/{tarefa.total} arquivos processados")
+    st.caption(tarefa.resumo_status())
+    if tarefa.finalizada or tarefa.concluidos > len(st.session_state.resultados_ingestao):
+        st.rerun()
+
+# Limpar dados (cancelando a ingestão em andamento, se houver)
 if limpar:
+    tarefa = st.session_state.get("tarefa_ingestao")
+    if tarefa is not None:
+        tarefa.cancelar()
     nova_key = st.session_state.get("uploader_key", 0) + 1
     st.session_state.clear()
     st.session_state.uploader_key = nova_key
     st.rerun()
 
+if st.session_state.get("tarefa_ingestao") is not None:
+    aplicar_resultados_ingestao(st.session_state.tarefa_ingestao)
+if st.session_state.get("tarefa_ingestao") is not None:
+    acompanhar_ingestao()
+
 # Exibir logs de upload
 if st.session_state.log_uploads:
     with st.expander("📄 Logs de Processamento", expanded=True):
         for log in st.session_state.log_uploads:
             st.info(log)
 
+# Exibir duplicatas removidas na consolidação
+relatorio_duplicatas = st.session_state.get("relatorio_duplicatas")
+if relatorio_duplicatas is not None and not relatorio_duplicatas.empty:
+    with st.expander(f"🧹 Duplicatas removidas ({len(relatorio_duplicatas)})", expanded=False):
+        st.dataframe(
+            relatorio_duplicatas.assign(**{COLUNA_VALOR: formatar_brl(relatorio_duplicatas[COLUNA_VALOR])}),
+            use_container_width=True,
+            column_config={"Data": st.column_config.DateColumn("Data", format="DD/MM/YYYY")}
+        )
+
 # Exibir resumo das contas
 if st.session_state.df_resumo_total is not None:
     with st.expander("📋 Resumo das Contas", expanded=True):
@@ -300,15 +346,15 @@ if st.session_state.df_transacoes_total is not None:
         # Dividir em créditos e débitos para categorização
         df_valores_num = df_transacoes_total.copy()
         if "Valor (R$)" in df_valores_num.columns:
-            df_valores_num["Valor_Num"] = df_valores_num["Valor (R$)"].apply(converter_para_float)
-            df_creditos = df_valores_num[df_valores_num["Valor_Num"] > 0].copy()
-            df_debitos = df_valores_num[df_valores_num["Valor_Num"] <= 0].copy()
+            df_valores_num["__centavos"] = centavos_transacoes(df_valores_num).fillna(0)
+            df_creditos = df_valores_num[df_valores_num["__centavos"] > 0].copy()
+            df_debitos = df_valores_num[df_valores_num["__centavos"] <= 0].copy()
             
             # Remover coluna temporária
-            if "Valor_Num" in df_creditos.columns:
-                df_creditos = df_creditos.drop(columns=["Valor_Num"])
-            if "Valor_Num" in df_debitos.columns:
-                df_debitos = df_debitos.drop(columns=["Valor_Num"])
+            if "__centavos" in df_creditos.columns:
+                df_creditos = df_creditos.drop(columns=["__centavos"])
+            if "__centavos" in df_debitos.columns:
+                df_debitos = df_debitos.drop(columns=["__centavos"])
             
             # Categorizar créditos
             st.subheader("💰 Categorizar Créditos")
@@ -318,13 +364,15 @@ if st.session_state.df_transacoes_total is not None:
             if not df_creditos.empty and "Categoria" in df_creditos.columns:
                 with st.expander("✅ Resumo da Categorização de Créditos", expanded=True):
                     # Agrupar por categoria para mostrar totais
-                    resumo_creditos = df_creditos.groupby("Categoria").agg(
-                        Total=("Valor (R$)", lambda x: sum(converter_para_float(v) for v in x)),
+                    resumo_creditos = df_creditos.assign(
+                        __centavos=centavos_transacoes(df_creditos)
+                    ).groupby("Categoria").agg(
+                        Total=("__centavos", "sum"),
                         Quantidade=("Valor (R$)", "count")
                     ).reset_index()
                     
                     # Formatar o total
-                    resumo_creditos["Total"] = resumo_creditos["Total"].apply(formatar_valor_br)
+                    resumo_creditos["Total"] = formatar_brl(centavos_para_reais(resumo_creditos["Total"]))
                     
                     # Exibir tabela de resumo
                     st.dataframe(resumo_creditos, use_container_width=True)
@@ -336,18 +384,11 @@ if st.session_state.df_transacoes_total is not None:
                     df_auto_cat = df_desc_creditos[df_desc_creditos["Categoria"].notna() & (df_desc_creditos["Categoria"] != "")]
                     
                     if not df_auto_cat.empty:
-                        for _, row in df_auto_cat.iterrows():
-                            desc = row["Descrição"]
-                            cat = row["Categoria"]
-                            qtd = row["Quantidade"]
-                            total = row["Total"]
-                            
-                            # Formatar o total se for numérico
-                            if isinstance(total, (int, float)):
-                                total_fmt = formatar_valor_br(total)
-                            else:
-                                total_fmt = total
-                                
+                        # Totais formatados de uma vez
+                        totais = formatar_brl(df_auto_cat["Total"])
+                        for desc, cat, qtd, total_fmt in zip(
+                            df_auto_cat["Descrição"], df_auto_cat["Categoria"], df_auto_cat["Quantidade"], totais
+                        ):
                             st.markdown(f"**📌 {desc}** — {qtd}x — Total: {total_fmt} → ✅ **{cat}**")
                     else:
                         st.info("Nenhum item foi categorizado automaticamente.")
@@ -360,13 +401,15 @@ if st.session_state.df_transacoes_total is not None:
             if not df_debitos.empty and "Categoria" in df_debitos.columns:
                 with st.expander("✅ Resumo da Categorização de Débitos", expanded=True):
                     # Agrupar por categoria para mostrar totais
-                    resumo_debitos = df_debitos.groupby("Categoria").agg(
-                        Total=("Valor (R$)", lambda x: sum(abs(converter_para_float(v)) for v in x)),
+                    resumo_debitos = df_debitos.assign(
+                        __centavos=centavos_transacoes(df_debitos).abs()
+                    ).groupby("Categoria").agg(
+                        Total=("__centavos", "sum"),
                         Quantidade=("Valor (R$)", "count")
                     ).reset_index()
                     
                     # Formatar o total
-                    resumo_debitos["Total"] = resumo_debitos["Total"].apply(formatar_valor_br)
+                    resumo_debitos["Total"] = formatar_brl(centavos_para_reais(resumo_debitos["Total"]))
                     
                     # Exibir tabela de resumo
                     st.dataframe(resumo_debitos, use_container_width=True)
@@ -378,18 +421,11 @@ if st.session_state.df_transacoes_total is not None:
                     df_auto_cat = df_desc_debitos[df_desc_debitos["Categoria"].notna() & (df_desc_debitos["Categoria"] != "")]
                     
                     if not df_auto_cat.empty:
-                        for _, row in df_auto_cat.iterrows():
-                            desc = row["Descrição"]
-                            cat = row["Categoria"]
-                            qtd = row["Quantidade"]
-                            total = row["Total"]
-                            
-                            # Formatar o total se for numérico
-                            if isinstance(total, (int, float)):
-                                total_fmt = formatar_valor_br(total)
-                            else:
-                                total_fmt = total
-                                
+                        # Totais formatados de uma vez
+                        totais = formatar_brl(df_auto_cat["Total"])
+                        for desc, cat, qtd, total_fmt in zip(
+                            df_auto_cat["Descrição"], df_auto_cat["Categoria"], df_auto_cat["Quantidade"], totais
+                        ):
                             st.markdown(f"**📌 {desc}** — {qtd}x — Total: {total_fmt} → ✅ **{cat}**")
                     else:
                         st.info("Nenhum item foi categorizado automaticamente.")
@@ -407,62 +443,15 @@ if st.session_state.df_transacoes_total is not None:
             # Exibir transações categorizadas
             st.subheader("📋 Todas as Transações Categorizadas")
             
-            # Adicionar filtros para a visualização
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                filtro_tipo = st.multiselect(
-                    "Filtrar por Tipo:",
-                    options=["Crédito", "Débito"],
-                    default=["Crédito", "Débito"]
-                )
-            with col2:
-                categorias_disponiveis = sorted(df_transacoes_total["Categoria"].dropna().unique().tolist())
-                filtro_categoria = st.multiselect(
-                    "Filtrar por Categoria:",
-                    options=categorias_disponiveis,
-                    default=[]
-                )
-            with col3:
-                filtro_texto = st.text_input("Buscar na descrição:", "")
-            
-            # Aplicar filtros
-            df_filtrado = df_transacoes_total.copy()
-            
-            # Filtro por tipo
-            if filtro_tipo and len(filtro_tipo) < 2:  # Se não estiverem ambos selecionados
-                if "Crédito" in filtro_tipo:
-                    df_filtrado = df_filtrado[df_filtrado["Valor (R$)"].apply(
-                        lambda x: converter_para_float(x) > 0 if pd.notna(x) else False
-                    )]
-                elif "Débito" in filtro_tipo:
-                    df_filtrado = df_filtrado[df_filtrado["Valor (R$)"].apply(
-                        lambda x: converter_para_float(x) <= 0 if pd.notna(x) else False
-                    )]
-            
-            # Filtro por categoria
-            if filtro_categoria:
-                df_filtrado = df_filtrado[df_filtrado["Categoria"].isin(filtro_categoria)]
-            
-            # Filtro por texto na descrição
-            if filtro_texto:
-                df_filtrado = df_filtrado[df_filtrado["Descrição"].str.contains(filtro_texto, case=False, na=False)]
-            
-            # Exibir DataFrame filtrado
-            st.dataframe(df_filtrado, use_container_width=True)
-            
-            # Mostrar estatísticas do filtro
-            st.info(f"Exibindo {len(df_filtrado)} de {len(df_transacoes_total)} transações.")
-            
-            # Botão para download
-            output = io.BytesIO()
-            df_transacoes_total.to_excel(output, index=False)
-            output.seek(0)
+            # Filtros, ordenação e paginação no servidor: só a página visível vai ao navegador
+            exibir_grade_transacoes(df_transacoes_total)
             
-            st.download_button(
-                label="📥 Baixar transações categorizadas (.xlsx)",
-                data=output,
-                file_name=f"transacoes_categorizadas_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            # Download gerado só quando pedido (e reaproveitado enquanto os dados não mudam)
+            exibir_download(
+                [("Transações", df_transacoes_total.drop(columns=[COLUNA_CENTAVOS], errors="ignore"), False)],
+                f"transacoes_categorizadas_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                chave="download_transacoes",
+                rotulo="📥 Baixar transações categorizadas"
             )
     
 
@@ -475,26 +464,35 @@ if st.session_state.df_transacoes_total is not None:
         # Adicionar estoque
         coletar_estoques(df_transacoes_total)
 
+    # Grafo das análises (fluxo → DRE → parecer → GPT): cada etapa só é recalculada
+    # quando as transações categorizadas ou os CSVs de que depende mudam
+    if "grafo_analises" not in st.session_state:
+        st.session_state.grafo_analises = criar_grafo_analises()
+    grafo = st.session_state.grafo_analises
+    grafo.definir_entrada("transacoes", df_transacoes_total)
+
     with tab3:
         st.header("💰 Fluxo de Caixa")
         
         # Exibir fluxo de caixa
         if st.button("📊 Gerar Fluxo de Caixa", key="btn_fluxo"):
+            st.session_state.exibir_fluxo = True
+        
+        if st.session_state.get("exibir_fluxo"):
             with st.spinner("Gerando fluxo de caixa... ⏳"):
-                resultado_fluxo = exibir_fluxo_caixa(df_transacoes_total)
-                
-                # Salvar resultado para uso na análise GPT
-                st.session_state.resultado_fluxo = resultado_fluxo
+                fluxo = grafo.obter("fluxo")
+            renderizar_fluxo_caixa(fluxo)
     
     with tab4:
         st.header("📈 Demonstrativo de Resultados (DRE)")
         
         if st.button("📊 Gerar DRE", key="btn_dre"):
+            st.session_state.exibir_dre = True
+        
+        if st.session_state.get("exibir_dre"):
             with st.spinner("Gerando DRE... ⏳"):
-                resultado_fluxo = exibir_fluxo_caixa(df_transacoes_total)
-                resultado_dre = exibir_dre(df_fluxo=resultado_fluxo)
-                st.session_state.resultado_fluxo = resultado_fluxo
-                st.session_state.resultado_dre = resultado_dre
+                resultado_dre = grafo.obter("dre")
+            renderizar_dre(resultado_dre)
         
         # if st.button("🧾 Gerar Parecer Diagnóstico", key="btn_parecer"):
         #    with st.spinner("Gerando parecer diagnóstico... ⏳"):
@@ -504,10 +502,14 @@ if st.session_state.df_transacoes_total is not None:
         st.header("💼 Análise Sistema")
         
         if st.button("🧾 Gerar Parecer Diagnóstico", key="btn_parecer"):
+            st.session_state.exibir_parecer = True
+        
+        if st.session_state.get("exibir_parecer"):
+            st.header("📄 Diagnóstico Financeiro Interativo")
+            grafo.definir_entrada("periodo_parecer", selecionar_periodo_parecer())
             with st.spinner("Gerando parecer diagnóstico... ⏳"):
-                df_transacoes_total = st.session_state.df_transacoes_total
-                resultado_fluxo = st.session_state.get("resultado_fluxo", exibir_fluxo_caixa(df_transacoes_total))
-                gerar_parecer_automatico(resultado_fluxo)
+                parecer = grafo.obter("parecer")
+            exibir_parecer(parecer)
 
     with tab6:
         st.header("🤖 Análise GPT - Parecer Financeiro Inteligente")
@@ -524,26 +526,22 @@ if st.session_state.df_transacoes_total is not None:
             if not descricao_empresa.strip():
                 st.warning("⚠️ Por favor, preencha a descrição da empresa antes de gerar o parecer.")
             else:
+                # Fluxo e DRE vêm do grafo; a API só é chamada de novo se eles ou a descrição mudaram
+                grafo.definir_entrada("descricao_empresa", descricao_empresa)
                 with st.spinner("Gerando parecer financeiro com inteligência artificial... ⏳"):
-                    # Verificar se já temos os resultados de DRE e fluxo de caixa
-                    resultado_fluxo = st.session_state.get("resultado_fluxo", exibir_fluxo_caixa(df_transacoes_total))
-                    resultado_dre = st.session_state.get("resultado_dre", exibir_dre(df_fluxo=resultado_fluxo))
-                    
-                    parecer = analisar_dfs_com_gpt(resultado_dre, resultado_fluxo, descricao_empresa)
-                
-                st.success("✅ Parecer gerado com sucesso!")
+                    analise = grafo.obter("analise_gpt")
                 
-                # Exibir o parecer em um formato mais agradável
-                #st.markdown("### 📝 Parecer Financeiro")
-                #st.markdown(parecer)
-                
-                # Opção para download do parecer
-                #st.download_button(
-                #    label="📥 Baixar Parecer (.txt)",
-                #    data=parecer,
-                #    file_name=f"parecer_financeiro_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
-                #    mime="text/plain"
-                #)
+                if analise["status"] == "sucesso":
+                    st.success("✅ Parecer gerado com sucesso!")
+                elif analise["status"] == "erro":
+                    st.error(analise["mensagem"])
+                else:
+                    st.warning(analise["mensagem"])
+        
+        # Último parecer gerado continua visível nos reruns, sem nova chamada à API
+        analise = grafo.ultimo_resultado("analise_gpt")
+        if analise is not None:
+            exibir_analise_gpt(analise)
 
 # Rodapé
 st.markdown("---")
@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-import io
-from extractors.ofx_extractor import extrair_lancamentos_ofx
+import hashlib
+from extractors.ingestao import processar_arquivos
+from extractors.utils import concatenar_lotes
+from extractors.moeda import COLUNA_CENTAVOS, formatar_brl
+from logic.Analises_DFC_DRE.exportacao import exibir_download
 
 st.set_page_config(page_title="Conversor OFX", layout="wide")
 st.title("💸 Leitor de Arquivos OFX")
@@ -22,48 +25,66 @@ uploaded_files = st.file_uploader(
     key=f"uploader_{st.session_state.uploader_key}"
 )
 
+# Impressão digital dos uploads: os mesmos arquivos não são processados de novo a cada rerun
+impressao_uploads = hashlib.sha256(
+    "|".join(f"{file.file_id}:{file.name}:{file.size}" for file in uploaded_files or []).encode("utf-8")
+).hexdigest()
+
 # Processamento
-if uploaded_files:
-    todas_transacoes = []
-    st.session_state.mensagens.clear()
+if uploaded_files and st.session_state.get("impressao_uploads_ofx") != impressao_uploads:
+    lista_transacoes = []
+    st.session_state.mensagens = []
 
-    for file in uploaded_files:
-        transacoes, encoding = extrair_lancamentos_ofx(file, file.name)
+    progress_bar = st.progress(0)
+    arquivos = [(file.name, file.getvalue()) for file in uploaded_files]
+    resultados = processar_arquivos(
+        arquivos,
+        ao_concluir=lambda concluidos, total, _: progress_bar.progress(concluidos / total)
+    )
+    progress_bar.empty()
 
-        if isinstance(transacoes, str) or not transacoes:
-            st.error(f"❌ Erro ao processar {file.name}: {encoding}")
+    for (nome, _), resultado in zip(arquivos, resultados):
+        if resultado["status"] != "sucesso":
+            st.session_state.mensagens.append(("erro", resultado["mensagem"]))
             continue
 
-        st.success(f"✅ {file.name} processado com sucesso (codificação: {encoding})")
-        todas_transacoes.extend(transacoes)
+        st.session_state.mensagens.append(
+            ("sucesso", f"✅ {nome} processado com sucesso (codificação: {resultado['encoding']})")
+        )
+        lista_transacoes.append(resultado["transacoes"])
 
     # Monta o DataFrame
-    df = pd.DataFrame(todas_transacoes)
+    df = concatenar_lotes(lista_transacoes) if lista_transacoes else pd.DataFrame()
 
     if not df.empty:
-        # Formata valor para BR
-        df["Valor (R$)"] = df["Valor (R$)"].map(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        # Formata valor para BR; a coluna interna de centavos não vai para a planilha
+        df["Valor (R$)"] = formatar_brl(df["Valor (R$)"], simbolo="")
+        df = df.drop(columns=[COLUNA_CENTAVOS], errors="ignore")
         st.session_state.df_ofx = df
+    st.session_state.impressao_uploads_ofx = impressao_uploads
 
 # Exibe mensagens
 if st.session_state.mensagens:
-    for msg in st.session_state.mensagens:
-        st.info(msg)
+    for status, msg in st.session_state.mensagens:
+        if status == "erro":
+            st.error(msg)
+        else:
+            st.success(msg)
 
 # Exibe resultados
 if st.session_state.df_ofx is not None:
     st.success(f"{len(st.session_state.df_ofx)} transações carregadas.")
-    st.dataframe(st.session_state.df_ofx, use_container_width=True)
-
-    output = io.BytesIO()
-    st.session_state.df_ofx.to_excel(output, index=False)
-    output.seek(0)
+    st.dataframe(
+        st.session_state.df_ofx,
+        use_container_width=True,
+        column_config={"Data": st.column_config.DateColumn("Data", format="DD/MM/YYYY")}
+    )
 
-    st.download_button(
-        label="📥 Baixar Excel Consolidado",
-        data=output,
-        file_name="transacoes_ofx_consolidado.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    exibir_download(
+        [("Transações", st.session_state.df_ofx, False)],
+        "transacoes_ofx_consolidado",
+        chave="download_ofx",
+        rotulo="📥 Baixar Consolidado"
     )
 
 # Limpar tela
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import io
+from extractors.codificacao import detectar_codificacao
 
 st.set_page_config(page_title="Leitor CNAB240 .RET", layout="wide")
 st.title("📄 Leitor de Arquivo CNAB240 (.RET)")
@@ -129,7 +130,8 @@ uploaded_file = st.file_uploader(
 
 # Processamento
 if uploaded_file:
-    conteudo = uploaded_file.read().decode("utf-8", errors="ignore")
+    # Decodificação correta preserva as posições fixas do layout CNAB240
+    conteudo, _, _ = detectar_codificacao(uploaded_file.read())
     df = ler_cnab240_segmento_j(conteudo)
 
     if not df.empty:
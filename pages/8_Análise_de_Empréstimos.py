@@ -27,15 +27,18 @@ def carregar_dados_ofx(uploaded_files):
         try:
             file_corrigido = corrigir_ofx_valores(file)
             transacoes, encoding = extrair_lancamentos_ofx(file_corrigido, file.name)
-            if not transacoes or isinstance(transacoes, str):
+            if transacoes.empty:
                 st.error(f"Erro ao processar {file.name}")
                 continue
-            for t in transacoes:
-                t['Arquivo'] = file.name
-            todas_transacoes.extend(transacoes)
+            todas_transacoes.append(transacoes)
         except Exception as e:
             st.error(f"Erro ao processar {file.name}: {e}")
-    df = pd.DataFrame(todas_transacoes)
+    df = pd.concat(todas_transacoes, ignore_index=True) if todas_transacoes else pd.DataFrame()
+    # Marcações salvas e filtros desta página trabalham com a data em texto (DD/MM/AAAA)
+    if "Data" in df.columns:
+        df["Data"] = df["Data"].dt.strftime("%d/%m/%Y")
+    for coluna in df.select_dtypes("category").columns:
+        df[coluna] = df[coluna].astype(str)
     # Remove possíveis duplicidades
     colunas_unicas = ['Data', 'Descrição', 'Valor (R$)', 'Num Doc']
     colunas_unicas = [col for col in colunas_unicas if col in df.columns]
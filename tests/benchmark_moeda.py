@@ -0,0 +1,52 @@
+"""
+Tempo de converter_brl e formatar_brl em 1 milhão de valores, comparado ao
+laço por valor que as funções substituíram (.apply com format e replace).
+
+Uso: python tests/benchmark_moeda.py [quantidade]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extractors.moeda import converter_brl, formatar_brl  # noqa: E402
+
+
+def formatar_por_valor(valor):
+    texto = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return texto.replace("-0,00", "0,00")
+
+
+def converter_por_valor(texto):
+    texto = texto.replace("R$", "").replace(" ", "").replace(".", "").replace(",", ".")
+    if texto.endswith("-"):
+        return -float(texto[:-1])
+    return float(texto)
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{nome:<28} {time.perf_counter() - inicio:6.2f}s")
+    return resultado
+
+
+def main(quantidade=1_000_000):
+    rng = np.random.default_rng(0)
+    numeros = pd.Series(np.round((rng.random(quantidade) - 0.3) * 10.0 ** rng.integers(0, 8, quantidade), 2))
+    print(f"{quantidade} valores")
+
+    textos = medir("formatar_brl", lambda: formatar_brl(numeros))
+    antigos = medir(".apply(format)", lambda: numeros.apply(formatar_por_valor))
+    assert (textos == antigos).all()
+
+    convertidos = medir("converter_brl", lambda: converter_brl(textos))
+    medir(".apply(float)", lambda: textos.str.replace("R$ -", "-", regex=False).apply(converter_por_valor))
+    assert (convertidos == numeros).all()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
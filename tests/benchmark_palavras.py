@@ -0,0 +1,71 @@
+"""
+Tempo do ClassificadorPalavras (autômato de Aho-Corasick por Tipo) com 10 mil
+palavras-chave e 50 mil descrições, comparado ao laço antigo do categorizador
+(iterrows sobre o CSV para cada descrição, primeira palavra contida vence).
+O laço antigo roda numa amostra das descrições e o tempo é extrapolado.
+
+Uso: python tests/benchmark_palavras.py [palavras] [descricoes]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logic.Analises_DFC_DRE.palavras_chave import ClassificadorPalavras  # noqa: E402
+
+TIPOS = ["Crédito", "Débito"]
+AMOSTRA_LACO = 20
+
+
+def categoria_por_laco(df_palavras, desc, tipo_lancamento):
+    for _, row_palavra in df_palavras.iterrows():
+        if row_palavra["Tipo"] == tipo_lancamento and row_palavra["PalavraChave"].lower() in desc.lower():
+            return row_palavra["Categoria"]
+    return ""
+
+
+def textos_aleatorios(rng, quantidade, minimo, maximo):
+    # Alfabeto pequeno: muitas palavras se sobrepõem e aparecem dentro das descrições
+    letras = np.array(list("ABCDEFGHIJ "))
+    tamanhos = rng.integers(minimo, maximo + 1, quantidade)
+    return ["".join(rng.choice(letras, tamanho)).strip() or "A" for tamanho in tamanhos]
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    print(f"{nome:<34} {segundos:8.2f}s")
+    return resultado, segundos
+
+
+def main(palavras=10_000, descricoes=50_000):
+    rng = np.random.default_rng(0)
+    df_palavras = pd.DataFrame({
+        "PalavraChave": textos_aleatorios(rng, palavras, 4, 9),
+        "Tipo": rng.choice(TIPOS, palavras),
+        "Categoria": [f"Categoria {i % 300}" for i in range(palavras)],
+    })
+    textos = textos_aleatorios(rng, descricoes, 20, 60)
+    print(f"{palavras} palavras-chave, {descricoes} descrições")
+
+    classificador, _ = medir("montar autômatos", lambda: ClassificadorPalavras(df_palavras))
+    resultados, _ = medir("categorizar (Crédito e Débito)", lambda: {
+        tipo: classificador.categorizar(textos, tipo) for tipo in TIPOS
+    })
+
+    amostra = textos[:AMOSTRA_LACO]
+    antigos, segundos = medir(f"laço iterrows ({AMOSTRA_LACO} descrições)", lambda: {
+        tipo: [categoria_por_laco(df_palavras, desc, tipo) for desc in amostra] for tipo in TIPOS
+    })
+    print(f"{'laço iterrows (extrapolado)':<34} {segundos * descricoes / AMOSTRA_LACO:8.0f}s")
+    for tipo in TIPOS:
+        assert resultados[tipo][:AMOSTRA_LACO] == antigos[tipo]
+
+
+if __name__ == "__main__":
+    argumentos = [int(valor) for valor in sys.argv[1:3]]
+    main(*argumentos)
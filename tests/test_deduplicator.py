@@ -0,0 +1,93 @@
+import pandas as pd
+
+from logic.Analises_DFC_DRE.deduplicator import deduplicar
+
+
+def transacoes(linhas):
+    if isinstance(linhas, dict):
+        return pd.DataFrame(linhas)
+    return pd.DataFrame(linhas, columns=["Data", "Descrição", "Valor (R$)", "Conta", "Arquivo"])
+
+
+def test_repetida_aponta_para_a_linha_que_ficou():
+    # A mesma linha duas vezes no PDF (sem conta) e a do OFX (com conta): fica só a do OFX
+    df = transacoes([
+        ("2024-01-02", "TARIFA", -5.0, None, "a.pdf"),
+        ("2024-01-02", "TARIFA", -5.0, None, "a.pdf"),
+        ("2024-01-02", "TARIFA", -5.0, "123", "b.ofx"),
+    ])
+    df_final, relatorio = deduplicar(df)
+    assert df_final["Arquivo"].tolist() == ["b.ofx"]
+    assert relatorio["Motivo"].tolist() == ["exata (sem conta)", "exata"]
+    assert relatorio["Arquivo mantido"].tolist() == ["b.ofx", "b.ofx"]
+
+
+def test_mesma_conta_fica_a_primeira_e_nao_altera_a_entrada():
+    df = transacoes([
+        ("2024-01-02", "PIX  Recebido", 10.0, "1", "a.ofx"),
+        ("2024-01-02", "pix recebido", 10.0, "1", "b.ofx"),
+        ("2024-01-02", "PIX RECEBIDO", 10.0, "2", "b.ofx"),
+    ])
+    df_final, relatorio = deduplicar(df)
+    assert df_final.index.tolist() == [0, 2]
+    assert relatorio["Arquivo mantido"].tolist() == ["a.ofx"]
+    assert len(df) == 3
+
+
+def test_aproximadas_mantem_a_linha_com_conta():
+    df = transacoes([
+        ("2024-01-02", "PIX RECEBIDO FULANO", 10.0, None, "a.pdf"),
+        ("2024-01-03", "PIX RECEBIDO FULANO DE TAL", 10.0, "1", "b.ofx"),
+    ])
+    assert len(deduplicar(df)[0]) == 2
+    df_final, relatorio = deduplicar(df, aproximadas=True)
+    assert df_final["Arquivo"].tolist() == ["b.ofx"]
+    assert relatorio["Motivo"].iloc[0].startswith("aproximada")
+
+
+def test_incremental_igual_ao_lote_inteiro():
+    import numpy as np
+    from logic.Analises_DFC_DRE.deduplicator import DeduplicacaoIncremental
+
+    rng = np.random.default_rng(3)
+    lotes = []
+    for arquivo in range(6):
+        n = 300
+        lotes.append(transacoes({
+            "Data": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 20, n), unit="D"),
+            "Descrição": rng.choice(["PIX", "TARIFA", "TED", "Pix "], n),
+            "Valor (R$)": rng.integers(1, 30, n) * 1.0,
+            "Conta": rng.choice([None, "1", "2"], n),
+            "Arquivo": f"arquivo{arquivo}.ofx",
+        }))
+
+    for aproximadas in (False, True):
+        esperado, relatorio_esperado = deduplicar(pd.concat(lotes, ignore_index=True), aproximadas=aproximadas)
+        incremental = DeduplicacaoIncremental(aproximadas=aproximadas)
+        # Arquivos concluídos fora da ordem do upload
+        for posicao in [3, 0, 5, 1, 4, 2]:
+            incremental.acrescentar(lotes[posicao], ordem=posicao)
+        df_final, relatorio = incremental.finalizar()
+        pd.testing.assert_frame_equal(df_final, esperado.reset_index(drop=True), check_dtype=False, check_categorical=False)
+        pd.testing.assert_frame_equal(
+            relatorio.reset_index(drop=True), relatorio_esperado.reset_index(drop=True), check_dtype=False, check_categorical=False
+        )
+
+
+def test_incremental_arquivo_anterior_remove_linha_mantida():
+    from logic.Analises_DFC_DRE.deduplicator import DeduplicacaoIncremental
+
+    b = transacoes([
+        ("2024-01-02", "TARIFA", -5.0, None, "b.pdf"),
+        ("2024-01-02", "TARIFA", -5.0, None, "b.pdf"),
+    ])
+    a = transacoes([("2024-01-02", "TARIFA", -5.0, None, "a.pdf")])
+    incremental = DeduplicacaoIncremental()
+    incremental.acrescentar(b, ordem=1)
+    assert incremental.relatorio()["Arquivo mantido"].tolist() == ["b.pdf"]
+    incremental.acrescentar(a, ordem=0)
+
+    df_final, relatorio = incremental.finalizar()
+    _, relatorio_esperado = deduplicar(pd.concat([a, b], ignore_index=True))
+    assert df_final["Arquivo"].tolist() == ["a.pdf"]
+    assert relatorio["Arquivo mantido"].tolist() == relatorio_esperado["Arquivo mantido"].tolist() == ["a.pdf", "a.pdf"]
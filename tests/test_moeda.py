@@ -0,0 +1,116 @@
+"""
+Propriedades de extractors.moeda, verificadas em amostras aleatórias com semente fixa
+(sem dependência de bibliotecas de testes por propriedades).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from extractors.moeda import converter_brl, formatar_brl, para_centavos, centavos_para_reais
+
+AMOSTRA = 200_000
+
+
+@pytest.fixture(scope="module")
+def centavos_aleatorios():
+    rng = np.random.default_rng(20240501)
+    # Magnitudes de centavos até trilhões de reais, com sinais e zeros
+    expoentes = rng.integers(0, 15, AMOSTRA)
+    centavos = (rng.random(AMOSTRA) * 10.0 ** expoentes).astype(np.int64)
+    return centavos * rng.choice([-1, 1], AMOSTRA)
+
+
+def test_formatar_e_converter_ida_e_volta(centavos_aleatorios):
+    reais = centavos_aleatorios / 100
+    textos = formatar_brl(reais)
+    assert (converter_brl(textos).to_numpy() == reais).all()
+    assert (para_centavos(textos).to_numpy(dtype=np.int64) == centavos_aleatorios).all()
+
+
+def test_formatar_igual_ao_format_do_python():
+    rng = np.random.default_rng(7)
+    numeros = np.concatenate([
+        np.arange(0, 100_000) / 1000,  # três casas: todos os "empates" decimais
+        rng.random(AMOSTRA) * 1e7,
+        -rng.random(AMOSTRA) * 100,
+    ])
+    # Única diferença intencional: negativos que arredondam para zero saem sem sinal
+    esperado = [
+        "R$ " + f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".").replace("-0,00", "0,00")
+        for v in numeros
+    ]
+    assert formatar_brl(numeros).tolist() == esperado
+
+
+@pytest.mark.parametrize("numero, texto", [
+    (0.005, "R$ 0,01"),    # 0.005 em binário fica acima da metade
+    (0.015, "R$ 0,01"),    # e 0.015, abaixo
+    (0.125, "R$ 0,12"),    # empate exato: vai para o par
+    (0.375, "R$ 0,38"),
+    (-0.005, "R$ -0,01"),
+    (-0.001, "R$ 0,00"),   # sem "-0,00"
+    (-0.0, "R$ 0,00"),
+    (2.675, "R$ 2,67"),
+    (1234567.891, "R$ 1.234.567,89"),
+    (1e12, "R$ 1.000.000.000.000,00"),
+])
+def test_arredondamento(numero, texto):
+    assert formatar_brl(numero) == texto
+
+
+def test_para_centavos_arredonda_como_formatar():
+    numeros = np.arange(-50_000, 50_000) / 1000
+    centavos = para_centavos(numeros).to_numpy(dtype=np.int64)
+    formatados = converter_brl(formatar_brl(numeros)).to_numpy()
+    assert (centavos == np.round(formatados * 100).astype(np.int64)).all()
+
+
+@pytest.mark.parametrize("texto, valor", [
+    ("1.234,56", 1234.56),
+    ("R$ 1.234,56", 1234.56),
+    ("R$1.234,56", 1234.56),
+    ("-1.234,56", -1234.56),
+    ("1.234,56-", -1234.56),
+    ("R$ -1.234,56", -1234.56),
+    ("-R$ 1.234,56", -1234.56),
+    ("(1.234,56)", -1234.56),
+    ("  0,01 ", 0.01),
+    ("1\xa0234,56", 1234.56),
+    ("12,5", 12.5),
+    ("100", 100.0),
+])
+def test_converter_formatos(texto, valor):
+    assert converter_brl(texto) == valor
+
+
+@pytest.mark.parametrize("texto", ["", "   ", "abc", "1,2,3", None, "R$"])
+def test_converter_invalidos(texto):
+    assert np.isnan(converter_brl(texto))
+    assert converter_brl(texto, padrao=0.0) == 0.0
+
+
+def test_sinal_prefixo_e_sufixo_equivalentes(centavos_aleatorios):
+    positivos = np.abs(centavos_aleatorios) / 100
+    textos = formatar_brl(positivos, simbolo="")
+    prefixo = converter_brl("-" + textos)
+    sufixo = converter_brl(textos + "-")
+    parenteses = converter_brl("(" + textos + ")")
+    assert (prefixo.to_numpy() == -positivos).all()
+    assert prefixo.equals(sufixo) and prefixo.equals(parenteses)
+
+
+def test_entradas_mistas_preservam_indice():
+    serie = pd.Series(["1.000,00", 2.5, None, "x", 3], index=[10, 11, 12, 13, 14], dtype=object)
+    convertidos = converter_brl(serie)
+    assert convertidos.index.tolist() == [10, 11, 12, 13, 14]
+    assert convertidos.iloc[:2].tolist() == [1000.0, 2.5]
+    assert convertidos.iloc[2:4].isna().all() and convertidos.iloc[4] == 3.0
+    assert formatar_brl(serie, vazio="-").tolist() == ["R$ 1.000,00", "R$ 2,50", "-", "-", "R$ 3,00"]
+
+
+def test_centavos_para_reais_ida_e_volta(centavos_aleatorios):
+    centavos = pd.Series(centavos_aleatorios).astype("Int64")
+    centavos.iloc[::7] = pd.NA
+    reais = centavos_para_reais(centavos)
+    assert reais.isna().equals(centavos.isna())
+    assert para_centavos(reais).equals(centavos)
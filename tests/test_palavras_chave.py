@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.Analises_DFC_DRE.palavras_chave import AutomatoPalavras, ClassificadorPalavras
+
+
+def categoria_por_laco(df_palavras, desc, tipo_lancamento):
+    # Laço que o autômato substituiu: primeira palavra do CSV (do tipo) contida na descrição
+    for _, row_palavra in df_palavras.iterrows():
+        if row_palavra["Tipo"] == tipo_lancamento and row_palavra["PalavraChave"].lower() in desc.lower():
+            return row_palavra["Categoria"]
+    return ""
+
+
+def palavras(linhas):
+    return pd.DataFrame(linhas, columns=["PalavraChave", "Tipo", "Categoria"])
+
+
+@pytest.mark.parametrize("linhas, descricao, tipo, esperado", [
+    # Sobrepostas: "PIX REC" e "RECEBIDO" se cruzam; vence a primeira do CSV
+    ([("RECEBIDO", "Crédito", "B"), ("PIX REC", "Crédito", "A")], "pix recebido fulano", "Crédito", "B"),
+    ([("PIX REC", "Crédito", "A"), ("RECEBIDO", "Crédito", "B")], "pix recebido fulano", "Crédito", "A"),
+    # Uma palavra contida em outra: a menor só vence se vier antes no CSV
+    ([("TARIFA PACOTE", "Débito", "Pacote"), ("TARIFA", "Débito", "Tarifa")], "TARIFA PACOTE SERV", "Débito", "Pacote"),
+    ([("TARIFA", "Débito", "Tarifa"), ("TARIFA PACOTE", "Débito", "Pacote")], "TARIFA PACOTE SERV", "Débito", "Tarifa"),
+    ([("TARIFA PACOTE", "Débito", "Pacote"), ("TARIFA", "Débito", "Tarifa")], "TARIFA AVULSA", "Débito", "Tarifa"),
+    # Palavra que só aparece pelo sufixo de outra (ligação de falha)
+    ([("ABCD", "Débito", "X"), ("BC", "Débito", "Y")], "xabcx", "Débito", "Y"),
+    # Tipo separa os autômatos: a palavra de Crédito não vale para Débito
+    ([("PIX", "Crédito", "Receita"), ("PIX ENVIADO", "Débito", "Fornecedor")], "PIX ENVIADO", "Débito", "Fornecedor"),
+    ([("PIX", "Crédito", "Receita")], "PIX", "Débito", ""),
+    ([("PIX", "Crédito", "Receita")], "sem palavra", "Crédito", ""),
+])
+def test_casos_iguais_ao_laco(linhas, descricao, tipo, esperado):
+    df_palavras = palavras(linhas)
+    classificador = ClassificadorPalavras(df_palavras)
+    assert categoria_por_laco(df_palavras, descricao, tipo) == esperado
+    assert classificador.categoria(descricao, tipo) == esperado
+    assert classificador.categorizar([descricao, descricao], tipo) == [esperado, esperado]
+
+
+def test_aleatorio_igual_ao_laco():
+    rng = np.random.default_rng(21)
+    letras = np.array(list("abcab "))  # alfabeto pequeno: muitas sobreposições e palavras contidas em outras
+
+    def textos(quantidade, minimo, maximo):
+        return ["".join(rng.choice(letras, rng.integers(minimo, maximo + 1))).strip() or "a" for _ in range(quantidade)]
+
+    df_palavras = palavras(zip(
+        textos(120, 1, 6),
+        rng.choice(["Crédito", "Débito"], 120),
+        [f"Categoria {i}" for i in range(120)],
+    ))
+    df_palavras["PalavraChave"] = [
+        p.upper() if i % 3 == 0 else p for i, p in enumerate(df_palavras["PalavraChave"])
+    ]
+    descricoes = textos(150, 0, 25)
+    classificador = ClassificadorPalavras(df_palavras)
+    for tipo in ("Crédito", "Débito", "Outro"):
+        esperado = [categoria_por_laco(df_palavras, d, tipo) for d in descricoes]
+        assert classificador.categorizar(descricoes, tipo) == esperado
+
+
+def test_prioridade_e_a_ordem_da_lista():
+    automato = AutomatoPalavras(["cd", "abcde", "b"])
+    assert automato.buscar("xxabcdexx") == 0
+    assert automato.buscar("xxbxx") == 2
+    assert automato.buscar("xxx") is None
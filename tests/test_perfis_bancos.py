@@ -0,0 +1,36 @@
+import pytest
+
+from extractors.perfis_bancos import identificar_perfil, normalizar_cabecalho
+
+
+def cabecalho(org, bankid=b"0000", fid=b"0"):
+    return b"OFXHEADER:100\n<OFX><SIGNONMSGSRSV1><SONRS><FI><ORG>" + org + b"<FID>" + fid + b"</FI></SONRS>" \
+        b"<BANKACCTFROM><BANKID>" + bankid + b"</BANKACCTFROM><STMTTRN><MEMO>x</STMTTRN>"
+
+
+@pytest.mark.parametrize("org", [
+    "ITAÚ".encode("utf-8"),
+    "ITAÚ".encode("latin-1"),
+    "ITAÚ".encode("utf-8").decode("cp1252").encode("utf-8"),   # "ITAÃš" gravado em UTF-8
+    "Itau Unibanco".encode("ascii"),
+])
+def test_org_itau_com_acento_e_mojibake(org):
+    assert identificar_perfil(cabecalho(org))["chave"] == "itau"
+
+
+def test_bankid_tem_prioridade_e_ignora_zeros():
+    assert identificar_perfil(cabecalho(b"QUALQUER", b"0748"))["chave"] == "sicredi"
+    assert identificar_perfil(cabecalho(b"QUALQUER"))["chave"] == "padrao"
+
+
+def test_codigo_vence_org_de_outro_banco():
+    # BANKID do Itaú com ORG citando o Bradesco (ex.: conta migrada): vale o código
+    assert identificar_perfil(cabecalho(b"BANCO BRADESCO S.A.", b"341"))["chave"] == "itau"
+    # Sem BANKID conhecido, o FID vem antes do ORG
+    assert identificar_perfil(cabecalho(b"BANCO BRADESCO S.A.", b"0000", b"0748"))["chave"] == "sicredi"
+    assert identificar_perfil(cabecalho(b"BANCO BRADESCO S.A."))["chave"] == "bradesco"
+
+
+def test_normalizar_cabecalho_preserva_texto_correto():
+    assert normalizar_cabecalho("São Paulo".encode("utf-8")) == "SAO PAULO"
+    assert normalizar_cabecalho("São Paulo".encode("latin-1")) == "SAO PAULO"